@@ -0,0 +1,332 @@
+import argparse
+import html
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import plotly
+import plotly.offline
+
+from data_pipeline import DEFAULT_CHUNK_SIZE, dataset_partitions, prepare_dataset, read_snapshot
+from distinct_sketch import DistinctSketches
+from filter_index import FilterIndex
+from metrics_layer import FilterContext, MetricsStore, filter_key
+from olap_cube import build_cube, merge_cubes, rollup, slice_cube
+from report_figures import ORDER_FIGURES, PRODUCT_FIGURES, format_kpi, kpi_values
+from shared_dataset import load_shared_dataset, open_dataset, publish_dataset, shared_path
+
+try:
+    import kaleido
+except ImportError:  # PNG bersifat opsional; HTML & JSON tetap ditulis tanpa kaleido
+    kaleido = None
+
+# --- Laporan Batch per Preset Filter (tanpa Streamlit) ---
+# Menghasilkan baris KPI serta grafik bagian Analisis Pesanan & Analisis Produk untuk banyak
+# preset filter sekaligus (default: setiap bulan x kategori teratas), memakai metrik bernama
+# (metrics_layer) dan pembuat grafik (report_figures) yang sama dengan dashboard.
+#
+# Proses induk menyiapkan dataset sekali (snapshot + partisi, file Arrow bersama) dan
+# membangun kubus, indeks filter & sketsa unik. Hanya dataset yang benar-benar dibagi: worker
+# di process pool membuka file Arrow yang sama lewat memory map (satu salinan di page cache
+# untuk semua worker). Struktur turunan (jauh lebih kecil dari dataset) dimiliki setiap worker:
+# dengan start method 'fork' diwarisi dari proses induk (copy-on-write, tanpa pickle), selain
+# itu di-pickle sekali per worker saat inisialisasi. Setiap preset lalu cukup memotong kubus/indeks.
+#
+#   python batch_reports.py data.csv --out reports --top-categories 5
+#   python batch_reports.py data.csv --presets presets.json --formats html json png
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+DEFAULT_OUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reports")
+DEFAULT_TOP_CATEGORIES = 5
+REPORT_FORMATS = ['html', 'json', 'png']
+PLOTLYJS_NAME = "plotly.min.js"
+REPORT_SECTIONS = [
+    # judul bagian (sama dengan dashboard), grafik
+    ("📦 Analisis Pesanan", ORDER_FIGURES),
+    ("🏷️ Analisis Produk", PRODUCT_FIGURES),
+]
+
+# Keadaan worker: dataset (memory map) & struktur turunan, diisi oleh _init_worker
+_worker = {}
+
+
+def preset_slug(name):
+    return re.sub(r'[^0-9A-Za-z]+', '-', name).strip('-').lower() or 'preset'
+
+
+def month_category_presets(cube, top_categories=DEFAULT_TOP_CATEGORIES, months=None):
+    # Setiap bulan dalam data (atau `months`, mis. ['2018-07']) x kategori dengan penjualan
+    # bersih tertinggi di seluruh data
+    categories = rollup(cube, 'category_name_1').sort_values(ascending=False).head(top_categories).index.tolist()
+    days = cube['order_day'].dropna()
+    if months is None:
+        months = pd.period_range(days.min(), days.max(), freq='M')
+    else:
+        months = pd.PeriodIndex([pd.Period(month, freq='M') for month in months])
+    presets = []
+    for month in months:
+        for category in categories:
+            presets.append({
+                'name': f"{month} {category}",
+                'start': str(month.start_time.date()),
+                'end': str(month.end_time.date()),
+                'categories': [category],
+            })
+    return presets
+
+
+def read_presets(path):
+    # File JSON: [{"name": ..., "start": "YYYY-MM-DD" | null, "end": ..., "categories": [...] | null}, ...]
+    with open(path, encoding='utf-8') as f:
+        presets = json.load(f)
+    for preset in presets:
+        if 'name' not in preset:
+            raise ValueError(f"Preset tanpa 'name' di {path}: {preset}")
+        preset.setdefault('start', None)
+        preset.setdefault('end', None)
+        preset.setdefault('categories', None)
+    return presets
+
+
+def build_structures(df, cache_dir, distinct_mode='exact'):
+    # Sama dengan pemuat dashboard: kubus digabung per partisi Parquet bila ada
+    partition_paths = dataset_partitions(cache_dir)
+    if partition_paths:
+        cube = merge_cubes([build_cube(read_snapshot(path)) for path in partition_paths])
+    else:
+        cube = build_cube(df)
+    return {
+        'cube': cube,
+        'index': FilterIndex.build(df),
+        'sketches': DistinctSketches.build(df, mode=distinct_mode),
+    }
+
+
+# --- Worker ---
+def _init_worker(dataset_path, structures, out_dir, formats, plotlyjs):
+    # structures None: sudah diwarisi dari proses induk (fork), lihat render_all()
+    _worker['df'] = open_dataset(dataset_path)
+    if structures is not None:
+        _worker.update(structures)
+    _worker['out_dir'] = out_dir
+    _worker['formats'] = formats
+    _worker['plotlyjs'] = plotlyjs
+
+
+def _preset_dates(preset):
+    start = pd.Timestamp(preset['start']).date() if preset.get('start') else None
+    end = pd.Timestamp(preset['end']).date() if preset.get('end') else None
+    if (start is None) != (end is None):
+        raise ValueError(f"Preset '{preset['name']}' harus punya start & end sekaligus, atau tidak sama sekali")
+    return start, end
+
+
+def compute_report(preset, df, cube, index, sketches):
+    # KPI & grafik satu preset; semua metrik lewat MetricsStore seperti dashboard
+    start_date, end_date = _preset_dates(preset)
+    categories = preset.get('categories')
+    rows = index.select(start_date, end_date, categories)
+    context = FilterContext(df, slice_cube(cube, start_date, end_date, categories), rows, sketches, None,
+                            start_date, end_date, categories)
+    store = MetricsStore()
+    key = filter_key('batch', start_date, end_date, categories)
+
+    def metric(name, **params):
+        return store.get(name, key, context, **params)
+
+    report = {'preset': preset, 'rows': len(rows), 'kpi': None, 'sections': []}
+    if len(rows) == 0:
+        return report
+    values = kpi_values(metric)
+    report['kpi'] = {name: float(value) for name, value in values.items()}
+    report['kpi_text'] = format_kpi(values)
+    report['sections'] = [(title, {name: build(metric) for name, build in figures.items()})
+                          for title, figures in REPORT_SECTIONS]
+    return report
+
+
+def _report_html(report, plotlyjs):
+    preset = report['preset']
+    title = html.escape(preset['name'])
+    if plotlyjs == 'cdn':
+        script = f'<script src="https://cdn.plot.ly/plotly-{plotly.offline.get_plotlyjs_version()}.min.js"></script>'
+    else:
+        script = f'<script src="../{PLOTLYJS_NAME}"></script>'
+    parts = [f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title>{script}',
+             '<style>body{font-family:sans-serif;margin:2em}.kpi{display:flex;gap:2em;flex-wrap:wrap}'
+             '.kpi div{min-width:12em}.kpi b{display:block;font-size:1.5em}'
+             '.grid{display:grid;grid-template-columns:repeat(auto-fit,minmax(480px,1fr));gap:1em}</style>',
+             f'</head><body><h1>📈 {title}</h1>',
+             f'<p>Rentang: {preset.get("start") or "semua"} s/d {preset.get("end") or "semua"} | '
+             f'Kategori: {html.escape(", ".join(preset.get("categories") or ["semua"]))} | '
+             f'{report["rows"]:,} item penjualan</p>']
+    if report['kpi'] is None:
+        parts.append('<p>Tidak ada data yang cocok dengan filter ini.</p>')
+    else:
+        parts.append('<h2>📊 Ringkasan Performa Kunci</h2><div class="kpi">')
+        parts += [f'<div>{html.escape(label)}<b>{html.escape(value)}</b></div>' for label, value in report['kpi_text']]
+        parts.append('</div>')
+        for section, figures in report['sections']:
+            parts.append(f'<h2>{html.escape(section)}</h2><div class="grid">')
+            parts += [fig.to_html(full_html=False, include_plotlyjs=False) for fig in figures.values()]
+            parts.append('</div>')
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+def write_report(report, out_dir, formats, plotlyjs='cdn'):
+    # Satu folder per preset: report.html, report.json, <grafik>.png
+    report_dir = os.path.join(out_dir, preset_slug(report['preset']['name']))
+    os.makedirs(report_dir, exist_ok=True)
+    files = []
+    if 'html' in formats:
+        path = os.path.join(report_dir, 'report.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(_report_html(report, plotlyjs))
+        files.append(path)
+    if 'json' in formats:
+        path = os.path.join(report_dir, 'report.json')
+        payload = {
+            'preset': report['preset'],
+            'rows': report['rows'],
+            'kpi': report['kpi'],
+            'charts': {name: json.loads(fig.to_json())
+                       for _, figures in report['sections'] for name, fig in figures.items()},
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        files.append(path)
+    if 'png' in formats:
+        for _, figures in report['sections']:
+            for name, fig in figures.items():
+                path = os.path.join(report_dir, f"{name}.png")
+                fig.write_image(path, width=900, height=500)
+                files.append(path)
+    return report_dir, files
+
+
+def render_preset(preset):
+    started = time.perf_counter()
+    report = compute_report(preset, _worker['df'], _worker['cube'], _worker['index'], _worker['sketches'])
+    report_dir, files = write_report(report, _worker['out_dir'], _worker['formats'], _worker['plotlyjs'])
+    return {
+        'name': preset['name'],
+        'dir': os.path.basename(report_dir),
+        'rows': report['rows'],
+        'kpi': report['kpi'],
+        'files': len(files),
+        'seconds': time.perf_counter() - started,
+        'pid': os.getpid(),
+    }
+
+
+def write_index(results, out_dir):
+    # Daftar semua laporan (index.html untuk dibuka, index.json untuk diproses lanjut)
+    with open(os.path.join(out_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    rows = []
+    for result in results:
+        sales = '' if result['kpi'] is None else f"Rp {result['kpi']['total_penjualan_bersih']:,.0f}"
+        rows.append(f'<tr><td><a href="{html.escape(result["dir"])}/report.html">{html.escape(result["name"])}</a></td>'
+                    f'<td>{result["rows"]:,}</td><td>{sales}</td></tr>')
+    rows = ''.join(rows)
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html><html><head><meta charset="utf-8"><title>Laporan Batch</title></head><body>'
+                f'<h1>Laporan Batch ({len(results)} preset)</h1><table border="1" cellpadding="4">'
+                f'<tr><th>Preset</th><th>Item</th><th>Total Penjualan Bersih</th></tr>{rows}</table></body></html>')
+
+
+def render_all(presets, dataset_path, structures, args, started):
+    os.makedirs(args.out, exist_ok=True)
+    if args.plotlyjs == 'local' and 'html' in args.formats:
+        with open(os.path.join(args.out, PLOTLYJS_NAME), 'w', encoding='utf-8') as f:
+            f.write(plotly.offline.get_plotlyjs())
+
+    results, failures = [], []
+    context = multiprocessing.get_context()
+    if context.get_start_method() == 'fork':
+        # Worker hasil fork mewarisi _worker dari induk: struktur tidak di-pickle per worker
+        _worker.update(structures)
+        structures = None
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context, initializer=_init_worker,
+                             initargs=(dataset_path, structures, args.out, args.formats, args.plotlyjs)) as pool:
+        futures = {pool.submit(render_preset, preset): preset for preset in presets}
+        for done, future in enumerate(as_completed(futures), 1):
+            preset = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # Satu preset gagal tidak menghentikan preset lain
+                failures.append(preset['name'])
+                print(f"GAGAL {preset['name']}: {e}", file=sys.stderr, flush=True)
+            if done % 25 == 0 or done == len(futures):
+                print(f"  {done}/{len(futures)} preset selesai", flush=True)
+
+    order = {preset['name']: i for i, preset in enumerate(presets)}
+    results.sort(key=lambda result: order[result['name']])
+    write_index(results, args.out)
+    print(f"{len(results)} laporan ditulis ke {args.out} ({time.perf_counter() - started:.1f} dtk)")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render laporan KPI + grafik Pesanan/Produk untuk banyak preset filter.")
+    parser.add_argument('file_path', help="CSV ekspor utama (sama dengan FILE_PATH dashboard)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="folder snapshot & dataset bersama")
+    parser.add_argument('--exports-dir', default=None, help="folder ekspor tambahan (partisi), seperti EXPORTS_DIR")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--out', default=DEFAULT_OUT_DIR, help="folder keluaran laporan")
+    parser.add_argument('--presets', default=None, help="file JSON daftar preset (default: bulan x kategori teratas)")
+    parser.add_argument('--top-categories', type=int, default=DEFAULT_TOP_CATEGORIES)
+    parser.add_argument('--months', nargs='+', default=None, help="batasi bulan, mis. 2018-07 2018-08")
+    parser.add_argument('--formats', nargs='+', choices=REPORT_FORMATS, default=['html', 'json'])
+    parser.add_argument('--plotlyjs', choices=['cdn', 'local'], default='cdn',
+                        help="muat plotly.js dari CDN atau salin sekali ke folder keluaran (untuk dibuka offline)")
+    parser.add_argument('--distinct-mode', choices=['exact', 'hll'], default='exact')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+    if 'png' in args.formats and kaleido is None:
+        parser.error("--formats png membutuhkan paket kaleido (pip install kaleido).")
+
+    started = time.perf_counter()
+    version, df = prepare_dataset(args.file_path, args.cache_dir, chunk_size=args.chunk_size,
+                                  exports_dir=args.exports_dir, with_frame=True)
+    df = load_shared_dataset(args.file_path, args.cache_dir, chunk_size=args.chunk_size, version=version, df_merged=df)
+    dataset_path = shared_path(args.cache_dir, version)
+    tmp_dir = None
+    if not os.path.exists(dataset_path):
+        # Cache tidak bisa dipakai (load_shared_dataset kembali ke salinan di memori), padahal
+        # worker membuka file Arrow: terbitkan ke folder sementara yang dihapus di akhir
+        tmp_dir = tempfile.mkdtemp(prefix="batch-reports-")
+        try:
+            dataset_path = publish_dataset(df, tmp_dir, version)
+        except OSError as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            parser.error(f"Dataset bersama tidak bisa ditulis ke {args.cache_dir} maupun folder sementara: {e}")
+        print(f"Cache {args.cache_dir} tidak bisa dipakai; dataset bersama ditulis sementara ke {tmp_dir}",
+              file=sys.stderr, flush=True)
+    try:
+        structures = build_structures(df, args.cache_dir, distinct_mode=args.distinct_mode)
+        presets = read_presets(args.presets) if args.presets else month_category_presets(
+            structures['cube'], args.top_categories, args.months)
+        slugs = [preset_slug(preset['name']) for preset in presets]
+        if len(set(slugs)) != len(slugs):
+            parser.error("Nama preset harus unik (setelah diubah menjadi nama folder).")
+        del df  # worker membuka file Arrow bersama sendiri
+        print(f"Dataset siap ({time.perf_counter() - started:.1f} dtk): {len(presets)} preset, {args.workers} worker",
+              flush=True)
+        return render_all(presets, dataset_path, structures, args, started)
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
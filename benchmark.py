@@ -0,0 +1,532 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+from column_stats import ColumnStats
+from customer_summary import CustomerDaily
+from data_pipeline import DEFAULT_CHUNK_SIZE, build_merged, read_snapshot, write_snapshot
+from density_plot import DensityGrid
+from distinct_sketch import DistinctSketches
+from filter_index import FilterIndex
+from instrumentation import rss_mb
+from metrics_layer import METRICS, FilterContext, MetricsStore, filter_key
+from olap_cube import build_cube, slice_cube
+from shared_dataset import open_dataset, publish_dataset
+from sql_backend import DuckDBBackend, duckdb, filter_presets
+
+# --- Benchmark Headless (tanpa Streamlit) ---
+# Membuat ekspor CSV sintetis dengan skema & distribusi ekspor asli, lalu mengukur setiap
+# tahap load_and_process_data() (baca CSV, pisah tabel, pembersihan, penggabungan, pemadatan,
+# snapshot, dataset bersama), pembangunan struktur turunan (kubus, indeks filter, sketsa unik,
+# ringkasan pelanggan, statistik kolom), dan setiap metrik dashboard pada preset filter.
+# Hasil (waktu, baris, puncak memori, ringkasan nilai metrik) disimpan sebagai JSON dan
+# dibandingkan dengan baseline yang tersimpan, sehingga regresi terlihat sebelum deploy.
+#
+#   python benchmark.py --sizes 1M 10M 50M                 # ukur & bandingkan dengan baseline
+#   python benchmark.py --sizes 1M --save-baseline         # simpan hasil sebagai baseline baru
+
+DEFAULT_SIZES = ['1M', '10M', '50M']
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bench")
+DEFAULT_SEED = 0
+GENERATE_CHUNK_ROWS = 1_000_000
+# Batas regresi: lebih lambat/boros dari baseline sebesar rasio ini DAN selisih absolut ini
+TIME_TOLERANCE = 0.25
+MIN_TIME_DIFF = 0.05  # detik
+MEMORY_TOLERANCE = 0.20
+MIN_MEMORY_DIFF = 16.0  # MB
+MEMORY_SAMPLE_INTERVAL = 0.01  # detik
+
+
+# --- Distribusi Ekspor Asli (ringkasan dari analisi_data.ipynb) ---
+# Urutan kolom sama dengan file ekspor; kolom yang tidak dibaca pipeline tetap ditulis
+# agar ukuran baris & biaya parsing CSV sebanding.
+EXPORT_COLUMNS = ['item_id', 'status', 'created_at', 'sku', 'price', 'qty_ordered', 'grand_total', 'increment_id',
+                  'category_name_1', 'sales_commission_code', 'discount_amount', 'payment_method', 'Working Date',
+                  'BI Status', ' MV ', 'Year', 'Month', 'Customer Since', 'M-Y', 'FY', 'Customer ID',
+                  'Unnamed: 21', 'Unnamed: 22', 'Unnamed: 23', 'Unnamed: 24', 'Unnamed: 25']
+DATE_RANGE = ('2016-07-01', '2018-08-28')
+FIRST_INCREMENT_ID = 100147443
+FIRST_ITEM_ID = 211131
+ITEMS_PER_ORDER = 584524 / 408782  # baris item per increment_id
+NEW_CUSTOMER_RATE = 115326 / 408782  # pelanggan baru per pesanan; sisanya pelanggan berulang
+SKU_RATE = 84889 / 584524  # SKU berbeda per baris item
+BLANK_ROW_RATIO = 464051 / 584524  # baris kosong di akhir ekspor (sisa batas baris Excel)
+# Bobot = jumlah baris pada ekspor asli; None = sel kosong (NaN)
+STATUS_WEIGHTS = {
+    'complete': 169502, 'canceled': 148656, 'order_refunded': 49067, 'received': 35806, 'refund': 4091,
+    'cod': 880, 'closed': 332, 'paid': 294, 'pending': 43, 'payment_review': 39, 'processing': 20,
+    'holded': 20, 'fraud': 10, 'pending_paypal': 5, 'exchange': 4, r'\N': 2, None: 12,
+}
+CATEGORY_WEIGHTS = {
+    'Mobiles & Tablets': 115710, "Men's Fashion": 92221, "Women's Fashion": 59721, 'Appliances': 52413,
+    'Superstore': 43613, 'Beauty & Grooming': 41496, 'Soghaat': 34011, 'Others': 29218, 'Home & Living': 26504,
+    'Entertainment': 26323, 'Health & Sports': 17502, 'Kids & Baby': 16494, 'Computing': 15933, r'\N': 7833,
+    'School & Education': 3478, 'Books': 1870, None: 164,
+}
+# Notebook hanya mencatat 18 metode; bobotnya perkiraan dari dataset publik yang sama
+PAYMENT_WEIGHTS = {
+    'cod': 271960, 'Payaxis': 97642, 'Easypay': 82900, 'jazzwallet': 35145, 'easypay_voucher': 31179,
+    'bankalfalah': 23065, 'jazzvoucher': 12476, 'Easypay_MA': 9504, 'customercredit': 7556, 'apg': 1758,
+    'ublcreditcard': 897, 'cashatdoorstep': 732, 'mcblite': 630, 'mygateway': 580, 'internetbanking': 239,
+    'productcredit': 76, 'marketingexpense': 56, 'financesettlement': 38,
+}
+BI_STATUS_WEIGHTS = {'Net': 234178, 'Gross': 201716, 'Valid': 148615, '#REF!': 15}
+COMMISSION_WEIGHTS = {'': 0.23, r'\N': 0.50, 'R-FSD': 0.27}  # '' = kosong, 'R-FSD' = kode agen
+COMMISSION_AGENTS = 400
+QTY_WEIGHTS = {1: 0.80, 2: 0.12, 3: 0.04, 4: 0.02, 5: 0.01, 10: 0.00999, 1000: 0.00001}
+PRICE_MEDIAN = 899.0
+PRICE_SIGMA = 2.0  # lognormal: kuartil atas ~3.500, rata-rata ~6.600 (asli 4.070 / 6.349)
+PRICE_MAX = 1_012_625.0
+ZERO_DISCOUNT_RATE = 0.55
+NEGATIVE_DISCOUNT_RATE = 0.002
+NEGATIVE_TOTAL_RATE = 0.001
+MISSING_SKU_RATE = 20 / 584524
+MISSING_CUSTOMER_RATE = 11 / 584524
+
+
+def parse_size(text):
+    # '1M' / '500k' / '2500000' -> jumlah baris item
+    text = str(text).strip().lower().replace('_', '')
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:])
+    return int(float(text[:-1]) * scale) if scale else int(text)
+
+
+def _weighted(rng, weights, size):
+    labels = np.array(list(weights), dtype=object)
+    p = np.array(list(weights.values()), dtype='float64')
+    return labels[rng.choice(len(labels), size=size, p=p / p.sum())]
+
+
+class SyntheticExport:
+    # Generator ekspor sintetis; state (id pesanan/item/pelanggan berikutnya) berlanjut antar chunk
+    # sehingga kardinalitas increment_id/item_id/Customer ID sama dengan ekspor asli di semua ukuran
+    def __init__(self, n_rows, seed=DEFAULT_SEED):
+        self.n_rows = n_rows
+        self.seed = seed
+        self.days = pd.date_range(*DATE_RANGE, freq='D')
+        self.day_text = np.array([f"{d.month}/{d.day}/{d.year}" for d in self.days], dtype=object)
+        self.months = pd.period_range(DATE_RANGE[0], DATE_RANGE[1], freq='M')
+        self.day_month = (self.days.to_period('M') - self.months[0]).map(lambda offset: offset.n).to_numpy()
+        rng = np.random.default_rng([seed, 0])
+        # Atribut tetap per SKU: kategori & harga dasar; popularitas SKU miring (beberapa SKU sangat laris)
+        self.n_skus = max(1, round(n_rows * SKU_RATE))
+        self.sku_category = _weighted(rng, CATEGORY_WEIGHTS, self.n_skus)
+        self.sku_price = np.clip(np.round(rng.lognormal(np.log(PRICE_MEDIAN), PRICE_SIGMA, self.n_skus)), 1, PRICE_MAX)
+        self.agents = np.array([f"R-FSD-{code}" for code in rng.integers(10000, 99999, COMMISSION_AGENTS)], dtype=object)
+        self.next_order = 0
+        self.next_item = FIRST_ITEM_ID
+        self.rows_done = 0
+        self.customer_since = np.empty(0, dtype='int32')  # indeks bulan per pelanggan (Customer ID - 1)
+        self.customer_commission = np.empty(0, dtype=object)
+
+    def _new_customers(self, rng, months):
+        kinds = _weighted(rng, COMMISSION_WEIGHTS, len(months))
+        codes = np.where(kinds == 'R-FSD', self.agents[rng.integers(0, COMMISSION_AGENTS, len(months))], kinds)
+        codes[kinds == ''] = None
+        self.customer_since = np.concatenate([self.customer_since, months.astype('int32')])
+        self.customer_commission = np.concatenate([self.customer_commission, codes])
+
+    def chunk(self, n_rows, chunk_index):
+        rng = np.random.default_rng([self.seed, 1, chunk_index])
+        # Pesanan dengan 1..n item (rata-rata ITEMS_PER_ORDER); pesanan terakhir dipotong agar pas n_rows
+        items = rng.geometric(1 / ITEMS_PER_ORDER, size=n_rows)
+        ends = np.cumsum(items)
+        n_orders = int(np.searchsorted(ends, n_rows)) + 1
+        items = items[:n_orders]
+        items[-1] -= ends[n_orders - 1] - n_rows
+        order_of_row = np.repeat(np.arange(n_orders), items)
+        order_start = np.cumsum(items) - items
+
+        # Tanggal naik sepanjang file (ekspor asli terurut menurut pesanan)
+        order_day = (self.rows_done + order_start) * len(self.days) // self.n_rows
+        order_month = self.day_month[order_day]
+
+        # Pelanggan: baru (Customer ID berikutnya, Customer Since = bulan pesanan) atau pelanggan lama acak
+        known = len(self.customer_since)
+        new = rng.random(n_orders) < NEW_CUSTOMER_RATE
+        new[0] |= known == 0
+        minted = np.cumsum(new)
+        minted_before = known + minted - new
+        customer = np.where(new, known + minted, 1 + (rng.random(n_orders) * minted_before).astype('int64'))
+        self._new_customers(rng, order_month[new])
+
+        status = _weighted(rng, STATUS_WEIGHTS, n_orders)
+        payment = _weighted(rng, PAYMENT_WEIGHTS, n_orders)
+
+        # Baris item: SKU populer lebih sering (u^2), harga dari SKU, qty kebanyakan 1
+        sku_index = (rng.random(n_rows) ** 2 * self.n_skus).astype('int64')
+        price = self.sku_price[sku_index]
+        qty = np.array(list(QTY_WEIGHTS), dtype='float64')[
+            rng.choice(len(QTY_WEIGHTS), size=n_rows, p=np.array(list(QTY_WEIGHTS.values())) / sum(QTY_WEIGHTS.values()))]
+        discount = np.round(price * qty * rng.uniform(0, 0.35, n_rows) * 2) / 2
+        discount[rng.random(n_rows) < ZERO_DISCOUNT_RATE] = 0.0
+        negative = rng.random(n_rows) < NEGATIVE_DISCOUNT_RATE
+        discount[negative] = -np.round(rng.uniform(0, 600, negative.sum()) * 2) / 2
+        line_total = price * qty - discount
+        grand_total = np.round(np.bincount(order_of_row, weights=line_total, minlength=n_orders))
+        negative = rng.random(n_orders) < NEGATIVE_TOTAL_RATE
+        grand_total[negative] = -np.round(rng.uniform(0, 1600, negative.sum()))
+
+        item_id = self.next_item + np.cumsum(rng.integers(1, 3, n_rows)) - 1
+        increment_id = pd.Series(FIRST_INCREMENT_ID + self.next_order + order_of_row).astype(str).to_numpy(dtype=object)
+        row_customer = customer[order_of_row]
+        sku = pd.Series(sku_index).map('sku_{}'.format).to_numpy(dtype=object)
+        sku[rng.random(n_rows) < MISSING_SKU_RATE] = None
+        customer_id = row_customer.astype('float64')
+        customer_id[rng.random(n_rows) < MISSING_CUSTOMER_RATE] = np.nan
+
+        created = self.day_text[order_day][order_of_row]
+        day = self.days[order_day[order_of_row]]
+        since = self.months[self.customer_since[row_customer - 1]]
+        frame = pd.DataFrame({
+            'item_id': item_id,
+            'status': status[order_of_row],
+            'created_at': created,
+            'sku': sku,
+            'price': price,
+            'qty_ordered': qty,
+            'grand_total': grand_total[order_of_row],
+            'increment_id': increment_id,
+            'category_name_1': self.sku_category[sku_index],
+            'sales_commission_code': self.customer_commission[row_customer - 1],
+            'discount_amount': discount,
+            'payment_method': payment[order_of_row],
+            'Working Date': created,
+            'BI Status': _weighted(rng, BI_STATUS_WEIGHTS, n_rows),
+            ' MV ': pd.Series(np.round(line_total).astype('int64')).map(' {:,} '.format).to_numpy(dtype=object),
+            'Year': day.year,
+            'Month': day.month,
+            'Customer Since': since.year.astype(str) + '-' + since.month.astype(str),
+            'M-Y': day.month.astype(str) + '-' + day.year.astype(str),
+            'FY': 'FY' + ((day.year + (day.month >= 7)) % 100).astype(str),
+            'Customer ID': customer_id,
+        })
+        for column in EXPORT_COLUMNS[-5:]:
+            frame[column] = None
+
+        self.next_order += n_orders
+        self.next_item = int(item_id[-1]) + 1
+        self.rows_done += n_rows
+        return frame[EXPORT_COLUMNS]
+
+
+def generate_export(path, n_rows, seed=DEFAULT_SEED, blank_ratio=BLANK_ROW_RATIO, chunk_rows=GENERATE_CHUNK_ROWS):
+    # Tulis per chunk (memori terbatas) ke file sementara; file lama dengan parameter sama dipakai ulang
+    meta = {'rows': n_rows, 'seed': seed, 'blank_ratio': blank_ratio}
+    meta_path = f"{path}.json"
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            if json.load(f) == meta and os.path.exists(path):
+                return path
+    except (OSError, ValueError):
+        pass
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    generator = SyntheticExport(n_rows, seed)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        for chunk_index, start in enumerate(range(0, n_rows, chunk_rows)):
+            chunk = generator.chunk(min(chunk_rows, n_rows - start), chunk_index)
+            chunk.to_csv(f, index=False, header=chunk_index == 0)
+        blank_line = ',' * (len(EXPORT_COLUMNS) - 1) + '\n'
+        blank_rows = int(n_rows * blank_ratio)
+        for start in range(0, blank_rows, chunk_rows):
+            f.write(blank_line * min(chunk_rows, blank_rows - start))
+    os.replace(tmp_path, path)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return path
+
+
+# --- Pengukuran Waktu & Memori per Tahap ---
+class StageTimer:
+    # RSS puncak proses tidak bisa di-reset per tahap, jadi RSS di-sampling oleh thread latar
+    # selama tahap berjalan; peak_mb = puncak RSS dikurangi RSS saat tahap dimulai
+    def __init__(self, interval=MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.records = {}
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = {'rows': rows}
+        start_rss = rss_mb()  # None tanpa psutil: kolom memori dikosongkan
+        peak = [start_rss]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(self.interval):
+                peak[0] = max(peak[0], rss_mb())
+
+        sampler = threading.Thread(target=sample, daemon=True) if start_rss is not None else None
+        if sampler is not None:
+            sampler.start()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - started
+            done.set()
+            if sampler is not None:
+                sampler.join()
+                peak[0] = max(peak[0], rss_mb())
+            self._add(name, seconds, record['rows'], None if start_rss is None else peak[0] - start_rss)
+
+    def add_profile(self, profile, prefix):
+        # Rincian tahap dari hook instrumentasi pipeline (waktu inklusif per komponen; tanpa
+        # puncak memori karena hook hanya mencatat selisih RSS)
+        for row in profile.summary().itertuples(index=False):
+            name = f"{prefix}/{row.komponen}" if pd.isna(row.induk) else f"{prefix}/{row.induk}/{row.komponen}"
+            rows = None if pd.isna(row.baris) else int(row.baris)
+            self._add(name, float(row.detik), rows, None, calls=int(row.panggilan))
+
+    def _add(self, name, seconds, rows, peak_mb, calls=1):
+        # Tahap yang diulang per chunk/preset dijumlahkan (waktu & baris) dengan puncak terbesar
+        current = self.records.setdefault(name, {'seconds': 0.0, 'rows': None, 'peak_mb': None, 'calls': 0})
+        current['seconds'] += seconds
+        current['calls'] += calls
+        if rows is not None:
+            current['rows'] = (current['rows'] or 0) + int(rows)
+        if peak_mb is not None:
+            current['peak_mb'] = max(current['peak_mb'] or 0.0, peak_mb)
+
+
+def result_digest(value):
+    # Ringkasan numerik hasil metrik (jumlah baris/nilai) untuk dibandingkan dengan baseline
+    if isinstance(value, dict):
+        return [float(value[key]) for key in sorted(value)]
+    if isinstance(value, DensityGrid):
+        return [float(value.counts.sum()), float(value.x_edges[-1]), float(value.y_edges[-1]), float(len(value.sample))]
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        numeric = value.select_dtypes('number') if isinstance(value, pd.DataFrame) else value
+        if isinstance(numeric, pd.Series) and not pd.api.types.is_numeric_dtype(numeric):
+            return [float(len(value))]
+        return [float(len(value)), float(np.nansum(numeric.to_numpy(dtype='float64')))]
+    if isinstance(value, (tuple, list)):
+        return [float(v) for v in value]
+    return [float(value)]
+
+
+# --- Tahap-tahap load_and_process_data() ---
+def run_pipeline(csv_path, work_dir, timer, chunk_size=DEFAULT_CHUNK_SIZE):
+    # build_merged() yang sama dengan dashboard (chunk_size 0/None = baca sekaligus), lalu
+    # snapshot + dataset bersama; rincian per tahap diambil dari hook instrumentasi pipeline
+    profile = instrumentation.start_run()
+    try:
+        with timer.stage('build_merged') as record:
+            compact = build_merged(csv_path, chunk_size=chunk_size or None)
+            record['rows'] = len(compact)
+    finally:
+        instrumentation.finish_run()
+    timer.add_profile(profile, 'build_merged')
+
+    snapshot_path = os.path.join(work_dir, 'snapshot.parquet')
+    with timer.stage('tulis_snapshot', rows=len(compact)):
+        write_snapshot(compact, snapshot_path)
+    del compact
+    with timer.stage('baca_snapshot') as record:
+        df = read_snapshot(snapshot_path)
+        record['rows'] = len(df)
+    version = f"bench-{os.path.getmtime(snapshot_path)}"
+    with timer.stage('terbitkan_arrow', rows=len(df)):
+        shared = publish_dataset(df, work_dir, version)
+    del df
+    with timer.stage('buka_arrow') as record:
+        df = open_dataset(shared)
+        record['rows'] = len(df)
+    return df, snapshot_path
+
+
+def build_structures(df, timer, distinct_mode='exact'):
+    # Struktur turunan yang dibangun dashboard sekali per versi dataset
+    structures = {}
+    builders = [
+        ('kubus', 'cube', lambda: build_cube(df)),
+        ('indeks_filter', 'index', lambda: FilterIndex.build(df)),
+        ('sketsa_unik', 'sketches', lambda: DistinctSketches.build(df, mode=distinct_mode)),
+        ('ringkasan_pelanggan', 'customers', lambda: CustomerDaily.build(df)),
+        ('statistik_kolom', 'stats', lambda: ColumnStats.build(df)),
+    ]
+    for stage, key, build in builders:
+        with timer.stage(stage, rows=len(df)):
+            structures[key] = build()
+    return structures
+
+
+def run_metrics(df, structures, timer, sql=None, prefix='metrik'):
+    # Setiap preset memakai MetricsStore baru (tanpa hasil cache), metrik dihitung sesuai urutan
+    # METRICS seperti saat tab dibuka; metrik turunan memakai ringkasan yang sudah dihitung
+    valid = df['created_at'].dropna()
+    categories = sorted(structures['index'].categories.dropna().tolist())
+    presets = filter_presets(valid.min().date(), valid.max().date(), categories)
+    names = [name for name in METRICS if sql is None or sql.supports(name)]
+    digests = {}
+    for preset, start_date, end_date, selected in presets:
+        with timer.stage('filter') as record:
+            rows = structures['index'].select(start_date, end_date, selected)
+            cube = slice_cube(structures['cube'], start_date, end_date, selected)
+            record['rows'] = len(rows)
+        context = FilterContext(df, cube, rows, structures['sketches'], structures['customers'],
+                                start_date, end_date, selected, sql=sql, stats=structures['stats'])
+        store = MetricsStore()
+        key = filter_key('bench', start_date, end_date, selected)
+        digests[preset] = {}
+        for name in names:
+            with timer.stage(f"{prefix}:{name}", rows=len(rows)):
+                value = store.get(name, key, context)
+            digests[preset][name] = result_digest(value)
+    return digests
+
+
+def run_size(n_rows, args):
+    csv_path = os.path.join(args.data_dir, f"synthetic-{n_rows}-{args.seed}.csv")
+    started = time.perf_counter()
+    generate_export(csv_path, n_rows, seed=args.seed)
+    print(f"[{n_rows:,} baris] data sintetis siap ({time.perf_counter() - started:.1f} dtk): {csv_path}", flush=True)
+
+    work_dir = os.path.join(args.data_dir, 'work', str(n_rows))
+    if os.path.isdir(work_dir):
+        for root, _, files in os.walk(work_dir):
+            for name in files:
+                os.remove(os.path.join(root, name))
+    os.makedirs(work_dir, exist_ok=True)
+
+    timer = StageTimer()
+    df, snapshot_path = run_pipeline(csv_path, work_dir, timer, chunk_size=args.chunk_size)
+    structures = build_structures(df, timer, distinct_mode=args.distinct_mode)
+    digests = run_metrics(df, structures, timer)
+    if args.sql:
+        with timer.stage('duckdb_buka'):
+            sql = DuckDBBackend([snapshot_path])
+        sql_digests = run_metrics(df, structures, timer, sql=sql, prefix='sql')
+        digests = {preset: {**values, **{f"sql:{k}": v for k, v in sql_digests[preset].items()}}
+                   for preset, values in digests.items()}
+    return {
+        'rows': n_rows,
+        'dataset_rows': len(df),
+        'chunk_size': args.chunk_size or None,
+        'csv_mb': os.path.getsize(csv_path) / 2 ** 20,
+        'stages': timer.records,
+        'digests': digests,
+    }
+
+
+# --- Perbandingan dengan Baseline ---
+def _regressed(new, old, tolerance, min_diff):
+    return new is not None and old is not None and new > old * (1 + tolerance) and new - old > min_diff
+
+
+def compare_results(results, baseline):
+    # Daftar (ukuran, komponen, keterangan) untuk setiap regresi waktu/memori atau hasil yang berubah
+    problems = []
+    for size, current in results['sizes'].items():
+        previous = baseline.get('sizes', {}).get(size)
+        if previous is None or 'error' in current or 'error' in previous:
+            continue
+        if previous.get('chunk_size', current['chunk_size']) != current['chunk_size']:
+            continue  # jalur baca berbeda (chunk vs sekaligus): waktu & hasil tidak sebanding
+        for name, record in current['stages'].items():
+            old = previous['stages'].get(name)
+            if old is None:
+                continue
+            if _regressed(record['seconds'], old['seconds'], TIME_TOLERANCE, MIN_TIME_DIFF):
+                problems.append((size, name, f"waktu {old['seconds']:.3f} -> {record['seconds']:.3f} dtk"))
+            if _regressed(record['peak_mb'], old['peak_mb'], MEMORY_TOLERANCE, MIN_MEMORY_DIFF):
+                problems.append((size, name, f"memori {old['peak_mb']:.0f} -> {record['peak_mb']:.0f} MB"))
+        if previous.get('seed') != current.get('seed'):
+            continue  # data berbeda: hasil metrik tidak bisa dibandingkan
+        for preset, values in current['digests'].items():
+            for name, digest in values.items():
+                old = previous['digests'].get(preset, {}).get(name)
+                if old is not None and (len(old) != len(digest)
+                                        or not np.allclose(digest, old, rtol=1e-9, atol=1e-6, equal_nan=True)):
+                    problems.append((size, name, f"hasil berbeda pada preset '{preset}'"))
+    return problems
+
+
+def format_report(results, baseline=None):
+    lines = []
+    for size, current in results['sizes'].items():
+        lines.append(f"\n=== {int(size):,} baris ===")
+        if 'error' in current:
+            lines.append(f"  gagal: {current['error']}")
+            continue
+        previous = (baseline or {}).get('sizes', {}).get(size, {}).get('stages', {})
+        lines.append(f"  {'tahap':<48}{'detik':>10}{'baseline':>10}{'baris':>14}{'puncak MB':>11}")
+        for name, record in current['stages'].items():
+            old = previous.get(name, {}).get('seconds')
+            rows = '' if record['rows'] is None else f"{record['rows']:,}"
+            peak = '' if record['peak_mb'] is None else f"{record['peak_mb']:.0f}"
+            lines.append(f"  {name:<48}{record['seconds']:>10.3f}{'' if old is None else f'{old:.3f}':>10}"
+                         f"{rows:>14}{peak:>11}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline & metrik dashboard pada data sintetis.")
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="jumlah baris item, mis. 1M 10M 50M")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help="folder CSV sintetis, file kerja & hasil")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="baris per chunk; 0 = baca sekaligus")
+    parser.add_argument('--distinct-mode', choices=['exact', 'hll'], default='exact')
+    parser.add_argument('--sql', action='store_true', help="ukur juga metrik via backend DuckDB")
+    parser.add_argument('--baseline', default=None, help="file baseline (default: <data-dir>/baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="simpan hasil run ini sebagai baseline")
+    parser.add_argument('--output', default=None, help="file hasil JSON (default: <data-dir>/results-<waktu>.json)")
+    args = parser.parse_args(argv)
+    if args.sql and duckdb is None:
+        parser.error("--sql membutuhkan paket duckdb (pip install duckdb).")
+    sizes = [parse_size(size) for size in args.sizes]
+    baseline_path = args.baseline or os.path.join(args.data_dir, 'baseline.json')
+    output_path = args.output or os.path.join(args.data_dir, f"results-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'pandas': pd.__version__,
+                    'cpus': os.cpu_count()},
+        'sql': bool(args.sql),
+        'sizes': {},
+    }
+    for n_rows in sizes:
+        try:
+            results['sizes'][str(n_rows)] = {**run_size(n_rows, args), 'seed': args.seed}
+        except MemoryError:
+            # Ukuran terlalu besar untuk mesin ini; ukuran lain tetap diukur
+            results['sizes'][str(n_rows)] = {'rows': n_rows, 'seed': args.seed, 'error': 'MemoryError'}
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print(format_report(results, baseline))
+    print(f"\nHasil: {output_path}")
+
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline disimpan: {baseline_path}")
+        return 0
+    if baseline is None:
+        print(f"Baseline belum ada ({baseline_path}); jalankan dengan --save-baseline untuk menyimpannya.")
+        return 0
+    problems = compare_results(results, baseline)
+    for size, name, detail in problems:
+        print(f"REGRESI [{int(size):,} baris] {name}: {detail}")
+    if not problems:
+        print("Tidak ada regresi dibanding baseline.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+import numpy as np
+import pandas as pd
+
+from customer_summary import days_to_dates
+from olap_cube import slice_cube
+
+# --- Statistik Kolom yang Bisa Digabung (pengganti info()/describe()/quantile()) ---
+# Profil dibangun sekali per partisi data untuk setiap sel (hari x kategori):
+#   - count, null, min, max, mean, M2 (varians) per kolom -- digabung tepat dengan rumus Chan;
+#   - sketsa kuantil per kolom numerik/tanggal berupa histogram kunci (cell, kunci, jumlah).
+# Filter tanggal/kategori memilih sel (aturan yang sama dengan kubus penjualan), lalu profil
+# sel terpilih digabung tanpa memindai baris item.
+#
+# Kunci sketsa:
+#   - 'exact': kunci = nilai itu sendiri (bilangan bulat berentang kecil, mis. kode kalender)
+#     atau nomor hari (kolom tanggal, resolusi hari) -> kuantil identik dengan pandas;
+#   - 'log': ember logaritmik ala DDSketch -> galat relatif kuantil <= relative_accuracy.
+# Ember dengan relative_accuracy yang sama selalu sejajar, jadi sketsa partisi bisa dijumlahkan.
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+EXACT_KEY_RANGE = 4096  # rentang nilai bulat maksimum yang masih disimpan per nilai
+DESCRIBE_PERCENTILES = [0.25, 0.5, 0.75]
+PROFILE_COLUMNS = ['dtype', 'non_null', 'null', 'min', 'max', 'mean', 'std']
+
+_MIN_MAGNITUDE = 1e-9  # |x| lebih kecil dari ini dianggap nol (kunci 0)
+_NS_PER_DAY = 86_400 * 10**9
+_MOMENTS = ['count', 'nulls', 'min', 'max', 'mean', 'm2']
+
+
+def _column_kind(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return 'number'
+    return 'other'
+
+
+def _numeric_values(series, kind):
+    # Nilai sebagai float64 (tanggal: nanodetik epoch), kosong = NaN
+    if kind == 'datetime':
+        values = series.to_numpy(dtype='datetime64[ns]').view('int64').astype('float64')
+        values[series.isna().to_numpy()] = np.nan
+        return values
+    return series.astype('float64').to_numpy()
+
+
+class LogBuckets:
+    # Ember logaritmik: nilai positif x masuk kunci ceil(log_gamma(x)) + offset, negatif dicerminkan
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.offset = int(-np.floor(np.log(_MIN_MAGNITUDE) / np.log(self.gamma))) + 1
+
+    def keys(self, values):
+        magnitude = np.abs(values)
+        keys = np.zeros(len(values), dtype=np.int64)
+        big = magnitude >= _MIN_MAGNITUDE
+        keys[big] = np.ceil(np.log(magnitude[big]) / np.log(self.gamma)).astype(np.int64) + self.offset
+        return np.where(values < 0, -keys, keys)
+
+    def values(self, keys):
+        # Nilai wakil ember: titik tengah relatif, galat relatif <= relative_accuracy
+        magnitude = 2 * self.gamma ** (np.abs(keys) - self.offset) / (self.gamma + 1)
+        return np.where(keys == 0, 0.0, np.sign(keys) * magnitude)
+
+
+class ColumnStats:
+    def __init__(self, cells, columns, moments, sketches, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.cells = cells  # satu baris per sel: order_day, category_name_1
+        self.columns = columns  # per kolom: dtype, kind, scheme ('exact'/'log'/None)
+        self.moments = moments  # kolom -> DataFrame per sel (_MOMENTS), indeks = nomor sel
+        self.sketches = sketches  # kolom -> (offsets per sel, kunci, jumlah) dalam bentuk CSR
+        self.buckets = LogBuckets(relative_accuracy)
+
+    @classmethod
+    def build(cls, df_merged, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        buckets = LogBuckets(relative_accuracy)
+        days = df_merged['order_date'].astype('float64').to_numpy()
+        keys = pd.DataFrame({'order_date': days, 'category_name_1': df_merged['category_name_1'].to_numpy()})
+        grouped = keys.groupby(['order_date', 'category_name_1'], sort=True, dropna=False, observed=True)
+        cell_ids = grouped.ngroup().to_numpy()
+        cells = grouped.size().reset_index()[['order_date', 'category_name_1']]
+        cells = pd.DataFrame({'order_day': days_to_dates(cells['order_date']),
+                              'category_name_1': cells['category_name_1'].to_numpy()})
+        rows_per_cell = np.bincount(cell_ids, minlength=len(cells))
+
+        columns, moments, sketches = {}, {}, {}
+        for name in df_merged.columns:
+            series = df_merged[name]
+            kind = _column_kind(series)
+            if kind == 'other':
+                count = np.bincount(cell_ids, weights=series.notna().to_numpy(), minlength=len(cells))
+                columns[name] = {'dtype': str(series.dtype), 'kind': kind, 'scheme': None}
+                moments[name] = pd.DataFrame({'count': count, 'nulls': rows_per_cell - count})
+                continue
+            values = _numeric_values(series, kind)
+            stats = pd.Series(values).groupby(cell_ids).agg(['count', 'min', 'max', 'mean', 'var'])
+            stats = stats.reindex(range(len(cells)))
+            count = stats['count'].fillna(0).to_numpy()
+            moments[name] = pd.DataFrame({
+                'count': count,
+                'nulls': rows_per_cell - count,
+                'min': stats['min'].to_numpy(),
+                'max': stats['max'].to_numpy(),
+                'mean': stats['mean'].to_numpy(),
+                'm2': np.nan_to_num(stats['var'].to_numpy() * (count - 1)),
+            })
+            present = ~np.isnan(values)
+            if kind == 'datetime':
+                scheme, sketch_keys = 'exact', np.floor(values[present] / _NS_PER_DAY).astype(np.int64)
+            elif (pd.api.types.is_integer_dtype(series) and present.any()
+                  and np.nanmax(values) - np.nanmin(values) <= EXACT_KEY_RANGE):
+                scheme, sketch_keys = 'exact', values[present].astype(np.int64)
+            else:
+                scheme, sketch_keys = 'log', buckets.keys(values[present])
+            columns[name] = {'dtype': str(series.dtype), 'kind': kind, 'scheme': scheme}
+            sketches[name] = _histogram(cell_ids[present], sketch_keys, len(cells))
+        return cls(cells, pd.DataFrame(columns).T, moments, sketches, relative_accuracy)
+
+    @classmethod
+    def merge(cls, parts):
+        # Gabungan profil per partisi: sel yang sama (hari, kategori) digabung menjadi satu
+        if len(parts) == 1:
+            return parts[0]
+        buckets = parts[0].buckets
+        all_cells = pd.concat([part.cells for part in parts], ignore_index=True)
+        grouped = all_cells.groupby(['order_day', 'category_name_1'], sort=True, dropna=False, observed=True)
+        new_ids = grouped.ngroup().to_numpy()
+        cells = grouped.size().reset_index()[['order_day', 'category_name_1']]
+        starts = np.cumsum([0] + [len(part.cells) for part in parts])
+        remap = [new_ids[starts[i]:starts[i + 1]] for i in range(len(parts))]
+
+        columns = parts[0].columns.copy()
+        moments, sketches = {}, {}
+        for name in columns.index:
+            stacked = pd.concat([part.moments[name].set_axis(remap[i]) for i, part in enumerate(parts)])
+            moments[name] = _combine_moments(stacked, len(cells))
+            if columns.at[name, 'scheme'] is None:
+                continue
+            schemes = {part.columns.at[name, 'scheme'] for part in parts}
+            scheme = 'exact' if schemes == {'exact'} else 'log'
+            cell_ids, keys, counts = [], [], []
+            for i, part in enumerate(parts):
+                offsets, part_keys, part_counts = part.sketches[name]
+                if scheme == 'log' and part.columns.at[name, 'scheme'] == 'exact':
+                    # Nilai bulat eksak dipindahkan ke ember logaritmik agar sejajar dengan partisi lain
+                    part_keys = buckets.keys(part_keys.astype('float64'))
+                cell_ids.append(np.repeat(remap[i], np.diff(offsets)))
+                keys.append(part_keys)
+                counts.append(part_counts)
+            sketches[name] = _histogram(np.concatenate(cell_ids), np.concatenate(keys), len(cells),
+                                        np.concatenate(counts))
+            columns.at[name, 'scheme'] = scheme
+        return cls(cells, columns, moments, sketches, buckets.relative_accuracy)
+
+    def select(self, start_date=None, end_date=None, categories=None):
+        # Nomor sel terpilih dengan aturan filter yang sama seperti kubus penjualan
+        return slice_cube(self.cells, start_date, end_date, categories).index.to_numpy()
+
+    def _totals(self, name, cells):
+        moments = self.moments[name].iloc[cells]
+        count = moments['count'].sum()
+        totals = {'count': int(count), 'nulls': int(moments['nulls'].sum())}
+        if self.columns.at[name, 'kind'] == 'other':
+            return totals
+        filled = moments[moments['count'] > 0]
+        if count == 0:
+            return {**totals, 'min': np.nan, 'max': np.nan, 'mean': np.nan, 'std': np.nan}
+        mean = float((filled['count'] * filled['mean']).sum() / count)
+        m2 = float(filled['m2'].sum() + (filled['count'] * (filled['mean'] - mean) ** 2).sum())
+        std = np.sqrt(m2 / (count - 1)) if count > 1 else np.nan
+        return {**totals, 'min': filled['min'].min(), 'max': filled['max'].max(), 'mean': mean, 'std': std}
+
+    def quantiles(self, name, qs, cells, clip=None):
+        # Kuantil gabungan sel terpilih, interpolasi linear antar peringkat seperti pandas.quantile
+        offsets, all_keys, all_counts = self.sketches[name]
+        starts, stops = offsets[cells], offsets[np.asarray(cells) + 1]
+        lengths = stops - starts
+        total = lengths.sum()
+        if total == 0:
+            return np.full(len(qs), np.nan)
+        # Ambil potongan histogram setiap sel terpilih sekaligus (tanpa loop Python)
+        gather = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+        keys, inverse = np.unique(all_keys[gather], return_inverse=True)
+        counts = np.bincount(inverse, weights=all_counts[gather])
+        if self.columns.at[name, 'scheme'] == 'log':
+            values = self.buckets.values(keys)
+            if clip is not None:
+                values = np.clip(values, *clip)  # min/max eksak dari momen
+        elif self.columns.at[name, 'kind'] == 'datetime':
+            values = keys.astype('float64') * _NS_PER_DAY
+        else:
+            values = keys.astype('float64')
+        cumulative = np.cumsum(counts)
+        positions = np.asarray(qs, dtype='float64') * (cumulative[-1] - 1)
+        lower = values[np.searchsorted(cumulative, np.floor(positions), side='right')]
+        upper = values[np.searchsorted(cumulative, np.ceil(positions), side='right')]
+        return lower + (upper - lower) * (positions - np.floor(positions))
+
+    def _as_output(self, name, value):
+        if self.columns.at[name, 'kind'] == 'datetime' and pd.notna(value):
+            return pd.Timestamp(int(round(value)))
+        return value
+
+    def profile(self, cells):
+        # Pengganti info(): tipe, jumlah terisi/kosong, serta min/max/mean/std per kolom
+        rows = {}
+        for name in self.columns.index:
+            totals = self._totals(name, cells)
+            row = {'dtype': self.columns.at[name, 'dtype'], 'non_null': totals['count'], 'null': totals['nulls']}
+            for stat in ('min', 'max', 'mean'):
+                row[stat] = self._as_output(name, totals.get(stat, np.nan))
+            row['std'] = totals.get('std', np.nan)
+            if self.columns.at[name, 'kind'] == 'datetime' and pd.notna(row['std']):
+                row['std'] = pd.Timedelta(int(round(row['std'])))
+            rows[name] = row
+        return pd.DataFrame.from_dict(rows, orient='index')[PROFILE_COLUMNS]
+
+    def describe(self, cells, percentiles=DESCRIBE_PERCENTILES):
+        # Tata letak sama dengan DataFrame.describe() (kolom numerik & tanggal)
+        labels = [f"{p:.0%}" for p in percentiles]
+        result = {}
+        for name in self.columns.index[self.columns['kind'] != 'other']:
+            totals = self._totals(name, cells)
+            clip = (totals['min'], totals['max']) if totals['count'] else None
+            quantiles = self.quantiles(name, percentiles, cells, clip=clip)
+            column = {'count': float(totals['count']), 'mean': totals['mean'], 'min': totals['min']}
+            column.update(dict(zip(labels, quantiles)))
+            column.update({'max': totals['max'], 'std': totals['std']})
+            if self.columns.at[name, 'kind'] == 'datetime':
+                column = {k: (v if k == 'count' else self._as_output(name, v)) for k, v in column.items()}
+                column['std'] = np.nan  # seperti describe(): std tidak ditampilkan untuk tanggal
+            result[name] = column
+        order = ['count', 'mean', 'min', *labels, 'max', 'std']
+        return pd.DataFrame(result).reindex(order)
+
+    def axis_limits(self, x, y, clip_quantile, cells):
+        # Batas sumbu grafik dari sketsa (pengganti frame[[x, y]].quantile(clip_quantile))
+        limits = []
+        for name in (x, y):
+            totals = self._totals(name, cells)
+            clip = (totals['min'], totals['max']) if totals['count'] else None
+            limits.append(self.quantiles(name, [clip_quantile], cells, clip=clip)[0])
+        return tuple(float(v) if pd.notna(v) and v > 0 else 1.0 for v in limits)
+
+
+def _histogram(cell_ids, keys, n_cells, counts=None):
+    # Pasangan (sel, kunci) -> CSR: offsets per sel, kunci terurut & jumlahnya (int32 bila muat)
+    pairs = pd.DataFrame({'cell': cell_ids, 'key': keys, 'count': 1 if counts is None else counts})
+    histogram = pairs.groupby(['cell', 'key'], sort=True)['count'].sum().reset_index()
+    offsets = np.searchsorted(histogram['cell'].to_numpy(), np.arange(n_cells + 1))
+    keys = histogram['key'].to_numpy()
+    if len(keys) and keys.min() >= np.iinfo('int32').min and keys.max() <= np.iinfo('int32').max:
+        keys = keys.astype(np.int32)
+    return offsets, keys, histogram['count'].to_numpy().astype(np.int32)
+
+
+def _combine_moments(stacked, n_cells):
+    # Gabungan momen untuk sel yang muncul di beberapa partisi (count/null dijumlah, mean & M2 ala Chan)
+    grouped = stacked.groupby(level=0)
+    combined = grouped[['count', 'nulls']].sum()
+    if 'mean' in stacked:
+        weighted = stacked['count'] * stacked['mean'].fillna(0)
+        mean = weighted.groupby(level=0).sum() / combined['count'].where(combined['count'] > 0)
+        spread = stacked['count'] * (stacked['mean'] - mean.reindex(stacked.index).to_numpy()) ** 2
+        combined['min'] = grouped['min'].min()
+        combined['max'] = grouped['max'].max()
+        combined['mean'] = mean
+        combined['m2'] = stacked['m2'].groupby(level=0).sum() + spread.fillna(0).groupby(level=0).sum()
+    return combined.reindex(range(n_cells)).reset_index(drop=True)
+
+
+def profile_frame(frame):
+    # Mode eksak: profil yang sama dihitung langsung dari baris item (pemindaian penuh)
+    rows = {}
+    for name in frame.columns:
+        series = frame[name]
+        kind = _column_kind(series)
+        non_null = int(series.count())
+        row = {'dtype': str(series.dtype), 'non_null': non_null, 'null': len(series) - non_null}
+        if kind != 'other':
+            row.update({'min': series.min(), 'max': series.max(), 'mean': series.mean(), 'std': series.std()})
+        rows[name] = row
+    return pd.DataFrame.from_dict(rows, orient='index').reindex(columns=PROFILE_COLUMNS)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+# --- Tata Letak Memori Ringkas untuk df_merged ---
+# - String berkardinalitas rendah  -> category (kamus + kode integer)
+# - Kuantitas, id, jam, tahun      -> integer terkecil yang muat
+# - Harga yang tidak dijumlahkan   -> float32 bila konversi tanpa kehilangan nilai
+#   (ukuran yang dijumlahkan di KPI tetap float64 agar total tidak bergeser)
+# - Kolom kalender sudah berupa kode integer (lihat star_schema) dan baru diubah
+#   menjadi teks/tanggal saat ditampilkan lewat render_calendar_columns().
+
+CATEGORY_COLUMNS = ['status', 'payment_method', 'category_name_1', 'sku', 'sales_commission_code']
+INTEGER_COLUMNS = ['Customer ID', 'item_id', 'qty_ordered']
+FLOAT32_COLUMNS = ['grand_total', 'price_per_unit_sold', 'product_original_price']
+KPI_SUM_COLUMNS = ['net_item_sales', 'discount_amount', 'total_price_per_item'] + FLOAT32_COLUMNS
+KPI_DISTINCT_COLUMNS = ['increment_id', 'Customer ID', 'sku']
+
+# Kolom string dijadikan category hanya jika nilai uniknya paling banyak separuh jumlah baris
+MAX_CATEGORY_RATIO = 0.5
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def compact_frame(df):
+    compact = df.copy(deep=False)
+    for column in CATEGORY_COLUMNS:
+        values = compact[column]
+        if values.dtype == object and values.nunique(dropna=True) <= MAX_CATEGORY_RATIO * max(len(values), 1):
+            compact[column] = values.astype('category')
+    for column in INTEGER_COLUMNS:
+        values = compact[column]
+        if pd.api.types.is_integer_dtype(values.dtype):
+            compact[column] = pd.to_numeric(values, downcast='integer')
+    for column in FLOAT32_COLUMNS:
+        values = compact[column]
+        narrowed = values.astype('float32')
+        if values.dtype == 'float64' and np.array_equal(narrowed.to_numpy(dtype='float64'), values.to_numpy(), equal_nan=True):
+            compact[column] = narrowed
+    return compact
+
+
+def concat_frames(frames):
+    # Gabungkan partisi tanpa kehilangan tata letak ringkas: kolom yang category di partisi
+    # pertama (snapshot dasar) diberi kamus gabungan di semua partisi sebelum pd.concat,
+    # termasuk partisi kecil yang kolomnya masih object.
+    base = frames[0]
+    aligned = [frame.copy(deep=False) for frame in frames]
+    for column in base.columns:
+        if not isinstance(base[column].dtype, pd.CategoricalDtype):
+            continue
+        values = [frame[column] for frame in frames]
+        categories = pd.Index(np.concatenate([
+            v.cat.categories.to_numpy() if isinstance(v.dtype, pd.CategoricalDtype) else v.dropna().unique()
+            for v in values
+        ])).unique()
+        dtype = pd.CategoricalDtype(categories)
+        for frame in aligned:
+            frame[column] = frame[column].astype(dtype)
+    return pd.concat(aligned, ignore_index=True)
+
+
+def verify_kpi_totals(before, after):
+    # Pemeriksaan regresi: semua total & hitungan unik KPI harus identik sebelum/sesudah dipadatkan
+    mismatches = []
+    if len(before) != len(after):
+        mismatches.append(f"jumlah baris {len(before)} != {len(after)}")
+    for column in KPI_SUM_COLUMNS:
+        total_before = before[column].astype('float64').sum()
+        total_after = after[column].astype('float64').sum()
+        if total_before != total_after:
+            mismatches.append(f"sum({column}) {total_before} != {total_after}")
+    for column in KPI_DISTINCT_COLUMNS:
+        if before[column].nunique() != after[column].nunique():
+            mismatches.append(f"nunique({column}) berubah")
+    if mismatches:
+        raise ValueError("Pemadatan df_merged mengubah total KPI: " + "; ".join(mismatches))
+
+
+def memory_report(before, after):
+    bytes_before = before.memory_usage(deep=True, index=False)
+    bytes_after = after.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'kolom': bytes_before.index,
+        'dtype_sebelum': [str(before[c].dtype) for c in bytes_before.index],
+        'bytes_sebelum': bytes_before.to_numpy(),
+        'dtype_sesudah': [str(after[c].dtype) for c in bytes_before.index],
+        'bytes_sesudah': bytes_after.reindex(bytes_before.index).to_numpy(),
+    })
+    report['hemat_%'] = (1 - report['bytes_sesudah'] / report['bytes_sebelum'].where(report['bytes_sebelum'] > 0)).mul(100).round(1)
+    return report
+
+
+def render_calendar_columns(df):
+    # Ubah kode kalender menjadi nilai yang mudah dibaca, hanya untuk baris yang ditampilkan
+    rendered = df.copy()
+    if 'order_date' in rendered:
+        rendered['order_date'] = pd.to_datetime(rendered['order_date'].astype('float64'), unit='D').dt.date
+    if 'order_month' in rendered:
+        months = rendered['order_month'].astype('float64')
+        rendered['order_month'] = [pd.Period(ordinal=int(m), freq='M') if pd.notna(m) else None for m in months]
+    if 'day_of_week' in rendered:
+        rendered['day_of_week'] = rendered['day_of_week'].map(dict(enumerate(DAY_NAMES)))
+    return rendered
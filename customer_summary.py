@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+
+# --- Ringkasan per Pelanggan (dibangun sekali saat data dimuat) ---
+# Baris item diringkas menjadi ember (hari x pelanggan x kategori): jumlah item, penjualan
+# bersih, dan diskon. Ember terurut menurut hari, sehingga filter tanggal cukup berupa
+# potongan binary search dan filter kategori berupa isin() pada kolom kecil.
+# Ringkasan per pelanggan, peringkat Top-N, RFM, dan kohort dihitung ulang dari ember ini
+# tanpa memindai baris item.
+#
+# Jumlah pesanan tidak bisa dijumlahkan per kategori (satu pesanan bisa berisi beberapa
+# kategori), jadi disimpan terpisah: jumlah pesanan (bilangan bulat) per (hari x pelanggan x
+# himpunan kategori pesanan). Dengan filter kategori, pesanan dihitung bila himpunannya
+# beririsan dengan pilihan -- tepat sama dengan pesanan unik pada baris item terpilih.
+#
+# Grain hari dipertahankan karena filter tanggal & recency per hari: sebagian besar pelanggan
+# hanya memesan sekali per hari, sehingga grain bulan pun hampir tidak mengurangi jumlah ember.
+
+_NO_DAY = np.iinfo('int32').max  # created_at kosong: di akhir urutan, ikut hanya tanpa filter tanggal
+_EPOCH = pd.Timestamp('1970-01-01')
+
+RFM_SEGMENTS = ['Champions', 'Loyal', 'Baru', 'Berisiko', 'Hilang', 'Perlu Perhatian']
+
+
+def day_code(date):
+    return (pd.Timestamp(date) - _EPOCH).days
+
+
+def days_to_dates(days):
+    return pd.to_datetime(np.asarray(days, dtype='float64'), unit='D')
+
+
+def top_n(values, n=10):
+    # Seleksi parsial (argpartition, O(n)) lalu hanya n teratas yang diurutkan
+    if len(values) > n:
+        values = values.iloc[np.argpartition(-values.to_numpy(), n - 1)[:n]]
+    return values.sort_values(ascending=False)
+
+
+def _category_sets(orders, category):
+    # Himpunan kategori per pesanan sebagai kode himpunan: bit kategori (per kata 64-bit)
+    # dijumlahkan per pesanan -- pasangan (pesanan, kategori) unik, jadi jumlah = OR bit
+    codes, names = pd.factorize(category)
+    pairs = pd.DataFrame({'order': orders, 'code': codes})
+    pairs = pairs[pairs['code'] >= 0].drop_duplicates()
+    code = pairs['code'].to_numpy()
+    words = {}
+    for word in range(max(1, -(-len(names) // 64))):
+        in_word = code // 64 == word
+        words[f"w{word}"] = np.where(in_word, np.left_shift(np.uint64(1), (code % 64).astype(np.uint64)), np.uint64(0))
+    per_order = pd.DataFrame(words).groupby(pairs['order'].to_numpy(), sort=False).sum()
+    set_codes, set_words = pd.factorize(pd.MultiIndex.from_frame(per_order))
+    category_sets = []
+    for word_values in set_words:
+        word_values = word_values if isinstance(word_values, tuple) else (word_values,)
+        members = [word * 64 + bit for word, value in enumerate(word_values) for bit in range(64) if int(value) >> bit & 1]
+        category_sets.append(frozenset(names[members]))
+    return pd.Series(set_codes.astype('int32'), index=per_order.index), category_sets
+
+
+class CustomerDaily:
+    def __init__(self, buckets, orders, category_sets, first_order_day):
+        self.buckets = buckets
+        self.orders = orders  # jumlah pesanan per (hari, pelanggan, kode himpunan kategori), terurut hari
+        self.category_sets = category_sets  # kode himpunan -> frozenset nama kategori
+        self.first_order_day = first_order_day  # hari pesanan pertama sepanjang data, per pelanggan
+
+    @classmethod
+    def build(cls, df_merged):
+        keys = pd.DataFrame({
+            'order_date': df_merged['order_date'].astype('float64').fillna(_NO_DAY).astype('int32'),
+            'Customer ID': df_merged['Customer ID'],
+            'category_name_1': df_merged['category_name_1'],
+        })
+        by = [keys[c] for c in keys.columns]
+        grouped = df_merged[['net_item_sales', 'discount_amount']].groupby(by, sort=True, observed=True)
+        buckets = grouped.sum().rename(columns={'net_item_sales': 'net_sales', 'discount_amount': 'discount'})
+        buckets['items'] = grouped.size().astype('int32')
+        buckets = buckets.reset_index()
+
+        # Pesanan = (increment_id, hari, pelanggan) unik; dihitung per himpunan kategorinya
+        order_keys = keys[['order_date', 'Customer ID']].assign(increment_id=df_merged['increment_id'].to_numpy())
+        order_ids = order_keys.groupby(list(order_keys.columns), sort=False, observed=True).ngroup().to_numpy()
+        category_set, category_sets = _category_sets(order_ids, df_merged['category_name_1'].to_numpy())
+        first_row = pd.Series(np.arange(len(order_ids))).groupby(order_ids, sort=False).first()
+        order_rows = keys.iloc[first_row.reindex(category_set.index).to_numpy()][['order_date', 'Customer ID']]
+        orders = order_rows.assign(category_set=category_set.to_numpy())
+        orders = orders.groupby(['order_date', 'Customer ID', 'category_set'], sort=True).size().rename('orders')
+        orders = orders.astype('int32').reset_index()
+
+        dated = buckets[buckets['order_date'] != _NO_DAY]
+        first_order_day = dated.groupby('Customer ID', sort=False)['order_date'].min()
+        return cls(buckets, orders, category_sets, first_order_day)
+
+    @classmethod
+    def merge(cls, parts):
+        # Gabungan ringkasan per partisi: ember yang sama dijumlahkan, pesanan pertama = minimum.
+        # Kode himpunan kategori tiap partisi dipetakan ke daftar himpunan gabungan. Pesanan yang
+        # itemnya tersebar di dua partisi (ekspor berbeda) terhitung di keduanya.
+        if len(parts) == 1:
+            return parts[0]
+        combined = pd.concat([part.buckets for part in parts], ignore_index=True)
+        keys = ['order_date', 'Customer ID', 'category_name_1']
+        buckets = combined.groupby(keys, sort=True, observed=True)[['net_sales', 'discount', 'items']].sum()
+        positions, category_sets, orders = {}, [], []
+        for part in parts:
+            remap = np.array([positions.setdefault(members, len(positions)) for members in part.category_sets], dtype='int32')
+            orders.append(part.orders.assign(category_set=remap[part.orders['category_set'].to_numpy()]))
+        category_sets = list(positions)
+        orders = pd.concat(orders, ignore_index=True).groupby(['order_date', 'Customer ID', 'category_set'], sort=True)['orders'].sum()
+        first_order_day = pd.concat([part.first_order_day for part in parts]).groupby(level=0).min()
+        return cls(buckets.reset_index(), orders.reset_index(), category_sets, first_order_day)
+
+    def _day_slice(self, table, start_date, end_date):
+        if start_date is None or end_date is None:
+            return table
+        days = table['order_date'].to_numpy()
+        lower = np.searchsorted(days, day_code(start_date), side='left')
+        upper = np.searchsorted(days, day_code(end_date), side='right')
+        return table.iloc[lower:upper]
+
+    def select_orders(self, start_date=None, end_date=None, categories=None):
+        orders = self._day_slice(self.orders, start_date, end_date)
+        if categories is not None:
+            selected = set(categories)
+            overlaps = np.array([not members.isdisjoint(selected) for members in self.category_sets], dtype=bool)
+            orders = orders[overlaps[orders['category_set'].to_numpy()]] if len(overlaps) else orders.iloc[:0]
+        return orders
+
+    def select(self, start_date=None, end_date=None, categories=None):
+        buckets = self._day_slice(self.buckets, start_date, end_date)
+        if categories is not None:
+            buckets = buckets[buckets['category_name_1'].isin(categories)]
+        return buckets
+
+    def summarize(self, start_date=None, end_date=None, categories=None):
+        buckets = self.select(start_date, end_date, categories)
+        dated_days = buckets['order_date'].where(buckets['order_date'] != _NO_DAY)
+        grouped = buckets.assign(order_day=dated_days).groupby('Customer ID', sort=False)
+        summary = grouped.agg(
+            first_order=('order_day', 'min'),
+            last_order=('order_day', 'max'),
+            items=('items', 'sum'),
+            net_sales=('net_sales', 'sum'),
+            discount=('discount', 'sum'),
+        )
+        orders = self.select_orders(start_date, end_date, categories).groupby('Customer ID', sort=False)['orders'].sum()
+        summary.insert(2, 'orders', orders.reindex(summary.index, fill_value=0).astype('int64'))
+        return summary
+
+    def customers_by_first_year(self, summary):
+        # Pelanggan aktif dalam filter, dikelompokkan menurut tahun pesanan pertamanya (sepanjang data)
+        first_days = self.first_order_day.reindex(summary.index).dropna()
+        return days_to_dates(first_days).year.value_counts().sort_index()
+
+    def cohorts(self, start_date=None, end_date=None, categories=None):
+        # Pelanggan aktif per (bulan kohort = bulan pesanan pertama, bulan ke-k sejak itu)
+        buckets = self.select(start_date, end_date, categories)
+        buckets = buckets[buckets['order_date'] != _NO_DAY]
+        months = days_to_dates(buckets['order_date']).to_period('M').asi8
+        first = self.first_order_day.reindex(buckets['Customer ID']).to_numpy()
+        cohort = days_to_dates(first).to_period('M').asi8
+        active = pd.DataFrame({'cohort': cohort, 'offset': months - cohort,
+                               'customer': buckets['Customer ID'].to_numpy()}).drop_duplicates()
+        table = active.groupby(['cohort', 'offset']).size().unstack(fill_value=0)
+        table.index = [str(pd.Period(ordinal=int(c), freq='M')) for c in table.index]
+        return table
+
+
+def rfm_scores(summary, as_of_day):
+    # Skor 1-5 per dimensi dari peringkat (bebas nilai kembar); recency kecil = skor tinggi
+    summary = summary.dropna(subset=['last_order'])
+    recency = as_of_day - summary['last_order']
+    scored = pd.DataFrame({
+        'recency_hari': recency,
+        'frekuensi': summary['orders'],
+        'nilai': summary['net_sales'],
+    }, index=summary.index)
+    quintile = lambda values: np.ceil(values.rank(method='first', pct=True) * 5).clip(1, 5).astype(int)
+    scored['R'] = 6 - quintile(recency)
+    scored['F'] = quintile(summary['orders'])
+    scored['M'] = quintile(summary['net_sales'])
+    conditions = [
+        (scored['R'] >= 4) & (scored['F'] >= 4),
+        scored['F'] >= 4,
+        (scored['R'] >= 4) & (scored['F'] <= 2),
+        (scored['R'] <= 2) & (scored['F'] >= 3),
+        (scored['R'] <= 2) & (scored['F'] <= 2),
+    ]
+    scored['segmen'] = np.select(conditions, RFM_SEGMENTS[:-1], default=RFM_SEGMENTS[-1])
+    return scored
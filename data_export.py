@@ -0,0 +1,86 @@
+import tempfile
+import zlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from compact_layout import render_calendar_columns
+
+# --- Ekspor Data Terfilter secara Streaming ---
+# Baris terpilih dibaca per blok (RowSelection.iter_frames), diubah ke bentuk yang mudah
+# dibaca, lalu langsung dikompresi: CSV gzip lewat generator potongan byte, atau Parquet
+# per row group. Memori yang dipakai sebanding dengan ukuran blok, bukan jumlah baris yang
+# diekspor, sehingga rentang tanggal penuh pun bisa diunduh.
+
+DEFAULT_EXPORT_CHUNK_ROWS = 100_000
+EXPORT_FORMATS = {
+    # format -> tipe MIME file unduhan
+    'csv.gz': 'application/gzip',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def _month_text(codes):
+    # Ordinal bulan -> teks 'YYYY-MM'; hanya nilai unik (puluhan bulan) yang diformat
+    labels = {code: str(pd.Period(ordinal=int(code), freq='M')) for code in codes.dropna().unique()}
+    return codes.map(labels).astype('string')
+
+
+def export_chunk(chunk):
+    # Kode kalender -> tanggal/bulan/nama hari (sama seperti tabel di dashboard);
+    # bulan ditulis sebagai teks 'YYYY-MM' agar bisa disimpan di Parquet
+    rendered = render_calendar_columns(chunk.drop(columns=['order_month'], errors='ignore'))
+    if 'order_month' in chunk:
+        rendered.insert(chunk.columns.get_loc('order_month'), 'order_month', _month_text(chunk['order_month']))
+    return rendered
+
+
+def iter_csv_gzip(df, rows, chunk_rows=DEFAULT_EXPORT_CHUNK_ROWS, level=6):
+    # Generator potongan byte gzip; header hanya ditulis pada blok pertama
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: kontainer gzip
+    header = True
+    for chunk in rows.iter_frames(df, chunk_rows):
+        data = compressor.compress(export_chunk(chunk).to_csv(index=False, header=header).encode('utf-8'))
+        header = False
+        if data:
+            yield data
+    if header:
+        # Pilihan kosong: tetap tulis baris header
+        yield compressor.compress(export_chunk(df.iloc[0:0]).to_csv(index=False).encode('utf-8'))
+    yield compressor.flush()
+
+
+def write_parquet(df, rows, sink, chunk_rows=DEFAULT_EXPORT_CHUNK_ROWS):
+    # Satu row group per blok; skema diambil dari blok pertama agar tipe kolom konsisten
+    writer = None
+    try:
+        for chunk in rows.iter_frames(df, chunk_rows):
+            table = pa.Table.from_pandas(export_chunk(chunk), schema=writer.schema if writer else None,
+                                         preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema, compression='zstd')
+            writer.write_table(table)
+        if writer is None:
+            pq.write_table(pa.Table.from_pandas(export_chunk(df.iloc[0:0]), preserve_index=False), sink)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_export(df, rows, sink, export_format, chunk_rows=DEFAULT_EXPORT_CHUNK_ROWS):
+    if export_format == 'csv.gz':
+        for data in iter_csv_gzip(df, rows, chunk_rows):
+            sink.write(data)
+    elif export_format == 'parquet':
+        write_parquet(df, rows, sink, chunk_rows)
+    else:
+        raise ValueError(f"Format ekspor tidak dikenal: {export_format}")
+
+
+def export_tempfile(df, rows, export_format, chunk_rows=DEFAULT_EXPORT_CHUNK_ROWS):
+    # File sementara tanpa nama (terhapus otomatis saat ditutup), siap dibaca dari awal
+    sink = tempfile.TemporaryFile()
+    write_export(df, rows, sink, export_format, chunk_rows)
+    sink.seek(0)
+    return sink
@@ -0,0 +1,698 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+import compact_layout
+import instrumentation
+import star_schema
+import timestamp_stage
+from compact_layout import compact_frame, concat_frames, memory_report, verify_kpi_totals
+from star_schema import StarSchema
+from timestamp_stage import TIMESTAMP_STATS, parse_timestamps
+
+try:
+    import fcntl
+except ImportError:  # Windows: kunci file lewat msvcrt
+    fcntl = None
+    import msvcrt
+
+# Naikkan angka ini jika aturan pembersihan/penggabungan diubah secara manual.
+# Selain itu, hash dari file modul-modul pipeline juga ikut menjadi bagian kunci cache,
+# sehingga setiap perubahan kode pipeline otomatis membangun ulang snapshot.
+PIPELINE_VERSION = 1
+
+SNAPSHOT_PREFIX = "df_merged"
+MANIFEST_NAME = "manifest.json"
+# Partisi dari ekspor tambahan (append) & kunci baris item yang sudah ada di dataset
+PARTITIONS_DIR = "partitions"
+PARTITION_PREFIX = "part"
+LINE_KEYS_NAME = "line_keys.npy"
+# Kunci file untuk semua perubahan isi cache (snapshot, partisi, kunci baris, manifest)
+LOCK_NAME = ".lock"
+
+logger = logging.getLogger(__name__)
+
+
+# --- Skema Data Mentah ---
+# Hanya kolom yang dipakai dashboard yang dibaca, dengan tipe eksplisit
+# (kolom lain seperti 'Working Date', 'M-Y', 'FY', 'Unnamed: *' dilewati).
+RAW_DTYPES = {
+    'item_id': 'float64',
+    'status': 'object',
+    'created_at': 'object',
+    'sku': 'object',
+    'price': 'float64',
+    'qty_ordered': 'float64',
+    'grand_total': 'float64',
+    'increment_id': 'object',
+    'category_name_1': 'object',
+    'sales_commission_code': 'object',
+    'discount_amount': 'float64',
+    'payment_method': 'object',
+    'Customer Since': 'object',
+    'Customer ID': 'float64',
+}
+RAW_COLUMNS = list(RAW_DTYPES)
+# Kolom numerik dibaca langsung sebagai float64 (jalur cepat). Bila ada sel yang bukan angka
+# (mis. '#VALUE!'), file dibaca ulang dengan kolom ini sebagai teks dan clean_tables
+# mengonversinya per sel: nilai rusak menjadi 0 / -1, atau barisnya dibuang untuk kolom kunci.
+NUMERIC_COLUMNS = [column for column, dtype in RAW_DTYPES.items() if dtype == 'float64']
+RAW_TEXT_DTYPES = {**RAW_DTYPES, **dict.fromkeys(NUMERIC_COLUMNS, 'object')}
+
+# Format tanggal pada ekspor mentah, mis. '7/1/2016' dan '2016-7'
+CREATED_AT_FORMAT = '%m/%d/%Y'
+CUSTOMER_SINCE_FORMAT = '%Y-%m'
+
+TABLE_COLUMNS = {
+    'customers': ['Customer ID', 'sales_commission_code', 'Customer Since'],
+    'orders': ['increment_id', 'created_at', 'status', 'payment_method', 'grand_total', 'Customer ID'],
+    'products': ['item_id', 'sku', 'category_name_1', 'price'],
+    'sales': ['increment_id', 'item_id', 'qty_ordered', 'price', 'discount_amount'],
+}
+
+# Jumlah baris per potongan (chunk) pada mode ingest streaming
+DEFAULT_CHUNK_SIZE = 250_000
+
+# --- Pembacaan & Pemrosesan Data Mentah ---
+def read_raw_csv(file_path, chunk_size=None, dtypes=RAW_DTYPES):
+    return pd.read_csv(file_path, usecols=RAW_COLUMNS, dtype=dtypes, chunksize=chunk_size)
+
+
+def _read_malformed(error):
+    # Sel bukan angka pada kolom numerik: baca ulang sebagai teks, jangan gagalkan seluruh muatan
+    logger.warning("Kolom numerik berisi nilai bukan angka (%s); CSV dibaca ulang sebagai teks", error)
+
+
+def split_tables(ecommerce_df):
+    # Membuat subset tabel-tabel berdasarkan kolom yang relevan
+    return {name: ecommerce_df[columns].drop_duplicates().copy() for name, columns in TABLE_COLUMNS.items()}
+
+
+def clean_tables(tables, timestamp_stats=None):
+    customers_df = tables['customers']
+    orders_df = tables['orders']
+    products_df = tables['products']
+    sales_df = tables['sales']
+
+    # --- Pembersihan Data Esensial ---
+    stats = {} if timestamp_stats is None else timestamp_stats
+    with instrumentation.stage('konversi_tanggal', rows=len(orders_df)):
+        orders_df['created_at'] = parse_timestamps(orders_df['created_at'], CREATED_AT_FORMAT, stats.setdefault('created_at', {}))
+    orders_df['grand_total'] = pd.to_numeric(orders_df['grand_total'], errors='coerce').fillna(0)
+    orders_df['Customer ID'] = pd.to_numeric(orders_df['Customer ID'], errors='coerce').fillna(-1).astype(int)
+
+    products_df['item_id'] = pd.to_numeric(products_df['item_id'], errors='coerce')
+    products_df.dropna(subset=['item_id', 'sku', 'category_name_1', 'price'], inplace=True)
+    products_df['item_id'] = products_df['item_id'].astype(int)
+    products_df['price'] = pd.to_numeric(products_df['price'], errors='coerce').fillna(0)
+    products_df['sku'] = products_df['sku'].astype(str).str.upper().str.strip()
+    products_df['category_name_1'] = products_df['category_name_1'].astype(str).str.upper().str.strip().replace(r'\N', 'UNKNOWN')
+    products_df = products_df[products_df['price'] >= 0]
+
+    sales_df['item_id'] = pd.to_numeric(sales_df['item_id'], errors='coerce')
+    sales_df['qty_ordered'] = pd.to_numeric(sales_df['qty_ordered'], errors='coerce')
+    sales_df.dropna(subset=['increment_id', 'item_id', 'qty_ordered', 'price', 'discount_amount'], inplace=True)
+    sales_df['item_id'] = sales_df['item_id'].astype(int)
+    sales_df['qty_ordered'] = sales_df['qty_ordered'].astype(int)
+    sales_df['price'] = pd.to_numeric(sales_df['price'], errors='coerce').fillna(0)
+    sales_df['discount_amount'] = pd.to_numeric(sales_df['discount_amount'], errors='coerce').fillna(0)
+    sales_df = sales_df[sales_df['qty_ordered'] > 0]
+    sales_df = sales_df[sales_df['price'] >= 0]
+    sales_df = sales_df[sales_df['discount_amount'] >= 0]
+
+    with instrumentation.stage('konversi_tanggal', rows=len(customers_df)):
+        customers_df['Customer Since'] = parse_timestamps(customers_df['Customer Since'], CUSTOMER_SINCE_FORMAT, stats.setdefault('Customer Since', {}))
+    customers_df['Customer ID'] = pd.to_numeric(customers_df['Customer ID'], errors='coerce').fillna(-1).astype(int)
+    customers_df.dropna(subset=['Customer ID'], inplace=True)
+
+    return {'customers': customers_df, 'orders': orders_df, 'products': products_df, 'sales': sales_df}
+
+
+def merge_tables(tables):
+    # --- Penggabungan Data ---
+    # Skema bintang (kode integer + take) menggantikan rantai pd.merge outer/inner/inner; semua
+    # kolom dibentuk sekaligus, identik dengan rantai merge sebelumnya. Baris diurutkan menurut
+    # created_at agar filter tanggal cukup berupa potongan (slice) hasil binary search.
+    with instrumentation.stage('gabung_tabel') as record:
+        df_merged = StarSchema.from_tables(tables).sort_by_created_at().to_frame()
+        record['rows'] = len(df_merged)
+    return df_merged
+
+
+def process_raw_data(ecommerce_df, timestamp_stats=None):
+    with instrumentation.stage('pisah_tabel', rows=len(ecommerce_df)):
+        tables = split_tables(ecommerce_df)
+    with instrumentation.stage('bersihkan', rows=len(ecommerce_df)):
+        tables = clean_tables(tables, timestamp_stats)
+    return merge_tables(tables)
+
+
+# --- Ingest Streaming per Chunk (memori terbatas) ---
+def _split_chunk(chunk, seen_keys):
+    # De-duplikasi memakai hash nilai *mentah* (sebelum dibersihkan), sama seperti
+    # drop_duplicates() pada mode sekali-baca; baris yang sudah muncul di chunk sebelumnya dibuang.
+    # seen_keys menyimpan hash terurut: pencarian cukup binary search, dan hash baru disisipkan
+    # dalam satu lintasan linear (riwayat tidak pernah diurutkan ulang).
+    tables = {}
+    for name, columns in TABLE_COLUMNS.items():
+        subset = chunk[columns]
+        keys = pd.util.hash_pandas_object(subset, index=False).to_numpy()
+        keep = ~pd.Series(keys).duplicated().to_numpy()
+        seen = seen_keys[name]
+        if len(seen):
+            keep &= seen[np.minimum(np.searchsorted(seen, keys), len(seen) - 1)] != keys
+        new_keys = np.sort(keys[keep])
+        seen_keys[name] = np.insert(seen, np.searchsorted(seen, new_keys), new_keys)
+        tables[name] = subset[keep].copy()
+    return tables
+
+
+def ingest_csv_chunked(file_path, chunk_size=DEFAULT_CHUNK_SIZE, timestamp_stats=None):
+    try:
+        return _ingest_chunks(file_path, chunk_size, RAW_DTYPES, timestamp_stats)
+    except ValueError as e:
+        _read_malformed(e)
+        if timestamp_stats is not None:
+            timestamp_stats.clear()
+        return _ingest_chunks(file_path, chunk_size, RAW_TEXT_DTYPES, timestamp_stats)
+
+
+def _ingest_chunks(file_path, chunk_size, dtypes, timestamp_stats):
+    seen_keys = {name: np.empty(0, dtype='uint64') for name in TABLE_COLUMNS}
+    # Potongan kosong sebagai awal agar skema tabel tetap ada walaupun CSV tidak berisi baris
+    empty = pd.DataFrame(columns=RAW_COLUMNS).astype(RAW_DTYPES)
+    parts = {name: [table] for name, table in clean_tables(split_tables(empty)).items()}
+    for chunk in instrumentation.timed_iter('baca_csv', read_raw_csv(file_path, chunk_size=chunk_size, dtypes=dtypes)):
+        # Setiap chunk langsung dibersihkan; chunk mentah dilepas sebelum chunk berikutnya dibaca
+        with instrumentation.stage('pisah_tabel', rows=len(chunk)):
+            tables = _split_chunk(chunk, seen_keys)
+        with instrumentation.stage('bersihkan', rows=len(chunk)):
+            for name, table in clean_tables(tables, timestamp_stats).items():
+                parts[name].append(table)
+        del chunk, tables
+    return {name: pd.concat(tables) for name, tables in parts.items()}
+
+
+def build_merged(file_path, chunk_size=None, with_report=False):
+    timestamp_stats = {}
+    if chunk_size:
+        df_merged = merge_tables(ingest_csv_chunked(file_path, chunk_size=chunk_size, timestamp_stats=timestamp_stats))
+    else:
+        with instrumentation.stage('baca_csv') as record:
+            try:
+                ecommerce_df = read_raw_csv(file_path)
+            except ValueError as e:
+                _read_malformed(e)
+                ecommerce_df = read_raw_csv(file_path, dtypes=RAW_TEXT_DTYPES)
+            record['rows'] = len(ecommerce_df)
+        df_merged = process_raw_data(ecommerce_df, timestamp_stats)
+        del ecommerce_df
+
+    # Padatkan tata letak memori, lalu pastikan total KPI tidak berubah sedikit pun
+    with instrumentation.stage('padatkan', rows=len(df_merged)):
+        compact = compact_frame(df_merged)
+        verify_kpi_totals(df_merged, compact)
+    if with_report:
+        return compact, memory_report(df_merged, compact), timestamp_stats
+    return compact
+
+
+# --- Sidik Jari File Sumber & Versi Pipeline ---
+def _file_sha256(file_path, chunk_size=8 * 1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Kode pipeline yang sudah dimuat tidak berubah selama proses berjalan, jadi sidik jarinya
+# cukup dihitung sekali per proses (bukan membaca ulang file modul setiap rerun)
+_pipeline_fingerprint = None
+
+
+def pipeline_fingerprint():
+    # Versi manual + hash isi modul pipeline: mengubah logika pembersihan = snapshot baru
+    global _pipeline_fingerprint
+    if _pipeline_fingerprint is None:
+        digest = hashlib.sha256()
+        for module_file in (__file__, star_schema.__file__, compact_layout.__file__, timestamp_stage.__file__):
+            with open(module_file, 'rb') as f:
+                digest.update(f.read())
+        _pipeline_fingerprint = f"v{PIPELINE_VERSION}-{digest.hexdigest()[:16]}"
+    return _pipeline_fingerprint
+
+
+def _same_stat(file_path, previous):
+    # Jalur, ukuran & mtime sama dengan sidik jari tersimpan (tanpa membaca isi file)
+    if not previous:
+        return False
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return False
+    return (previous.get('path') == os.path.abspath(file_path) and previous.get('size') == stat.st_size
+            and previous.get('mtime_ns') == stat.st_mtime_ns)
+
+
+def source_fingerprint(file_path, previous=None):
+    stat = os.stat(file_path)
+    fingerprint = {
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+    # Jalur cepat: ukuran & mtime sama dengan manifest sebelumnya -> hash lama dipakai ulang
+    # tanpa membaca ulang seluruh file CSV.
+    if previous and all(previous.get(k) == fingerprint[k] for k in ('path', 'size', 'mtime_ns')):
+        fingerprint['sha256'] = previous['sha256']
+    else:
+        fingerprint['sha256'] = _file_sha256(file_path)
+    return fingerprint
+
+
+# --- Snapshot Kolumnar (Parquet) di Disk ---
+# Folder cache yang gagal dibuat/ditulis pada proses ini. Cache hanya optimasi: sisa proses
+# memakai jalur tanpa cache, alih-alih membangun ulang dataset (dan gagal menulis) tiap rerun.
+_DISABLED_CACHE_DIRS = set()
+
+
+def disable_cache_dir(cache_dir, error):
+    if cache_dir not in _DISABLED_CACHE_DIRS:
+        _DISABLED_CACHE_DIRS.add(cache_dir)
+        logger.warning("Cache dataset di %s dinonaktifkan untuk proses ini: %s", cache_dir, error)
+
+
+def usable_cache_dir(cache_dir):
+    # cache_dir bila bisa dipakai (dibuat bila belum ada), None bila tidak
+    if cache_dir is None or cache_dir in _DISABLED_CACHE_DIRS:
+        return None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError as e:
+        disable_cache_dir(cache_dir, e)
+        return None
+    return cache_dir
+
+
+# --- Kunci Cache antar Sesi & Proses ---
+# Setiap rerun dari setiap sesi (dan worker laporan batch) memeriksa manifest lalu mungkin
+# menulis snapshot/partisi. Pemeriksaan & penulisan dilakukan di bawah satu kunci file per
+# folder cache, sehingga ekspor baru tidak ditambahkan dua kali dan manifest tidak saling
+# menimpa; yang menunggu membaca ulang manifest setelah kunci didapat. Kunci bersifat
+# re-entrant dalam satu thread (prepare_dataset -> sync_exports -> append_export).
+_held_locks = threading.local()
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            pass  # LK_LOCK menyerah setelah ~10 detik; terus tunggu
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def cache_lock(cache_dir):
+    held = _held_locks.__dict__.setdefault('dirs', {})
+    if cache_dir in held:
+        held[cache_dir] += 1
+        try:
+            yield
+        finally:
+            held[cache_dir] -= 1
+        return
+    try:
+        f = open(os.path.join(cache_dir, LOCK_NAME), 'a+b')
+    except OSError:
+        f = None
+    if f is None:
+        yield  # Folder hanya-baca: tidak ada yang bisa menulis, jadi kunci tidak dibutuhkan
+        return
+    with f:
+        _lock_file(f)
+        held[cache_dir] = 1
+        try:
+            yield
+        finally:
+            del held[cache_dir]
+            _unlock_file(f)
+
+
+def _read_manifest(cache_dir):
+    if cache_dir in _DISABLED_CACHE_DIRS:
+        return None  # isi folder mungkin usang (gagal diperbarui); abaikan seluruhnya
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(cache_dir, manifest):
+    path = os.path.join(cache_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _snapshot_name(source, pipeline):
+    return f"{SNAPSHOT_PREFIX}-{source['sha256'][:16]}-{pipeline}.parquet"
+
+
+def read_snapshot(snapshot_path):
+    # memory_map=True: file dipetakan ke memori, tidak ada parsing CSV sama sekali
+    with instrumentation.stage('baca_snapshot') as record:
+        df = pq.read_table(snapshot_path, memory_map=True).to_pandas()
+        record['rows'] = len(df)
+    return df
+
+
+def write_snapshot(df, snapshot_path):
+    tmp_path = snapshot_path + '.tmp'
+    with instrumentation.stage('tulis_snapshot', rows=len(df)):
+        df.to_parquet(tmp_path, index=False, engine='pyarrow')
+    os.replace(tmp_path, snapshot_path)
+
+
+def _remove_stale_snapshots(cache_dir, keep_name):
+    for name in os.listdir(cache_dir):
+        if name.startswith(SNAPSHOT_PREFIX) and name != keep_name:
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+
+def read_memory_report(cache_dir):
+    # Laporan byte per kolom (sebelum/sesudah dipadatkan) dari build snapshot terakhir
+    manifest = _read_manifest(cache_dir) if cache_dir else None
+    if not manifest or 'memory_report' not in manifest:
+        return None
+    return pd.DataFrame(manifest['memory_report'])
+
+
+def read_timestamp_stats(cache_dir):
+    # Jumlah baris, string unik, baris jalur fallback & baris gagal (NaT) per kolom tanggal,
+    # dijumlahkan atas snapshot dasar dan semua partisi tambahan
+    manifest = _read_manifest(cache_dir) if cache_dir else None
+    if not manifest or 'timestamp_stats' not in manifest:
+        return None
+    stats = pd.DataFrame(manifest['timestamp_stats']).T
+    for partition in manifest.get('partitions', []):
+        if partition.get('timestamp_stats'):
+            stats = stats.add(pd.DataFrame(partition['timestamp_stats']).T, fill_value=0)
+    return stats.reindex(columns=TIMESTAMP_STATS)
+
+
+def read_partitions(cache_dir):
+    # Daftar partisi tambahan: file ekspor asal, baris yang masuk, dan baris duplikat yang dibuang
+    manifest = _read_manifest(cache_dir) if cache_dir else None
+    if not manifest or not manifest.get('partitions'):
+        return None
+    return pd.DataFrame([{
+        'ekspor': os.path.basename(p['source']['path']),
+        'baris_baru': p['rows'],
+        'duplikat_dibuang': p['duplicates'],
+        'file': p['file'],
+    } for p in manifest['partitions']])
+
+
+def _partition_paths(cache_dir, manifest):
+    # File Parquet penyusun dataset: snapshot dasar lalu partisi tambahan sesuai urutan append
+    if not manifest or not manifest.get('snapshot'):
+        return []
+    paths = [os.path.join(cache_dir, manifest['snapshot'])]
+    paths += [os.path.join(cache_dir, PARTITIONS_DIR, p['file']) for p in manifest.get('partitions', []) if p.get('file')]
+    return paths
+
+
+def dataset_partitions(cache_dir):
+    return _partition_paths(cache_dir, _read_manifest(cache_dir)) if cache_dir else []
+
+
+def dataset_version(file_path, cache_dir=None):
+    # Identitas isi dataset yang sedang dimuat: nama snapshot (hash sumber + versi pipeline)
+    # ditambah daftar partisinya, atau ukuran & mtime file bila tidak memakai cache di disk
+    manifest = _read_manifest(cache_dir) if cache_dir else None
+    if manifest and manifest.get('snapshot'):
+        files = [p['file'] for p in manifest.get('partitions', []) if p.get('file')]
+        if not files:
+            return manifest['snapshot']
+        digest = hashlib.sha256('\n'.join(files).encode('utf-8')).hexdigest()[:16]
+        return f"{manifest['snapshot']}+{len(files)}-{digest}"
+    stat = os.stat(file_path)
+    return f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}:{pipeline_fingerprint()}"
+
+
+def _ensure_snapshot(file_path, cache_dir, chunk_size=None, force=False):
+    # Pastikan snapshot dasar cocok dengan CSV & pipeline saat ini.
+    # Hasil: (manifest, df_merged) -- df_merged None bila snapshot lama masih berlaku.
+    manifest = _read_manifest(cache_dir) or {}
+    source = source_fingerprint(file_path, previous=manifest.get('source'))
+    pipeline = pipeline_fingerprint()
+    snapshot_name = _snapshot_name(source, pipeline)
+    snapshot_path = os.path.join(cache_dir, snapshot_name)
+
+    if not force and manifest.get('snapshot') == snapshot_name and os.path.exists(snapshot_path):
+        if manifest.get('source') != source:
+            # Isi file sama (hash cocok), hanya mtime yang berubah: cukup perbarui manifest
+            manifest['source'] = source
+            try:
+                _write_manifest(cache_dir, manifest)
+            except OSError as e:
+                disable_cache_dir(cache_dir, e)
+        return manifest, None
+
+    df_merged, report, timestamp_stats = build_merged(file_path, chunk_size=chunk_size, with_report=True)
+    # Snapshot dasar baru: partisi lama (dibangun di atas dasar/pipeline lama) dibuang dan
+    # akan ditambahkan ulang dari file ekspornya oleh sync_exports()
+    manifest = {
+        'snapshot': snapshot_name,
+        'source': source,
+        'pipeline': pipeline,
+        'rows': len(df_merged),
+        'memory_report': report.to_dict('records'),
+        'timestamp_stats': timestamp_stats,
+        'partitions': [],
+    }
+    try:
+        write_snapshot(df_merged, snapshot_path)
+        _write_line_keys(cache_dir, line_keys(df_merged))
+        _write_manifest(cache_dir, manifest)
+        _remove_stale_snapshots(cache_dir, snapshot_name)
+        _remove_stale_partitions(cache_dir, manifest)
+    except OSError as e:
+        # Cache hanya optimasi; kegagalan menulis tidak boleh menghentikan dashboard
+        disable_cache_dir(cache_dir, e)
+    return manifest, df_merged
+
+
+def sort_by_created_at(df):
+    # Gabungan partisi tetap harus terurut menurut created_at (NaT di akhir) untuk FilterIndex;
+    # ekspor harian biasanya sudah berada di akhir, jadi pengurutan ulang jarang dibutuhkan
+    created_ns = df['created_at'].to_numpy().view('int64').copy()
+    created_ns[df['created_at'].isna().to_numpy()] = np.iinfo('int64').max
+    if len(created_ns) and np.any(np.diff(created_ns) < 0):
+        df = df.take(np.argsort(created_ns, kind='stable')).reset_index(drop=True)
+    return df
+
+
+def load_processed_data(file_path, cache_dir=None, chunk_size=None):
+    cache_dir = usable_cache_dir(cache_dir)
+    if cache_dir is None:
+        return build_merged(file_path, chunk_size=chunk_size)
+
+    with cache_lock(cache_dir):
+        manifest, df_merged = _ensure_snapshot(file_path, cache_dir, chunk_size=chunk_size)
+        if df_merged is None:
+            try:
+                df_merged = read_snapshot(os.path.join(cache_dir, manifest['snapshot']))
+            except Exception:
+                # Snapshot rusak -> bangun ulang
+                manifest, df_merged = _ensure_snapshot(file_path, cache_dir, chunk_size=chunk_size, force=True)
+        return _with_partitions(df_merged, cache_dir, manifest)
+
+
+def _with_partitions(df_merged, cache_dir, manifest):
+    # Snapshot dasar + semua partisi tambahan (dibaca di bawah kunci yang sama dengan manifest)
+    partitions = [read_snapshot(path) for path in _partition_paths(cache_dir, manifest)[1:]]
+    if not partitions:
+        return df_merged
+    return sort_by_created_at(concat_frames([df_merged] + partitions))
+
+
+# --- Partisi Tambahan: Ekspor Baru tanpa Memproses Ulang Riwayat ---
+# Ekspor harian/mingguan dibersihkan & digabung dengan aturan yang sama (build_merged), lalu
+# baris item yang kunci (increment_id, item_id)-nya sudah ada di dataset dibuang. Sisanya
+# disimpan sebagai partisi Parquet tersendiri. Kunci baris yang sudah ada disimpan terurut di
+# LINE_KEYS_NAME, sehingga de-duplikasi tidak perlu membaca riwayat sama sekali.
+def line_keys(df):
+    keys = pd.DataFrame({
+        'increment_id': df['increment_id'].astype(object).to_numpy(),
+        'item_id': df['item_id'].astype('int64').to_numpy(),
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def _write_line_keys(cache_dir, keys):
+    path = os.path.join(cache_dir, LINE_KEYS_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.unique(keys))
+    os.replace(tmp_path, path)
+
+
+def _read_line_keys(cache_dir, manifest):
+    try:
+        return np.load(os.path.join(cache_dir, LINE_KEYS_NAME))
+    except (OSError, ValueError):
+        # File kunci hilang/rusak: hitung ulang sekali dari semua partisi
+        return np.unique(np.concatenate([line_keys(read_snapshot(path)) for path in _partition_paths(cache_dir, manifest)]))
+
+
+def _remove_stale_partitions(cache_dir, manifest):
+    keep = {p['file'] for p in manifest.get('partitions', []) if p.get('file')}
+    partitions_dir = os.path.join(cache_dir, PARTITIONS_DIR)
+    if not os.path.isdir(partitions_dir):
+        return
+    for name in os.listdir(partitions_dir):
+        if name not in keep:
+            try:
+                os.remove(os.path.join(partitions_dir, name))
+            except OSError:
+                pass
+
+
+def append_export(export_path, cache_dir, chunk_size=None):
+    # Tambahkan satu file ekspor sebagai partisi baru; biayanya sebanding dengan ukuran ekspor.
+    # Mengembalikan entri partisi, atau None bila isi file ini sudah pernah ditambahkan.
+    with cache_lock(cache_dir):
+        return _append_export(export_path, cache_dir, chunk_size=chunk_size)
+
+
+def _append_export(export_path, cache_dir, chunk_size=None):
+    # Dipanggil di bawah cache_lock: manifest dibaca ulang setelah kunci didapat
+    manifest = _read_manifest(cache_dir)
+    if not manifest or not manifest.get('snapshot'):
+        raise ValueError("Snapshot dasar belum ada; muat dataset utama terlebih dahulu.")
+    partitions = manifest.setdefault('partitions', [])
+    path = os.path.abspath(export_path)
+    previous = next((p['source'] for p in partitions if p['source']['path'] == path), None)
+    source = source_fingerprint(export_path, previous=previous)
+    if any(p['source']['sha256'] == source['sha256'] for p in partitions):
+        if previous is not None and previous != source:
+            previous.update(source)  # Hanya mtime yang berubah
+            _write_manifest(cache_dir, manifest)
+        return None
+
+    pipeline = pipeline_fingerprint()
+    batch, _, timestamp_stats = build_merged(export_path, chunk_size=chunk_size, with_report=True)
+    existing = _read_line_keys(cache_dir, manifest)
+    keys = line_keys(batch)
+    if len(existing):
+        found = existing[np.minimum(np.searchsorted(existing, keys), len(existing) - 1)] == keys
+    else:
+        found = np.zeros(len(keys), dtype=bool)
+    batch = batch[~found].reset_index(drop=True)
+
+    entry = {
+        'source': source,
+        'pipeline': pipeline,
+        'rows': len(batch),
+        'duplicates': int(found.sum()),
+        'timestamp_stats': timestamp_stats,
+        'file': None,
+    }
+    if len(batch):
+        entry['file'] = f"{PARTITION_PREFIX}-{source['sha256'][:16]}-{pipeline}.parquet"
+        os.makedirs(os.path.join(cache_dir, PARTITIONS_DIR), exist_ok=True)
+        write_snapshot(batch, os.path.join(cache_dir, PARTITIONS_DIR, entry['file']))
+        _write_line_keys(cache_dir, np.concatenate([existing, keys[~found]]))
+    partitions.append(entry)
+    _write_manifest(cache_dir, manifest)
+    return entry
+
+
+def sync_exports(exports_dir, cache_dir, chunk_size=None):
+    # Tambahkan setiap CSV di exports_dir yang belum menjadi partisi (urut nama file)
+    if not exports_dir or not os.path.isdir(exports_dir):
+        return []
+    appended = []
+    with cache_lock(cache_dir):
+        for name in sorted(os.listdir(exports_dir)):
+            if name.lower().endswith('.csv'):
+                entry = append_export(os.path.join(exports_dir, name), cache_dir, chunk_size=chunk_size)
+                if entry is not None:
+                    appended.append(entry)
+    return appended
+
+
+def _dataset_current(file_path, cache_dir, exports_dir):
+    # Pemeriksaan tanpa kunci: manifest sudah mencakup CSV utama (stat & pipeline sama) dan
+    # setiap ekspor di exports_dir. Bila ragu, jawab False; jalur berkunci memeriksa ulang.
+    manifest = _read_manifest(cache_dir)
+    if not manifest or not manifest.get('snapshot') or not _same_stat(file_path, manifest.get('source')):
+        return False
+    if manifest['snapshot'] != _snapshot_name(manifest['source'], pipeline_fingerprint()):
+        return False
+    if not all(os.path.exists(path) for path in _partition_paths(cache_dir, manifest)):
+        return False
+    if exports_dir and os.path.isdir(exports_dir):
+        known = {p['source']['path']: p['source'] for p in manifest.get('partitions', [])}
+        for name in os.listdir(exports_dir):
+            path = os.path.join(exports_dir, name)
+            if name.lower().endswith('.csv') and not _same_stat(path, known.get(os.path.abspath(path))):
+                return False
+    return True
+
+
+def prepare_dataset(file_path, cache_dir, chunk_size=None, exports_dir=None, with_frame=False):
+    # Dipanggil setiap rerun (murah bila tidak ada yang berubah): memastikan snapshot dasar,
+    # menambahkan ekspor baru sebagai partisi, lalu mengembalikan versi dataset terkini.
+    # Kunci hanya diambil bila ada yang perlu dibangun/ditambahkan, sehingga rerun sesi lain
+    # tidak menunggu selama satu sesi membangun ulang snapshot atau menambahkan ekspor.
+    # with_frame=True: juga kembalikan dataset lengkap bila snapshot baru saja dibangun (None
+    # bila tidak), agar pemanggil tidak membaca ulang snapshot yang sama dari disk.
+    version, df_merged = _prepare_dataset(file_path, cache_dir, chunk_size=chunk_size, exports_dir=exports_dir,
+                                          with_frame=with_frame)
+    if with_frame:
+        return version, df_merged
+    return version
+
+
+def _prepare_dataset(file_path, cache_dir, chunk_size=None, exports_dir=None, with_frame=False):
+    cache_dir = usable_cache_dir(cache_dir)
+    if cache_dir is None:
+        return dataset_version(file_path), None
+    if _dataset_current(file_path, cache_dir, exports_dir):
+        return dataset_version(file_path, cache_dir), None
+    with cache_lock(cache_dir):
+        manifest, df_merged = _ensure_snapshot(file_path, cache_dir, chunk_size=chunk_size)
+        if usable_cache_dir(cache_dir) is None:
+            return dataset_version(file_path), df_merged  # snapshot gagal ditulis barusan
+        sync_exports(exports_dir, cache_dir, chunk_size=chunk_size)
+        if with_frame and df_merged is not None:
+            df_merged = _with_partitions(df_merged, cache_dir, _read_manifest(cache_dir))
+        return dataset_version(file_path, cache_dir), df_merged
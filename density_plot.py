@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# --- Agregasi Kepadatan di Server untuk Scatter Harga vs Diskon ---
+# Alih-alih mengirim setiap baris item ke browser, titik dikelompokkan ke grid 2D
+# (bins x bins) per kategori. Ukuran payload hanya bergantung pada jumlah bin & kategori,
+# bukan jumlah baris terpilih. Untuk detail saat hover, sampel acak berlapis (stratified)
+# dengan batas per kategori ikut disertakan.
+
+DEFAULT_BINS = 60
+DEFAULT_HOVER_SAMPLE = 200  # titik per kategori; 0 = tanpa sampel hover
+DEFAULT_CLIP_QUANTILE = 0.99  # sumbu dibatasi ke kuantil ini, seperti range_x/range_y sebelumnya
+
+
+def axis_limits(frame, x, y, clip_quantile=DEFAULT_CLIP_QUANTILE):
+    # Satu panggilan quantile() untuk kedua sumbu; batas 0/NaN diganti 1 agar grid tetap valid
+    limits = frame[[x, y]].quantile(clip_quantile)
+    return tuple(float(v) if pd.notna(v) and v > 0 else 1.0 for v in (limits[x], limits[y]))
+
+
+def stratified_sample(frame, category, cap, seed=0):
+    # Maksimal `cap` baris acak per kategori; seed tetap agar rerun menampilkan titik yang sama
+    if cap <= 0 or frame.empty:
+        return frame.iloc[0:0]
+    shuffled = frame.iloc[np.random.default_rng(seed).permutation(len(frame))]
+    rank = shuffled.groupby(category, observed=True).cumcount().to_numpy()
+    return shuffled[rank < cap]
+
+
+class DensityGrid:
+    def __init__(self, counts, categories, x_edges, y_edges, sample):
+        self.counts = counts  # (kategori, bin y, bin x)
+        self.categories = categories
+        self.x_edges = x_edges
+        self.y_edges = y_edges
+        self.sample = sample
+
+    @classmethod
+    def build(cls, frame, x, y, category, hover_columns=(), bins=DEFAULT_BINS,
+              sample_per_category=DEFAULT_HOVER_SAMPLE, clip_quantile=DEFAULT_CLIP_QUANTILE, limits=None):
+        # limits: batas sumbu yang sudah dihitung (mis. dari sketsa kuantil); None = hitung dari frame
+        x_max, y_max = limits if limits is not None else axis_limits(frame, x, y, clip_quantile)
+        x_values = frame[x].to_numpy(dtype='float64')
+        y_values = frame[y].to_numpy(dtype='float64')
+        codes, categories = pd.factorize(frame[category], sort=True)
+        # Titik di luar rentang sumbu (atau NaN) memang tidak terlihat pada grafik lama
+        inside = (codes >= 0) & (x_values >= 0) & (x_values <= x_max) & (y_values >= 0) & (y_values <= y_max)
+        x_bin = np.minimum((x_values[inside] / x_max * bins).astype(np.int64), bins - 1)
+        y_bin = np.minimum((y_values[inside] / y_max * bins).astype(np.int64), bins - 1)
+        flat = (codes[inside].astype(np.int64) * bins + y_bin) * bins + x_bin
+        counts = np.bincount(flat, minlength=len(categories) * bins * bins).reshape(len(categories), bins, bins)
+        sample_columns = list(dict.fromkeys([x, y, category, *hover_columns]))
+        sample = stratified_sample(frame.loc[inside, sample_columns], category, sample_per_category)
+        return cls(counts.astype(np.int32), list(categories), np.linspace(0, x_max, bins + 1),
+                   np.linspace(0, y_max, bins + 1), sample)
+
+    @property
+    def nbytes(self):
+        return int(self.counts.nbytes + self.sample.memory_usage(deep=True).sum())
+
+    @staticmethod
+    def centers(edges):
+        return (edges[:-1] + edges[1:]) / 2
+
+    def counts_for(self, category=None):
+        # None = semua kategori dijumlahkan
+        if category is None:
+            return self.counts.sum(axis=0)
+        return self.counts[self.categories.index(category)]
+
+    def sample_for(self, category, column):
+        if category is None:
+            return self.sample
+        return self.sample[self.sample[column] == category]
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+from olap_cube import slice_cube
+
+# --- Sketsa Jumlah Unik (distinct count) per (hari x kategori) ---
+# nunique() pada increment_id / Customer ID / sku tidak bisa dijumlahkan dari kubus biasa.
+# Di sini setiap sel (hari, kategori) menyimpan himpunan id-nya sehingga gabungan untuk
+# rentang tanggal & pilihan kategori apa pun dapat dihitung tanpa menyentuh baris item.
+#
+# Mode 'exact': id padat (uint32) per sel, tersusun berurutan (CSR). Gabungan dihitung
+#   dengan bitmap boolean sebesar jumlah id unik -> hasil identik dengan nunique().
+# Mode 'hll'  : HyperLogLog dengan 2**precision register; gabungan = max per register. Register
+#   disimpan jarang (sparse) per sel -- hanya pasangan (nomor register, peringkat) yang terisi,
+#   tersusun CSR seperti mode exact -- sehingga sel kecil tidak memakan 2**precision byte dan
+#   ukuran per sel dibatasi 2**precision pasangan berapa pun jumlah id-nya.
+#   Galat baku relatif ~ 1.04 / sqrt(2**precision): precision=14 -> ~0.8%. Itu satu simpangan
+#   baku, bukan batas: sekitar 1 dari 20 hitungan meleset lebih dari 2x galat baku (~1.6%).
+
+DISTINCT_COLUMNS = ['increment_id', 'Customer ID', 'sku']
+CELL_DIMENSIONS = ['order_day', 'category_name_1']
+DEFAULT_HLL_PRECISION = 14
+
+
+def hll_standard_error(precision):
+    return 1.04 / np.sqrt(2 ** precision)
+
+
+def _cell_codes(df_merged):
+    keys = pd.DataFrame({
+        'order_day': df_merged['created_at'].dt.normalize(),
+        'category_name_1': df_merged['category_name_1'],
+    })
+    grouped = keys.groupby(CELL_DIMENSIONS, dropna=False, sort=True, observed=True)
+    cells = grouped.size().index.to_frame(index=False)
+    return grouped.ngroup().to_numpy(), cells
+
+
+class ExactDistinct:
+    def __init__(self, offsets, ids, n_ids):
+        self.offsets = offsets
+        self.ids = ids
+        self.n_ids = n_ids
+
+    @classmethod
+    def build(cls, values, cell_codes, n_cells):
+        ids, uniques = pd.factorize(values)
+        valid = ids >= 0  # NaN tidak dihitung, sama seperti nunique()
+        n_ids = len(uniques)
+        pairs = np.unique(cell_codes[valid].astype(np.int64) * max(n_ids, 1) + ids[valid])
+        pair_cells = pairs // max(n_ids, 1)
+        offsets = np.searchsorted(pair_cells, np.arange(n_cells + 1))
+        return cls(offsets, (pairs % max(n_ids, 1)).astype(np.uint32), n_ids)
+
+    def count(self, cell_positions):
+        starts = self.offsets[cell_positions]
+        lengths = self.offsets[cell_positions + 1] - starts
+        total = lengths.sum()
+        if total == 0:
+            return 0
+        # Ambil potongan id dari setiap sel terpilih sekaligus (tanpa loop Python)
+        gather = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+        bitmap = np.zeros(self.n_ids, dtype=bool)
+        bitmap[self.ids[gather]] = True
+        return int(bitmap.sum())
+
+
+class HyperLogLogDistinct:
+    def __init__(self, offsets, registers, ranks, precision):
+        self.offsets = offsets
+        self.registers = registers  # nomor register (uint16) per pasangan, urut per sel
+        self.ranks = ranks  # peringkat terbesar (uint8) untuk register tersebut di sel itu
+        self.precision = precision
+
+    @classmethod
+    def build(cls, values, cell_codes, n_cells, precision=DEFAULT_HLL_PRECISION):
+        valid = values.notna().to_numpy()
+        hashes = pd.util.hash_array(values.to_numpy()[valid])
+        n_registers = 2 ** precision
+        bucket = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+        # Peringkat = jumlah nol di depan sisa bit + 1 (cukup 32 bit teratas dari sisa hash)
+        rest = ((hashes << np.uint64(precision)) >> np.uint64(32)).astype(np.float64)
+        rank = np.where(rest > 0, 32 - np.floor(np.log2(np.maximum(rest, 1))), 33).astype(np.uint8)
+        # Satu pasangan per (sel, register) dengan peringkat terbesar: urutkan menurut kunci lalu
+        # peringkat, ambil elemen terakhir setiap kunci
+        key = cell_codes[valid].astype(np.int64) * n_registers + bucket
+        order = np.lexsort((rank, key))
+        key, rank = key[order], rank[order]
+        last = np.append(key[1:] != key[:-1], True) if len(key) else np.zeros(0, dtype=bool)
+        key, rank = key[last], rank[last]
+        offsets = np.searchsorted(key // n_registers, np.arange(n_cells + 1))
+        return cls(offsets, (key % n_registers).astype(np.uint16), rank, precision)
+
+    def count(self, cell_positions):
+        starts = self.offsets[cell_positions]
+        lengths = self.offsets[cell_positions + 1] - starts
+        total = lengths.sum()
+        if total == 0:
+            return 0
+        gather = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+        m = 2 ** self.precision
+        merged = np.zeros(m, dtype=np.uint8)
+        np.maximum.at(merged, self.registers[gather], self.ranks[gather])
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-merged.astype(np.float64)))
+        zeros = np.count_nonzero(merged == 0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # koreksi rentang kecil (linear counting)
+        return int(round(estimate))
+
+
+class DistinctSketches:
+    def __init__(self, cells, sketches, mode):
+        self.cells = cells
+        self.sketches = sketches
+        self.mode = mode
+
+    @classmethod
+    def build(cls, df_merged, columns=DISTINCT_COLUMNS, mode='exact', precision=DEFAULT_HLL_PRECISION):
+        cell_codes, cells = _cell_codes(df_merged)
+        sketches = {}
+        for column in columns:
+            values = df_merged[column]
+            if mode == 'hll':
+                sketches[column] = HyperLogLogDistinct.build(values, cell_codes, len(cells), precision=precision)
+            else:
+                sketches[column] = ExactDistinct.build(values, cell_codes, len(cells))
+        return cls(cells, sketches, mode)
+
+    def error_bound(self):
+        # Galat baku relatif dari hitungan unik (0 untuk mode exact)
+        if self.mode == 'hll':
+            return hll_standard_error(next(iter(self.sketches.values())).precision)
+        return 0.0
+
+    def count(self, column, start_date=None, end_date=None, categories=None):
+        # Sel dipilih dengan aturan filter yang sama seperti kubus penjualan
+        selected = slice_cube(self.cells, start_date, end_date, categories)
+        return self.sketches[column].count(selected.index.to_numpy())
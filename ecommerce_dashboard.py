@@ -1,9 +1,27 @@
+import os
+import threading
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 import plotly.express as px # Import Plotly Express
+import plotly.graph_objects as go
+
+import instrumentation
+from column_stats import DEFAULT_RELATIVE_ACCURACY, ColumnStats
+from compact_layout import render_calendar_columns
+from data_export import DEFAULT_EXPORT_CHUNK_ROWS, EXPORT_FORMATS, export_tempfile
+from data_pipeline import (DEFAULT_CHUNK_SIZE, dataset_partitions, load_processed_data, prepare_dataset, read_memory_report,
+                           read_partitions, read_snapshot, read_timestamp_stats)
+from customer_summary import CustomerDaily
+from density_plot import DEFAULT_BINS, DEFAULT_HOVER_SAMPLE, DensityGrid
+from distinct_sketch import DistinctSketches
+from filter_index import FilterIndex
+from metrics_layer import FilterContext, MetricsStore, filter_key
+from olap_cube import DAY_ORDER, LINE_COUNT, build_cube, merge_cubes, slice_cube
+from report_figures import (KPI_ROW, category_items_figure, category_sales_figure, daily_sales_figure,
+                            day_of_week_sales_figure, format_kpi, hourly_sales_figure, kpi_values,
+                            monthly_sales_figure, order_status_figure, payment_method_figure, top_sku_figure)
+from shared_dataset import KEEP_VERSIONS, load_shared_dataset
+from sql_backend import DuckDBBackend, filter_presets, parity_check
 
 # --- Konfigurasi Halaman Streamlit ---
 st.set_page_config(
@@ -13,79 +31,174 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Profil instrumentasi rerun ini (waktu/baris/memori/cache per tahap); ditampilkan di panel
+# diagnostik sidebar dan ditulis ke DIAGNOSTICS_LOG di akhir skrip. start_run() mengganti
+# profil basi dari rerun sebelumnya yang terputus (st.stop / RerunException) di thread ini.
+RUN_PROFILE = instrumentation.start_run()
+
 # --- Fungsi untuk Memuat dan Memproses Data (dengan caching) ---
-@st.cache_data
-def load_and_process_data(file_path):
-    try:
-        ecommerce_df = pd.read_csv(file_path, low_memory=False)
-    except FileNotFoundError:
+# Cache di memori (st.cache_data / st.cache_resource) untuk rerun, snapshot Parquet di disk (CACHE_DIR) untuk cold start.
+# Argumen `version` hanya bagian dari kunci cache: ekspor baru (partisi baru) = versi baru,
+# sehingga semua struktur turunan ikut diperbarui tanpa memproses ulang riwayat.
+def stop_with_load_error(file_path, error):
+    if isinstance(error, FileNotFoundError):
         st.error(f"❌ **ERROR:** File tidak ditemukan di jalur: `{file_path}`")
         st.info("Pastikan Anda telah mengunggah file `Pakistan Largest Ecommerce Dataset.csv` di lokasi yang benar atau perbarui `FILE_PATH`.")
-        st.stop()
+    else:
+        st.error(f"Terjadi kesalahan saat memuat data: {error}")
+    instrumentation.finish_run()
+    st.stop()
+
+# Dijalankan setiap rerun (murah bila tidak ada perubahan): snapshot dasar + ekspor baru di EXPORTS_DIR.
+# Hasil: (versi, dataset yang baru saja dibangun atau None)
+def prepare_data_version(file_path, cache_dir=None, chunk_size=None, exports_dir=None):
+    try:
+        with instrumentation.stage('siapkan_versi_dataset'):
+            return prepare_dataset(file_path, cache_dir, chunk_size=chunk_size, exports_dir=exports_dir, with_frame=True)
+    except Exception as e:
+        stop_with_load_error(file_path, e)
+
+# Pemuat ber-cache dicatat sebagai satu tahap 'cache': hit bila hasil diambil dari cache
+# (termasuk waktu unpickle untuk st.cache_data), miss bila badan fungsinya benar-benar dijalankan
+def load_cached(loader, *args, **kwargs):
+    with instrumentation.stage(loader.__name__, 'cache', cached=True) as record:
+        result = loader(*args, **kwargs)
+        record['rows'] = len(result) if hasattr(result, '__len__') else None
+    return result
+
+# Dataset utama dipakai bersama (st.cache_resource, tanpa salinan per sesi): dengan CACHE_DIR,
+# dibuka dari file Arrow IPC bersama sebagai view read-only yang dipetakan ke memori, sehingga
+# beberapa proses worker berbagi halaman memori yang sama. Versi lama dilepas saat versi baru masuk.
+# _built_frame (tidak ikut di-hash): dataset yang baru dibangun prepare_data_version, bila ada
+@st.cache_resource(max_entries=KEEP_VERSIONS)
+def load_and_process_data(file_path, cache_dir=None, chunk_size=None, version=None, _built_frame=None):
+    instrumentation.cache_miss()
+    try:
+        if cache_dir is None:
+            return load_processed_data(file_path, chunk_size=chunk_size)
+        return load_shared_dataset(file_path, cache_dir, chunk_size=chunk_size, version=version, df_merged=_built_frame)
     except Exception as e:
-        st.error(f"Terjadi kesalahan saat memuat data: {e}")
-        st.stop()
-
-    # Membuat subset tabel-tabel berdasarkan kolom yang relevan
-    customers_df = ecommerce_df[['Customer ID', 'sales_commission_code', 'Customer Since']].drop_duplicates().copy()
-    orders_df = ecommerce_df[['increment_id', 'created_at', 'status', 'payment_method', 'grand_total', 'Customer ID']].drop_duplicates().copy()
-    products_df = ecommerce_df[['item_id', 'sku', 'category_name_1', 'price']].drop_duplicates().copy()
-    sales_df = ecommerce_df[['increment_id', 'item_id', 'qty_ordered', 'price', 'discount_amount']].drop_duplicates().copy()
-
-    # --- Pembersihan Data Esensial ---
-    orders_df['created_at'] = pd.to_datetime(orders_df['created_at'], errors='coerce')
-    orders_df['grand_total'] = pd.to_numeric(orders_df['grand_total'], errors='coerce').fillna(0)
-    orders_df['Customer ID'] = pd.to_numeric(orders_df['Customer ID'], errors='coerce').fillna(-1).astype(int)
-
-    products_df.dropna(subset=['item_id', 'sku', 'category_name_1', 'price'], inplace=True)
-    products_df['item_id'] = products_df['item_id'].astype(int)
-    products_df['price'] = pd.to_numeric(products_df['price'], errors='coerce').fillna(0)
-    products_df['sku'] = products_df['sku'].astype(str).str.upper().str.strip()
-    products_df['category_name_1'] = products_df['category_name_1'].astype(str).str.upper().str.strip().replace(r'\N', 'UNKNOWN')
-    products_df = products_df[products_df['price'] >= 0]
-
-    sales_df.dropna(subset=['increment_id', 'item_id', 'qty_ordered', 'price', 'discount_amount'], inplace=True)
-    sales_df['item_id'] = sales_df['item_id'].astype(int)
-    sales_df['qty_ordered'] = sales_df['qty_ordered'].astype(int)
-    sales_df['price'] = pd.to_numeric(sales_df['price'], errors='coerce').fillna(0)
-    sales_df['discount_amount'] = pd.to_numeric(sales_df['discount_amount'], errors='coerce').fillna(0)
-    sales_df = sales_df[sales_df['qty_ordered'] > 0]
-    sales_df = sales_df[sales_df['price'] >= 0]
-    sales_df = sales_df[sales_df['discount_amount'] >= 0]
-
-    customers_df['Customer Since'] = pd.to_datetime(customers_df['Customer Since'], errors='coerce')
-    customers_df['Customer ID'] = pd.to_numeric(customers_df['Customer ID'], errors='coerce').fillna(-1).astype(int)
-    customers_df.dropna(subset=['Customer ID'], inplace=True)
-
-    # --- Penggabungan Data ---
-    customers_orders_df = pd.merge(orders_df, customers_df, how="outer", on="Customer ID")
-    customer_order_sales_df = pd.merge(customers_orders_df, sales_df, how="inner", on="increment_id", suffixes=('_order', '_sale_item'))
-    df_merged = pd.merge(customer_order_sales_df, products_df, how="inner", on="item_id", suffixes=('_sales_detail', '_product_info'))
-
-    # Ganti nama kolom harga
-    df_merged.rename(columns={
-        'price_sales_detail': 'price_per_unit_sold',
-        'price_product_info': 'product_original_price',
-    }, inplace=True)
-
-    # Feature Engineering
-    df_merged['total_price_per_item'] = df_merged['qty_ordered'] * df_merged['price_per_unit_sold']
-    df_merged['net_item_sales'] = df_merged['total_price_per_item'] - df_merged['discount_amount']
-
-    # Menambahkan kolom waktu untuk EDA
-    df_merged['order_date'] = df_merged['created_at'].dt.date
-    df_merged['order_month'] = df_merged['created_at'].dt.to_period('M')
-    df_merged['customer_since_year'] = df_merged['created_at'].dt.year # Menggunakan created_at agar selalu ada tahunnya
-    df_merged['day_of_week'] = df_merged['created_at'].dt.day_name()
-    df_merged['hour_of_day'] = df_merged['created_at'].dt.hour
-
-    return df_merged
+        stop_with_load_error(file_path, e)
+
+# Struktur turunan hanya dibaca (tidak pernah diubah), jadi disimpan dengan st.cache_resource:
+# satu objek dipakai bersama semua sesi, tanpa salinan unpickle per pemanggilan seperti st.cache_data.
+# Kubus & ringkasan pelanggan dihitung per partisi (file Parquet tidak pernah berubah isinya),
+# lalu digabung; partisi baru hanya menambah satu perhitungan kecil
+@st.cache_resource
+def load_partition_memo():
+    return {'lock': threading.Lock(), 'results': {}}
+
+def partition_results(kind, build, partition_paths):
+    # Hasil per partisi hanya disimpan untuk partisi versi terbaru: partisi yang dipadatkan atau
+    # dihapus retensi ikut dilepas dari memori saat versi berikutnya dibangun
+    memo = load_partition_memo()
+    with memo['lock']:
+        previous = memo['results'].get(kind, {})
+    results = {path: previous[path] if path in previous else build(read_snapshot(path)) for path in partition_paths}
+    with memo['lock']:
+        memo['results'][kind] = results
+    return [results[path] for path in partition_paths]
+
+# Kubus pra-agregasi dihitung sekali per dataset; filter & grafik waktu cukup me-roll-up kubus ini
+@st.cache_resource(max_entries=KEEP_VERSIONS)
+def load_sales_cube(file_path, cache_dir=None, chunk_size=None, version=None):
+    instrumentation.cache_miss()
+    partition_paths = dataset_partitions(cache_dir)
+    if not partition_paths:
+        return build_cube(load_and_process_data(file_path, cache_dir=cache_dir, chunk_size=chunk_size, version=version))
+    return merge_cubes(partition_results('cube', build_cube, partition_paths))
+
+# Indeks filter (tanggal terurut + kode kategori) untuk memilih baris item tanpa masker penuh
+@st.cache_resource(max_entries=KEEP_VERSIONS)
+def load_filter_index(file_path, cache_dir=None, chunk_size=None, version=None):
+    instrumentation.cache_miss()
+    return FilterIndex.build(load_and_process_data(file_path, cache_dir=cache_dir, chunk_size=chunk_size, version=version))
+
+# Struktur jumlah-unik per (hari x kategori) untuk pesanan, pelanggan, dan SKU unik
+@st.cache_resource(max_entries=KEEP_VERSIONS)
+def load_distinct_sketches(file_path, cache_dir=None, chunk_size=None, version=None, mode="exact"):
+    instrumentation.cache_miss()
+    return DistinctSketches.build(load_and_process_data(file_path, cache_dir=cache_dir, chunk_size=chunk_size, version=version), mode=mode)
+
+# Ringkasan pelanggan per (hari x pelanggan x kategori) untuk Top-N, RFM, dan kohort
+@st.cache_resource(max_entries=KEEP_VERSIONS)
+def load_customer_daily(file_path, cache_dir=None, chunk_size=None, version=None):
+    instrumentation.cache_miss()
+    partition_paths = dataset_partitions(cache_dir)
+    if not partition_paths:
+        return CustomerDaily.build(load_and_process_data(file_path, cache_dir=cache_dir, chunk_size=chunk_size, version=version))
+    return CustomerDaily.merge(partition_results('customers', CustomerDaily.build, partition_paths))
+
+# Profil kolom (count/null/min/max/mean/varians + sketsa kuantil) per partisi, lalu digabung;
+# menggantikan info()/describe()/quantile() pada baris item terpilih
+@st.cache_resource(max_entries=KEEP_VERSIONS)
+def load_column_stats(file_path, cache_dir=None, chunk_size=None, version=None, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+    instrumentation.cache_miss()
+    partition_paths = dataset_partitions(cache_dir)
+    if not partition_paths:
+        return ColumnStats.build(load_and_process_data(file_path, cache_dir=cache_dir, chunk_size=chunk_size, version=version),
+                                 relative_accuracy=relative_accuracy)
+    return ColumnStats.merge(partition_results(
+        ('stats', relative_accuracy), lambda df: ColumnStats.build(df, relative_accuracy=relative_accuracy), partition_paths))
+
+# Cache agregat bernama, dipakai bersama oleh semua sesi; kuncinya menyertakan versi dataset
+@st.cache_resource
+def load_metrics_store(backend="pandas", stats_mode="sketch"):
+    instrumentation.cache_miss()
+    return MetricsStore()
+
+# Koneksi DuckDB atas file Parquet dataset (snapshot + partisi); satu per versi dataset,
+# koneksi versi yang tergeser ditutup
+@st.cache_resource(max_entries=KEEP_VERSIONS, on_release=DuckDBBackend.close)
+def load_sql_backend(cache_dir, version=None):
+    instrumentation.cache_miss()
+    partition_paths = dataset_partitions(cache_dir)
+    if not partition_paths:
+        raise ValueError("Backend 'duckdb' membutuhkan snapshot Parquet (atur CACHE_DIR).")
+    return DuckDBBackend(partition_paths)
 
 # --- Jalur File Dataset ---
 FILE_PATH = "C:/Users/ASUS/Documents/Analisis_Data/Pakistan Largest Ecommerce Dataset.csv"
+# Folder snapshot hasil olahan; dibangun ulang otomatis jika CSV atau logika pipeline berubah
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+# Folder ekspor tambahan (CSV harian/mingguan dengan kolom yang sama); setiap file baru
+# ditambahkan sebagai partisi tanpa memproses ulang FILE_PATH (butuh CACHE_DIR)
+EXPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports")
+# Ukuran chunk saat membaca CSV secara streaming (None = baca sekaligus)
+CHUNK_SIZE = DEFAULT_CHUNK_SIZE
+# Mode hitung unik: "exact" (identik dengan nunique) atau "hll" (HyperLogLog, perkiraan untuk data sangat besar)
+DISTINCT_MODE = "exact"
+# Grafik harga vs diskon: "density" (grid 2D per kategori di server, payload terbatas) atau
+# "scatter" (semua titik dikirim ke browser; hanya cocok untuk data kecil)
+SCATTER_RENDER_MODE = "density"
+DENSITY_BINS = DEFAULT_BINS # Resolusi grid per sumbu
+HOVER_SAMPLE_PER_CATEGORY = DEFAULT_HOVER_SAMPLE # Titik sampel per kategori untuk detail SKU saat hover (0 = nonaktif)
+RAW_PAGE_SIZES = [50, 100, 500] # Pilihan jumlah baris per halaman pada bagian Data Mentah
+EXPORT_CHUNK_ROWS = DEFAULT_EXPORT_CHUNK_ROWS # Baris per blok saat menulis file unduhan (memori sebanding ukuran blok)
+# Statistik kolom (profil & describe di Gambaran Umum, batas sumbu harga vs diskon):
+# "sketch" (profil per partisi yang digabung; kuantil dengan galat relatif <= STATS_RELATIVE_ACCURACY)
+# atau "exact" (dihitung ulang dari baris item terpilih, seperti info()/describe()/quantile())
+STATS_MODE = "sketch"
+STATS_RELATIVE_ACCURACY = DEFAULT_RELATIVE_ACCURACY
+# Mesin kueri untuk KPI, pilihan sidebar, dan agregasi grafik: "pandas" (kubus & struktur di memori)
+# atau "duckdb" (kueri SQL langsung ke Parquet dengan filter di WHERE; butuh paket duckdb & CACHE_DIR)
+QUERY_BACKEND = "pandas"
+# Log diagnostik per rerun (JSON lines: satu baris per komponen + ringkasan rerun); None = tanpa file log
+DIAGNOSTICS_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "diagnostics.jsonl")
 
 # Muat dan proses data
-df_merged_raw = load_and_process_data(FILE_PATH) # Menyimpan raw sebelum filter
+DATASET_VERSION, built_frame = prepare_data_version(FILE_PATH, cache_dir=CACHE_DIR, chunk_size=CHUNK_SIZE, exports_dir=EXPORTS_DIR)
+df_merged_raw = load_cached(load_and_process_data, FILE_PATH, cache_dir=CACHE_DIR, chunk_size=CHUNK_SIZE, version=DATASET_VERSION,
+                            _built_frame=built_frame) # Menyimpan raw sebelum filter
+del built_frame  # salinan di cache (atau file Arrow bersama) yang dipakai selanjutnya
+sales_cube = load_cached(load_sales_cube, FILE_PATH, cache_dir=CACHE_DIR, chunk_size=CHUNK_SIZE, version=DATASET_VERSION)
+filter_index = load_cached(load_filter_index, FILE_PATH, cache_dir=CACHE_DIR, chunk_size=CHUNK_SIZE, version=DATASET_VERSION)
+distinct_sketches = load_cached(load_distinct_sketches, FILE_PATH, cache_dir=CACHE_DIR, chunk_size=CHUNK_SIZE, version=DATASET_VERSION, mode=DISTINCT_MODE)
+customer_daily = load_cached(load_customer_daily, FILE_PATH, cache_dir=CACHE_DIR, chunk_size=CHUNK_SIZE, version=DATASET_VERSION)
+column_stats = (load_cached(load_column_stats, FILE_PATH, cache_dir=CACHE_DIR, chunk_size=CHUNK_SIZE, version=DATASET_VERSION,
+                            relative_accuracy=STATS_RELATIVE_ACCURACY) if STATS_MODE == "sketch" else None)
+metrics_store = load_cached(load_metrics_store, QUERY_BACKEND, STATS_MODE)
+sql_backend = load_cached(load_sql_backend, CACHE_DIR, version=DATASET_VERSION) if QUERY_BACKEND == "duckdb" else None
 
 # --- Judul Aplikasi Utama ---
 st.title("📈 Dashboard Analisis Penjualan E-commerce Pakistan")
@@ -98,8 +211,11 @@ Jelajahi *insight* mendalam dari data penjualan e-commerce dengan visualisasi ya
 st.sidebar.header("⚙️ Filter Data & Opsi")
 
 # Filter Tanggal
-min_date = df_merged_raw['order_date'].min()
-max_date = df_merged_raw['order_date'].max()
+if sql_backend is not None:
+    min_date, max_date = sql_backend.date_bounds()
+else:
+    min_date = sales_cube['order_day'].min().date()
+    max_date = sales_cube['order_day'].max().date()
 
 date_range = st.sidebar.date_input(
     "📅 Pilih Rentang Tanggal Pesanan:",
@@ -112,12 +228,16 @@ date_range = st.sidebar.date_input(
 # Pastikan date_range memiliki 2 elemen
 if len(date_range) == 2:
     start_date, end_date = date_range
-    df_filtered = df_merged_raw[(df_merged_raw['order_date'] >= start_date) & (df_merged_raw['order_date'] <= end_date)]
+    cube_filtered = slice_cube(sales_cube, start_date, end_date)
 else:
-    df_filtered = df_merged_raw.copy() # Jika hanya 1 tanggal dipilih atau tidak valid
+    start_date = end_date = None # Jika hanya 1 tanggal dipilih atau tidak valid
+    cube_filtered = sales_cube
 
 # Filter Kategori Produk
-all_categories = df_filtered['category_name_1'].unique().tolist()
+if sql_backend is not None:
+    all_categories = sql_backend.categories(start_date, end_date)
+else:
+    all_categories = cube_filtered['category_name_1'].unique().tolist()
 selected_categories = st.sidebar.multiselect(
     "🛒 Filter berdasarkan Kategori Produk:",
     options=all_categories,
@@ -125,399 +245,520 @@ selected_categories = st.sidebar.multiselect(
 )
 
 if selected_categories:
-    df_filtered = df_filtered[df_filtered['category_name_1'].isin(selected_categories)]
+    cube_filtered = slice_cube(cube_filtered, categories=selected_categories)
 else:
     st.sidebar.warning("Silakan pilih setidaknya satu kategori produk.")
-    df_filtered = pd.DataFrame() # Kosongkan DataFrame jika tidak ada kategori yang dipilih
+    cube_filtered = cube_filtered.iloc[0:0] # Kosongkan data jika tidak ada kategori yang dipilih
+
+# Pilihan baris item untuk filter aktif: potongan rentang tanggal + masker kategori (tanpa menyalin df)
+with instrumentation.stage('filter_baris', 'filter') as filter_record:
+    filtered_rows = filter_index.select(start_date, end_date, selected_categories)
+    filter_record['rows'] = len(filtered_rows)
+has_data = len(filtered_rows) > 0
+
+# Semua agregat dibaca lewat lapisan metrik bernama: dihitung sekali per (versi dataset, filter),
+# lalu dipakai ulang oleh tab lain dan rerun berikutnya selama filter tidak berubah
+metrics_context = FilterContext(df_merged_raw, cube_filtered, filtered_rows, distinct_sketches, customer_daily,
+                                start_date, end_date, selected_categories, sql=sql_backend, stats=column_stats)
+metrics_key = filter_key(DATASET_VERSION, start_date, end_date, selected_categories)
+
+def metric(name, **params):
+    # Hit/miss dicatat oleh MetricsStore.get (instrumentation.cache_miss) pada tahap ini
+    with instrumentation.stage(f"metrik:{name}", 'metrik', rows=len(filtered_rows), cached=True):
+        return metrics_store.get(name, metrics_key, metrics_context, **params)
+
+# Grafik Plotly: pembuatan JSON figure & pengiriman ke browser dicatat per judul grafik,
+# dengan jumlah titik sumbu x sebagai "baris"
+def plotly_chart(fig, **kwargs):
+    name = fig.layout.title.text or "tanpa judul"
+    points = sum(len(trace.x) for trace in fig.data if getattr(trace, 'x', None) is not None)
+    with instrumentation.stage(f"grafik:{name}", 'grafik', rows=points):
+        st.plotly_chart(fig, use_container_width=True, **kwargs)
+
+# Hasil backend pandas untuk filter sembarang (dipakai pemeriksaan paritas pandas vs SQL)
+def pandas_metric(name, start, end, categories):
+    context = FilterContext(df_merged_raw, slice_cube(sales_cube, start, end, categories),
+                            filter_index.select(start, end, categories), distinct_sketches, customer_daily,
+                            start, end, categories)
+    return MetricsStore().get(name, filter_key(DATASET_VERSION, start, end, categories), context)
+
+# Total ukuran penjualan untuk filter aktif, langsung dari kubus
+totals = metric('totals')
 
 # Tampilkan info filter di sidebar
-if not df_filtered.empty:
-    st.sidebar.markdown(f"**Data difilter:**")
-    st.sidebar.markdown(f"**{len(df_filtered):,}** item penjualan.")
-    st.sidebar.markdown(f"**{df_filtered['increment_id'].nunique():,}** pesanan unik.")
-    st.sidebar.markdown(f"**{df_filtered['Customer ID'].nunique():,}** pelanggan unik.")
+if has_data:
+    st.sidebar.markdown("**Data difilter:**")
+    st.sidebar.markdown(f"**{totals[LINE_COUNT]:,}** item penjualan.")
+    st.sidebar.markdown(f"**{metric('unique_orders'):,}** pesanan unik.")
+    st.sidebar.markdown(f"**{metric('unique_customers'):,}** pelanggan unik.")
+    if distinct_sketches.mode == "hll":
+        error_bound = distinct_sketches.error_bound()
+        st.sidebar.caption(f"Jumlah unik adalah perkiraan HyperLogLog (galat baku ±{error_bound:.1%}; "
+                           f"sekitar 95% hitungan berada dalam ±{2 * error_bound:.1%}).")
 else:
     st.sidebar.markdown("**Tidak ada data yang cocok dengan filter yang dipilih.**")
 
 st.sidebar.write("---")
 
+# Statistik cache lapisan metrik (semua sesi); diisi di akhir skrip setelah semua tab membaca metrik
+metrics_stats_slot = st.sidebar.empty()
+# Panel diagnostik kinerja rerun ini; diisi di akhir skrip
+diagnostics_panel = st.sidebar.expander("🩺 Diagnostik Kinerja", expanded=False)
+
 
 
 # --- Bagian Metrik Kunci (KPIs) ---
 st.header("📊  Ringkasan Performa Kunci ")
 
-if not df_filtered.empty:
+if has_data:
     # Menghitung metrik dari data yang difilter
-    total_penjualan_bersih = df_filtered['net_item_sales'].sum()
-    jumlah_pesanan_unik = df_filtered['increment_id'].nunique()
-    jumlah_pelanggan_unik = df_filtered['Customer ID'].nunique()
-    jumlah_produk_unik = df_filtered['sku'].nunique()
-    rerata_nilai_pesanan = df_filtered.groupby('increment_id')['net_item_sales'].sum().mean() if jumlah_pesanan_unik > 0 else 0
-    total_diskon_diberikan = df_filtered['discount_amount'].sum()
-    # Menghindari pembagian oleh nol jika tidak ada item terjual
-    rerata_diskon_per_item = df_filtered['discount_amount'].mean() if len(df_filtered) > 0 else 0
-    # Untuk persentase diskon, perlu total harga sebelum diskon
-    total_harga_sebelum_diskon = df_filtered['total_price_per_item'].sum()
-    persentase_diskon = (total_diskon_diberikan / total_harga_sebelum_diskon) * 100 if total_harga_sebelum_diskon > 0 else 0
-
-
-    col_kpi1, col_kpi2, col_kpi3, col_kpi4, col_kpi5 = st.columns(5)
-
-    with col_kpi1:
-        st.metric(label="💰 Total Penjualan Bersih", value=f"Rp {total_penjualan_bersih:,.0f}")
-    with col_kpi2:
-        st.metric(label="📦 Jumlah Pesanan Unik", value=f"{jumlah_pesanan_unik:,}")
-    with col_kpi3:
-        st.metric(label="🧑‍🤝‍🧑 Jumlah Pelanggan Unik", value=f"{jumlah_pelanggan_unik:,}")
-    with col_kpi4:
-        st.metric(label="🛒 Rerata Nilai Pesanan", value=f"Rp {rerata_nilai_pesanan:,.0f}")
-    with col_kpi5:
-        st.metric(label="📉 Total Diskon Diberikan", value=f"Rp {total_diskon_diberikan:,.0f}")
+    # Nilai baris KPI dihitung di report_figures (sama dengan laporan batch)
+    kpi = kpi_values(metric)
+    total_penjualan_bersih = kpi['total_penjualan_bersih']
+    rerata_nilai_pesanan = kpi['rerata_nilai_pesanan']
+
+
+    kpi_columns = st.columns(len(KPI_ROW))
+    for col_kpi, (label, value) in zip(kpi_columns, format_kpi(kpi)):
+        with col_kpi:
+            st.metric(label=label, value=value)
 
 else:
     st.warning("Tidak ada data untuk menampilkan metrik. Sesuaikan filter Anda.")
 
 st.write("---") # Garis pemisah visual
 
-# --- Struktur Dashboard dengan Tabs ---
-if not df_filtered.empty:
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-        "💡 Gambaran Umum Data",
-        "🧑‍🤝‍🧑 Analisis Pelanggan",
-        "📦 Analisis Pesanan",
-        "🏷️ Analisis Produk",
-        "🔗 Hubungan Variabel",
-        # "📄 Data Mentah",
-        "❓ Wawasan Cepat & FAQ"
-    ])
-
-    with tab1:
-        st.header("💡 Gambaran Umum Data")
-        st.markdown("Berikut adalah beberapa baris pertama dan ringkasan statistik dari DataFrame gabungan.")
-
-        st.subheader("Data Gabungan (`df_merged.head()`)")
-        st.dataframe(df_filtered.head(10)) # Menampilkan 10 baris pertama
-
-        with st.expander("Lihat Informasi Lengkap DataFrame (`df_merged.info()`)"):
-            # info() tidak mengembalikan DataFrame, jadi kita tangkap outputnya
-            import io
-            buffer = io.StringIO()
-            df_filtered.info(buf=buffer)
-            s = buffer.getvalue()
-            st.text(s)
-
-        with st.expander("Lihat Statistik Deskriptif (`df_merged.describe()`)"):
-            st.dataframe(df_filtered.describe())
-
-    with tab2:
-        st.header("🧑‍🤝‍🧑 Analisis Pelanggan")
-        st.markdown("Menganalisis karakteristik pelanggan dan mengidentifikasi pelanggan paling berharga.")
-
-        st.subheader("Distribusi Tahun Customer Sejak Bergabung")
-        # Mengubah ke Plotly Express
-        customer_since_counts = df_filtered['customer_since_year'].value_counts().sort_index().reset_index()
-        customer_since_counts.columns = ['Tahun Bergabung', 'Jumlah Pesanan']
-        fig = px.bar(customer_since_counts, x='Tahun Bergabung', y='Jumlah Pesanan',
-                     title='Distribusi Tahun Customer Sejak Bergabung',
-                     color_discrete_sequence=px.colors.sequential.Viridis,
-                     labels={'Tahun Bergabung': 'Tahun Bergabung Customer', 'Jumlah Pesanan': 'Jumlah Pesanan'})
-        fig.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(fig, use_container_width=True)
-        with st.expander("📝 Penjelasan Grafik: Distribusi Tahun Bergabung"):
+# --- Bagian Analisis (dirender malas) ---
+# Setiap bagian adalah fungsi; hanya bagian yang sedang dipilih yang dihitung & dirender.
+# Agregatnya dibaca dari lapisan metrik, sehingga membuka kembali bagian yang sama
+# (dengan filter yang sama) langsung memakai hasil yang tersimpan.
+
+def render_overview():
+    st.header("💡 Gambaran Umum Data")
+    st.markdown("Berikut adalah beberapa baris pertama dan ringkasan statistik dari DataFrame gabungan.")
+
+    st.subheader("Data Gabungan (`df_merged.head()`)")
+    st.dataframe(render_calendar_columns(filtered_rows.head(df_merged_raw, 10))) # Menampilkan 10 baris pertama
+
+    with st.expander("Lihat Profil Kolom (tipe, nilai terisi/kosong, min/max/mean/std)"):
+        st.dataframe(metric('column_profile'))
+
+    with st.expander("Lihat Statistik Deskriptif (`df_merged.describe()`)"):
+        st.dataframe(metric('describe'))
+        if column_stats is not None:
+            st.caption(f"Kuantil kolom desimal diperkirakan dari sketsa (galat relatif ≤ {STATS_RELATIVE_ACCURACY:.0%}); "
+                       "count, min, max, mean, std, serta kuantil tanggal & kode bulat bernilai eksak. "
+                       "Atur STATS_MODE = \"exact\" untuk menghitung ulang dari baris item.")
+
+    with st.expander("Lihat Laporan Memori per Kolom (sebelum/sesudah dipadatkan)"):
+        memory_report_df = read_memory_report(CACHE_DIR)
+        if memory_report_df is not None:
+            st.dataframe(memory_report_df)
+            st.caption(f"Total: {memory_report_df['bytes_sebelum'].sum() / 1e6:,.1f} MB → {memory_report_df['bytes_sesudah'].sum() / 1e6:,.1f} MB. Total KPI diverifikasi identik saat snapshot dibangun.")
+        else:
+            st.caption("Laporan memori tersedia setelah snapshot data dibangun di CACHE_DIR.")
+
+    with st.expander("Lihat Ringkasan Parsing Tanggal (baris gagal/fallback)"):
+        timestamp_stats_df = read_timestamp_stats(CACHE_DIR)
+        if timestamp_stats_df is not None:
+            st.dataframe(timestamp_stats_df)
+            st.caption("'gagal' = teks tanggal yang tidak dapat diparsing dan menjadi NaT; 'fallback' = baris yang tidak cocok dengan format tetap dan diparsing dengan inferensi.")
+        else:
+            st.caption("Ringkasan parsing tersedia setelah snapshot data dibangun di CACHE_DIR.")
+
+    with st.expander("Lihat Partisi Data (ekspor tambahan di EXPORTS_DIR)"):
+        partitions_df = read_partitions(CACHE_DIR)
+        if partitions_df is not None:
+            st.dataframe(partitions_df)
+        else:
+            st.caption("Belum ada ekspor tambahan. Letakkan file CSV baru di EXPORTS_DIR untuk menambahkannya sebagai partisi.")
+
+    if sql_backend is not None:
+        with st.expander("Periksa Paritas Backend (pandas vs DuckDB)"):
+            if st.button("Jalankan pemeriksaan paritas"):
+                parity_df = parity_check(sql_backend, pandas_metric, filter_presets(min_date, max_date, all_categories))
+                st.dataframe(parity_df)
+                if parity_df['sama'].all():
+                    st.success("Semua metrik identik untuk setiap preset filter.")
+                else:
+                    st.error(f"{(~parity_df['sama']).sum()} metrik berbeda antara pandas dan DuckDB.")
+
+def render_customers():
+    st.header("🧑‍🤝‍🧑 Analisis Pelanggan")
+    st.markdown("Menganalisis karakteristik pelanggan dan mengidentifikasi pelanggan paling berharga.")
+
+    st.subheader("Distribusi Tahun Customer Sejak Bergabung")
+    # Pelanggan unik (bukan baris item) yang aktif dalam filter, menurut tahun pesanan pertamanya
+    customer_since_counts = metric('customers_by_first_year').reset_index()
+    customer_since_counts.columns = ['Tahun Bergabung', 'Jumlah Pelanggan']
+    fig = px.bar(customer_since_counts, x='Tahun Bergabung', y='Jumlah Pelanggan',
+                 title='Distribusi Tahun Customer Sejak Bergabung',
+                 color_discrete_sequence=px.colors.sequential.Viridis,
+                 labels={'Tahun Bergabung': 'Tahun Bergabung Customer', 'Jumlah Pelanggan': 'Jumlah Pelanggan'})
+    fig.update_layout(xaxis_tickangle=-45)
+    plotly_chart(fig)
+    with st.expander("📝 Penjelasan Grafik: Distribusi Tahun Bergabung"):
+        st.markdown("""
+        Grafik batang ini menunjukkan sebaran tahun di mana pelanggan pertama kali melakukan pesanan.
+        Setiap pelanggan yang aktif pada filter saat ini dihitung satu kali, menurut tahun pesanan pertamanya di seluruh data.
+        **Insight:** Perhatikan tahun-tahun dengan jumlah pelanggan tertinggi untuk memahami periode pertumbuhan pelanggan yang signifikan.
+        """)
+
+    st.subheader("Top 10 Pelanggan (Berdasarkan Penjualan Bersih)")
+    top_customers = metric('top_customers')
+    # Mengubah ke Plotly Express
+    top_customers_df = top_customers.reset_index()
+    top_customers_df.columns = ['Customer ID', 'Total Penjualan Bersih (Rp)']
+    fig_top_cust = px.bar(top_customers_df, x='Total Penjualan Bersih (Rp)', y='Customer ID', orientation='h',
+                          title='Top 10 Pelanggan (Berdasarkan Penjualan Bersih)',
+                          color_discrete_sequence=px.colors.sequential.YlOrRd,
+                          labels={'Total Penjualan Bersih (Rp)': 'Total Penjualan Bersih (Rp)'})
+    fig_top_cust.update_layout(yaxis={'categoryorder':'total ascending'})
+    plotly_chart(fig_top_cust)
+    with st.expander("📝 Penjelasan Grafik: Top 10 Pelanggan"):
+        st.markdown("""
+        Grafik ini menampilkan 10 ID pelanggan dengan kontribusi penjualan bersih tertinggi.
+        **Insight:** Identifikasi pelanggan paling berharga Anda. Anda dapat menggunakan informasi ini untuk program loyalitas atau strategi pemasaran yang ditargetkan.
+        """)
+
+    st.subheader("Segmentasi RFM (Recency, Frequency, Monetary)")
+    customer_rfm = metric('customer_rfm')
+    rfm_segments = customer_rfm.groupby('segmen').agg(
+        jumlah_pelanggan=('nilai', 'size'), total_penjualan=('nilai', 'sum')).sort_values('total_penjualan', ascending=False).reset_index()
+    rfm_segments.columns = ['Segmen', 'Jumlah Pelanggan', 'Total Penjualan Bersih (Rp)']
+    fig_rfm = px.bar(rfm_segments, x='Segmen', y='Jumlah Pelanggan',
+                     title='Jumlah Pelanggan per Segmen RFM',
+                     hover_data=['Total Penjualan Bersih (Rp)'],
+                     color_discrete_sequence=px.colors.sequential.Tealgrn)
+    plotly_chart(fig_rfm)
+    with st.expander("📝 Penjelasan Grafik: Segmentasi RFM"):
+        st.markdown("""
+        Setiap pelanggan diberi skor 1-5 untuk *recency* (hari sejak pesanan terakhir hingga akhir rentang tanggal),
+        *frequency* (jumlah pesanan), dan *monetary* (penjualan bersih), lalu dikelompokkan menjadi segmen.
+        **Insight:** Segmen *Champions* dan *Loyal* layak dipertahankan; *Berisiko* dan *Hilang* adalah target kampanye reaktivasi.
+        """)
+
+    st.subheader("Kohort Pelanggan (Bulan Pesanan Pertama)")
+    cohort_table = metric('customer_cohorts')
+    fig_cohort = px.imshow(cohort_table, aspect='auto', color_continuous_scale='Blues',
+                           labels={'x': 'Bulan ke- sejak pesanan pertama', 'y': 'Bulan Kohort', 'color': 'Pelanggan Aktif'},
+                           title='Pelanggan Aktif per Kohort')
+    plotly_chart(fig_cohort)
+    with st.expander("📝 Penjelasan Grafik: Kohort Pelanggan"):
+        st.markdown("""
+        Baris adalah bulan pesanan pertama pelanggan, kolom adalah jumlah bulan sejak itu, dan warnanya adalah
+        jumlah pelanggan kohort tersebut yang kembali memesan dalam filter saat ini.
+        **Insight:** Penurunan yang cepat di sepanjang baris menandakan retensi yang rendah.
+        """)
+
+
+def render_orders():
+    st.header("📦 Analisis Pesanan")
+    st.markdown("Menggali wawasan tentang status pesanan, metode pembayaran, dan tren penjualan dari waktu ke waktu.")
+
+    col_order_dist1, col_order_dist2 = st.columns(2)
+    with col_order_dist1:
+        st.subheader("Distribusi Status Pesanan")
+        plotly_chart(order_status_figure(metric))
+        with st.expander("📝 Penjelasan Grafik: Distribusi Status Pesanan"):
             st.markdown("""
-            Grafik batang ini menunjukkan sebaran tahun di mana pelanggan pertama kali melakukan pesanan.
-            Anda dapat melihat seberapa banyak aktivitas pesanan yang berasal dari pelanggan yang bergabung pada tahun tertentu.
-            **Insight:** Perhatikan tahun-tahun dengan jumlah pesanan tertinggi untuk memahami periode pertumbuhan pelanggan yang signifikan.
+            Diagram lingkaran ini menunjukkan proporsi item pesanan berdasarkan statusnya (misalnya, `complete`, `pending`, `canceled`).
+            **Insight:** Ini membantu Anda memahami efisiensi pemrosesan pesanan dan area mana yang mungkin memerlukan perhatian (misalnya, banyak pesanan `pending` atau `canceled`).
             """)
 
-        st.subheader("Top 10 Pelanggan (Berdasarkan Penjualan Bersih)")
-        top_customers = df_filtered.groupby('Customer ID')['net_item_sales'].sum().sort_values(ascending=False).head(10)
-        # Mengubah ke Plotly Express
-        top_customers_df = top_customers.reset_index()
-        top_customers_df.columns = ['Customer ID', 'Total Penjualan Bersih (Rp)']
-        fig_top_cust = px.bar(top_customers_df, x='Total Penjualan Bersih (Rp)', y='Customer ID', orientation='h',
-                              title='Top 10 Pelanggan (Berdasarkan Penjualan Bersih)',
-                              color_discrete_sequence=px.colors.sequential.YlOrRd,
-                              labels={'Total Penjualan Bersih (Rp)': 'Total Penjualan Bersih (Rp)'})
-        fig_top_cust.update_layout(yaxis={'categoryorder':'total ascending'})
-        st.plotly_chart(fig_top_cust, use_container_width=True)
-        with st.expander("📝 Penjelasan Grafik: Top 10 Pelanggan"):
+    with col_order_dist2:
+        st.subheader("Distribusi Metode Pembayaran")
+        plotly_chart(payment_method_figure(metric))
+        with st.expander("📝 Penjelasan Grafik: Distribusi Metode Pembayaran"):
             st.markdown("""
-            Grafik ini menampilkan 10 ID pelanggan dengan kontribusi penjualan bersih tertinggi.
-            **Insight:** Identifikasi pelanggan paling berharga Anda. Anda dapat menggunakan informasi ini untuk program loyalitas atau strategi pemasaran yang ditargetkan.
+            Grafik batang ini menampilkan seberapa sering setiap metode pembayaran digunakan.
+            **Insight:** Pahami preferensi pelanggan dalam pembayaran, yang dapat memandu keputusan terkait opsi pembayaran dan promosi.
             """)
 
+    st.subheader("Tren Penjualan Bersih Seiring Waktu")
+    col_time_trend1, col_time_trend2 = st.columns(2)
+
+    with col_time_trend1:
+        plotly_chart(monthly_sales_figure(metric))
+        with st.expander("📝 Penjelasan Grafik: Tren Penjualan Bulanan"):
+            st.markdown("""
+            Grafik garis ini menunjukkan total penjualan bersih dari waktu ke waktu setiap bulannya.
+            **Insight:** Identifikasi periode puncak penjualan dan penurunan, yang penting untuk perencanaan inventaris dan kampanye pemasaran.
+            """)
 
-    with tab3:
-        st.header("📦 Analisis Pesanan")
-        st.markdown("Menggali wawasan tentang status pesanan, metode pembayaran, dan tren penjualan dari waktu ke waktu.")
-
-        col_order_dist1, col_order_dist2 = st.columns(2)
-        with col_order_dist1:
-            st.subheader("Distribusi Status Pesanan")
-            status_counts = df_filtered['status'].value_counts().reset_index()
-            status_counts.columns = ['Status Pesanan', 'Jumlah Item Pesanan']
-            fig1 = px.pie(status_counts, values='Jumlah Item Pesanan', names='Status Pesanan',
-                          title='Distribusi Status Pesanan', hole=0.3,
-                          color_discrete_sequence=px.colors.sequential.Plasma)
-            st.plotly_chart(fig1, use_container_width=True)
-            with st.expander("📝 Penjelasan Grafik: Distribusi Status Pesanan"):
-                st.markdown("""
-                Diagram lingkaran ini menunjukkan proporsi item pesanan berdasarkan statusnya (misalnya, `complete`, `pending`, `canceled`).
-                **Insight:** Ini membantu Anda memahami efisiensi pemrosesan pesanan dan area mana yang mungkin memerlukan perhatian (misalnya, banyak pesanan `pending` atau `canceled`).
-                """)
-
-        with col_order_dist2:
-            st.subheader("Distribusi Metode Pembayaran")
-            payment_counts = df_filtered['payment_method'].value_counts().reset_index()
-            payment_counts.columns = ['Metode Pembayaran', 'Jumlah Item Pesanan']
-            fig2 = px.bar(payment_counts, x='Metode Pembayaran', y='Jumlah Item Pesanan',
-                          title='Distribusi Metode Pembayaran',
-                          color_discrete_sequence=px.colors.sequential.YlGnBu)
-            st.plotly_chart(fig2, use_container_width=True)
-            with st.expander("📝 Penjelasan Grafik: Distribusi Metode Pembayaran"):
-                st.markdown("""
-                Grafik batang ini menampilkan seberapa sering setiap metode pembayaran digunakan.
-                **Insight:** Pahami preferensi pelanggan dalam pembayaran, yang dapat memandu keputusan terkait opsi pembayaran dan promosi.
-                """)
-
-        st.subheader("Tren Penjualan Bersih Seiring Waktu")
-        col_time_trend1, col_time_trend2 = st.columns(2)
-
-        with col_time_trend1:
-            monthly_net_sales = df_filtered.groupby('order_month')['net_item_sales'].sum().reset_index()
-            # KOREKSI: Konversi kolom 'order_month' (Period) menjadi string agar dapat di-serialisasi JSON
-            monthly_net_sales['order_month'] = monthly_net_sales['order_month'].astype(str)
-            monthly_net_sales.columns = ['Bulan', 'Total Penjualan Bersih (Rp)']
-            fig5 = px.line(monthly_net_sales, x='Bulan', y='Total Penjualan Bersih (Rp)',
-                           title='Tren Penjualan Bersih Bulanan',
-                           markers=True, line_shape="spline",
-                           color_discrete_sequence=['teal'])
-            fig5.update_xaxes(type='category') # Ensure months are treated as categories for ordering
-            st.plotly_chart(fig5, use_container_width=True)
-            with st.expander("📝 Penjelasan Grafik: Tren Penjualan Bulanan"):
-                st.markdown("""
-                Grafik garis ini menunjukkan total penjualan bersih dari waktu ke waktu setiap bulannya.
-                **Insight:** Identifikasi periode puncak penjualan dan penurunan, yang penting untuk perencanaan inventaris dan kampanye pemasaran.
-                """)
-
-        with col_time_trend2:
-            daily_net_sales = df_filtered.groupby(df_filtered['created_at'].dt.date)['net_item_sales'].sum().reset_index()
-            daily_net_sales.columns = ['Tanggal', 'Total Penjualan Bersih (Rp)']
-            fig6 = px.line(daily_net_sales, x='Tanggal', y='Total Penjualan Bersih (Rp)',
-                           title='Tren Penjualan Bersih Harian',
-                           line_shape="spline",
-                           color_discrete_sequence=['blue'])
-            st.plotly_chart(fig6, use_container_width=True)
-            with st.expander("📝 Penjelasan Grafik: Tren Penjualan Harian"):
-                st.markdown("""
-                Grafik garis ini menunjukkan total penjualan bersih dari waktu ke waktu setiap harinya.
-                **Insight:** Perhatikan pola penjualan harian, seperti hari-hari tertentu dalam seminggu yang menunjukkan peningkatan atau penurunan penjualan.
-                """)
-
-        st.subheader("Pola Penjualan Berdasarkan Hari & Jam")
-        col_day_hour1, col_day_hour2 = st.columns(2)
-
-        with col_day_hour1:
-            day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            sales_by_day = df_filtered.groupby('day_of_week')['net_item_sales'].sum().reindex(day_order).reset_index()
-            sales_by_day.columns = ['Hari dalam Seminggu', 'Total Penjualan Bersih (Rp)']
-            fig_day = px.bar(sales_by_day, x='Hari dalam Seminggu', y='Total Penjualan Bersih (Rp)',
-                             title='Total Penjualan Bersih per Hari dalam Seminggu',
-                             color_discrete_sequence=px.colors.sequential.Plasma)
-            st.plotly_chart(fig_day, use_container_width=True)
-            with st.expander("📝 Penjelasan Grafik: Penjualan per Hari"):
-                st.markdown("""
-                Grafik ini menunjukkan hari-hari dalam seminggu dengan penjualan bersih tertinggi.
-                **Insight:** Gunakan informasi ini untuk menjadwalkan promosi atau alokasi sumber daya pada hari-hari puncak.
-                """)
-
-        with col_day_hour2:
-            sales_by_hour = df_filtered.groupby('hour_of_day')['net_item_sales'].sum().reset_index()
-            sales_by_hour.columns = ['Jam dalam Sehari', 'Total Penjualan Bersih (Rp)']
-            fig_hour = px.line(sales_by_hour, x='Jam dalam Sehari', y='Total Penjualan Bersih (Rp)',
-                               title='Total Penjualan Bersih per Jam dalam Sehari',
-                               markers=True, line_shape="spline",
-                               color_discrete_sequence=['purple'])
-            st.plotly_chart(fig_hour, use_container_width=True)
-            with st.expander("📝 Penjelasan Grafik: Penjualan per Jam"):
-                st.markdown("""
-                Grafik ini menunjukkan jam-jam dalam sehari dengan penjualan bersih tertinggi.
-                **Insight:** Pahami kapan pelanggan paling aktif untuk mengoptimalkan kampanye iklan dan waktu operasional.
-                """)
-
-
-    with tab4:
-        st.header("🏷️ Analisis Produk")
-        st.markdown("Mengidentifikasi kategori produk paling populer dan produk terlaris berdasarkan penjualan.")
-
-        col_prod_cat1, col_prod_cat2 = st.columns(2)
-
-        with col_prod_cat1:
-            st.subheader("Top 10 Kategori Produk (Jumlah Item Terjual)")
-            top_cat_counts = df_filtered['category_name_1'].value_counts().head(10).reset_index()
-            top_cat_counts.columns = ['Kategori Produk', 'Jumlah Item Terjual']
-            fig7 = px.bar(top_cat_counts, x='Jumlah Item Terjual', y='Kategori Produk', orientation='h',
-                          title='Top 10 Kategori Produk (Jumlah Item Terjual)',
-                          color_discrete_sequence=px.colors.sequential.OrRd)
-            fig7.update_layout(yaxis={'categoryorder':'total ascending'})
-            st.plotly_chart(fig7, use_container_width=True)
-            with st.expander("📝 Penjelasan Grafik: Top Kategori (Jumlah Item)"):
-                st.markdown("""
-                Grafik ini menunjukkan kategori produk yang paling banyak terjual dalam hal jumlah item.
-                **Insight:** Ini bisa menjadi indikator popularitas atau permintaan tinggi untuk kategori tersebut.
-                """)
-
-        with col_prod_cat2:
-            st.subheader("Top 10 Kategori Produk (Total Penjualan Bersih)")
-            category_net_sales_df = df_filtered.groupby('category_name_1')['net_item_sales'].sum().sort_values(ascending=False).head(10).reset_index()
-            category_net_sales_df.columns = ['Kategori Produk', 'Total Penjualan Bersih (Rp)']
-            fig8 = px.bar(category_net_sales_df, x='Total Penjualan Bersih (Rp)', y='Kategori Produk', orientation='h',
-                          title='Top 10 Kategori Produk (Total Penjualan Bersih)',
-                          color_discrete_sequence=px.colors.sequential.YlGnBu)
-            fig8.update_layout(yaxis={'categoryorder':'total ascending'})
-            st.plotly_chart(fig8, use_container_width=True)
-            with st.expander("📝 Penjelasan Grafik: Top Kategori (Penjualan Bersih)"):
-                st.markdown("""
-                Grafik ini menampilkan kategori produk yang menghasilkan pendapatan penjualan bersih tertinggi.
-                **Insight:** Bandingkan dengan jumlah item terjual. Kategori yang memiliki penjualan bersih tinggi tetapi jumlah item terjual sedang mungkin memiliki harga produk yang lebih tinggi.
-                """)
-
-        st.subheader("Top 10 SKU Terlaris (Berdasarkan Total Penjualan Bersih)")
-        top_sku_net_sales = df_filtered.groupby('sku')['net_item_sales'].sum().sort_values(ascending=False).head(10).reset_index()
-        top_sku_net_sales.columns = ['SKU Produk', 'Total Penjualan Bersih (Rp)']
-        fig9 = px.bar(top_sku_net_sales, x='Total Penjualan Bersih (Rp)', y='SKU Produk', orientation='h',
-                      title='Top 10 Produk Terlaris (Berdasarkan Total Penjualan Bersih)',
-                      color_discrete_sequence=px.colors.sequential.Viridis)
-        fig9.update_layout(yaxis={'categoryorder':'total ascending'})
-        st.plotly_chart(fig9, use_container_width=True)
-        with st.expander("📝 Penjelasan Grafik: Top 10 SKU Terlaris"):
+    with col_time_trend2:
+        plotly_chart(daily_sales_figure(metric))
+        with st.expander("📝 Penjelasan Grafik: Tren Penjualan Harian"):
             st.markdown("""
-            Grafik ini menunjukkan produk (SKU) individual yang menghasilkan penjualan bersih tertinggi.
-            **Insight:** Identifikasi produk-produk unggulan yang dapat Anda fokuskan untuk promosi atau pengembangan produk lebih lanjut.
+            Grafik garis ini menunjukkan total penjualan bersih dari waktu ke waktu setiap harinya.
+            **Insight:** Perhatikan pola penjualan harian, seperti hari-hari tertentu dalam seminggu yang menunjukkan peningkatan atau penurunan penjualan.
             """)
 
+    st.subheader("Pola Penjualan Berdasarkan Hari & Jam")
+    col_day_hour1, col_day_hour2 = st.columns(2)
 
-    with tab5:
-        st.header("🔗 Hubungan Antar Variabel")
-        st.markdown("Mengeksplorasi potensi korelasi atau pola antara harga produk dan diskon yang diberikan.")
+    with col_day_hour1:
+        plotly_chart(day_of_week_sales_figure(metric))
+        with st.expander("📝 Penjelasan Grafik: Penjualan per Hari"):
+            st.markdown("""
+            Grafik ini menunjukkan hari-hari dalam seminggu dengan penjualan bersih tertinggi.
+            **Insight:** Gunakan informasi ini untuk menjadwalkan promosi atau alokasi sumber daya pada hari-hari puncak.
+            """)
 
-        st.subheader("Hubungan Harga Asli Produk vs. Jumlah Diskon")
-        fig10 = px.scatter(df_filtered, x='product_original_price', y='discount_amount',
-                           title='Hubungan Harga Asli Produk vs. Jumlah Diskon',
-                           color='category_name_1', # Menambahkan warna berdasarkan kategori
-                           hover_name='sku', # Menampilkan SKU saat hover
-                           opacity=0.5,
-                           labels={'product_original_price': 'Harga Asli Produk (Rp)', 'discount_amount': 'Jumlah Diskon (Rp)'},
-                           range_x=[0, df_filtered['product_original_price'].quantile(0.99)], # Batasi sumbu X
-                           range_y=[0, df_filtered['discount_amount'].quantile(0.99)]) # Batasi sumbu Y
-        st.plotly_chart(fig10, use_container_width=True)
-        with st.expander("📝 Penjelasan Grafik: Harga vs. Diskon"):
+    with col_day_hour2:
+        plotly_chart(hourly_sales_figure(metric))
+        with st.expander("📝 Penjelasan Grafik: Penjualan per Jam"):
             st.markdown("""
-            Grafik *scatter* ini memvisualisasikan hubungan antara harga asli produk dan jumlah diskon yang diberikan.
-            **Insight:** Perhatikan apakah ada tren, misalnya, produk yang lebih mahal cenderung mendapatkan diskon lebih besar.
-            Titik-titik yang berkelompok mungkin menunjukkan strategi diskon yang konsisten untuk kategori atau segmen harga tertentu.
-            Anda bisa melihat detail SKU saat mengarahkan kursor (hover) pada titik.
+            Grafik ini menunjukkan jam-jam dalam sehari dengan penjualan bersih tertinggi.
+            **Insight:** Pahami kapan pelanggan paling aktif untuk mengoptimalkan kampanye iklan dan waktu operasional.
             """)
 
-    # with tab6:
-    #     st.header("📄 Data Mentah")
-    #     st.markdown("Tinjau data penjualan gabungan yang sudah difilter, bisa mencari dan mengunduh data di sini.")
 
-    #     st.dataframe(df_filtered)
+def render_products():
+    st.header("🏷️ Analisis Produk")
+    st.markdown("Mengidentifikasi kategori produk paling populer dan produk terlaris berdasarkan penjualan.")
 
-    #     # Tombol download
-    #     @st.cache_data
-    #     def convert_df_to_csv(df):
-    #         # Cache the conversion to prevent computation on every rerun
-    #         return df.to_csv(index=False).encode('utf-8')
+    col_prod_cat1, col_prod_cat2 = st.columns(2)
 
-    #     csv = convert_df_to_csv(df_filtered)
+    with col_prod_cat1:
+        st.subheader("Top 10 Kategori Produk (Jumlah Item Terjual)")
+        plotly_chart(category_items_figure(metric))
+        with st.expander("📝 Penjelasan Grafik: Top Kategori (Jumlah Item)"):
+            st.markdown("""
+            Grafik ini menunjukkan kategori produk yang paling banyak terjual dalam hal jumlah item.
+            **Insight:** Ini bisa menjadi indikator popularitas atau permintaan tinggi untuk kategori tersebut.
+            """)
 
-    #     st.download_button(
-    #         label="Unduh Data Filtered sebagai CSV",
-    #         data=csv,
-    #         file_name="filtered_ecommerce_data.csv",
-    #         mime="text/csv",
-    #         help="Unduh data yang saat ini terlihat di tabel di atas."
-    #     )
+    with col_prod_cat2:
+        st.subheader("Top 10 Kategori Produk (Total Penjualan Bersih)")
+        plotly_chart(category_sales_figure(metric))
+        with st.expander("📝 Penjelasan Grafik: Top Kategori (Penjualan Bersih)"):
+            st.markdown("""
+            Grafik ini menampilkan kategori produk yang menghasilkan pendapatan penjualan bersih tertinggi.
+            **Insight:** Bandingkan dengan jumlah item terjual. Kategori yang memiliki penjualan bersih tinggi tetapi jumlah item terjual sedang mungkin memiliki harga produk yang lebih tinggi.
+            """)
 
-    with tab7: # TAB UNTUK WAWASAN CEPAT DAN FAQ
-        st.header("❓ Wawasan Cepat & FAQ")
+    st.subheader("Top 10 SKU Terlaris (Berdasarkan Total Penjualan Bersih)")
+    plotly_chart(top_sku_figure(metric))
+    with st.expander("📝 Penjelasan Grafik: Top 10 SKU Terlaris"):
         st.markdown("""
-        Dapatkan jawaban instan untuk pertanyaan kunci mengenai performa e-commerce Anda
-        berdasarkan data yang **sedang difilter**!
+        Grafik ini menunjukkan produk (SKU) individual yang menghasilkan penjualan bersih tertinggi.
+        **Insight:** Identifikasi produk-produk unggulan yang dapat Anda fokuskan untuk promosi atau pengembangan produk lebih lanjut.
         """)
 
-        st.subheader("🚀 Insight Utama Anda Saat Ini:")
 
-        # Pertanyaan 1: Total Penjualan Bersih
-        st.markdown(f"**1. Berapa total penjualan bersih untuk data yang difilter saat ini?**")
-        st.info(f"👉 Total Penjualan Bersih: **Rp {total_penjualan_bersih:,.0f}**")
-        st.caption("Angka ini mencerminkan pendapatan setelah dikurangi diskon.")
-        st.markdown("---")
+def render_relationships():
+    st.header("🔗 Hubungan Antar Variabel")
+    st.markdown("Mengeksplorasi potensi korelasi atau pola antara harga produk dan diskon yang diberikan.")
 
-        # Pertanyaan 2: Rata-rata Nilai Pesanan
-        st.markdown(f"**2. Berapa rata-rata nilai pesanan untuk data yang difilter saat ini?**")
-        st.info(f"👉 Rata-rata Nilai Pesanan: **Rp {rerata_nilai_pesanan:,.0f}**")
-        st.caption("Ini adalah rata-rata pendapatan dari setiap pesanan yang berhasil.")
-        st.markdown("---")
+    st.subheader("Hubungan Harga Asli Produk vs. Jumlah Diskon")
+    if SCATTER_RENDER_MODE == "scatter":
+        scatter_df = filtered_rows.frame(df_merged_raw, ['product_original_price', 'discount_amount', 'category_name_1', 'sku'])
+        x_max, y_max = metric('price_discount_limits') # Batasi sumbu X & Y (kuantil 0.99)
+        fig10 = px.scatter(scatter_df, x='product_original_price', y='discount_amount',
+                           title='Hubungan Harga Asli Produk vs. Jumlah Diskon',
+                           color='category_name_1', # Menambahkan warna berdasarkan kategori
+                           hover_name='sku', # Menampilkan SKU saat hover
+                           opacity=0.5,
+                           labels={'product_original_price': 'Harga Asli Produk (Rp)', 'discount_amount': 'Jumlah Diskon (Rp)'},
+                           range_x=[0, x_max], range_y=[0, y_max])
+    else:
+        # Grid kepadatan dihitung di server; browser hanya menerima bins x bins sel + sampel hover
+        grid = metric('price_discount_density', bins=DENSITY_BINS, sample_per_category=HOVER_SAMPLE_PER_CATEGORY)
+        all_label = "Semua Kategori"
+        chosen = st.selectbox("Kategori untuk peta kepadatan:", [all_label] + grid.categories, key="density_category")
+        chosen = None if chosen == all_label else chosen
+        counts = grid.counts_for(chosen)
+        fig10 = go.Figure(go.Heatmap(
+            x=DensityGrid.centers(grid.x_edges), y=DensityGrid.centers(grid.y_edges),
+            z=np.where(counts > 0, np.log10(np.maximum(counts, 1)), np.nan), customdata=counts,
+            colorscale='Viridis', colorbar=dict(title='log10(jumlah)'),
+            hovertemplate='Harga ≈ %{x:,.0f}<br>Diskon ≈ %{y:,.0f}<br>Jumlah item: %{customdata:,}<extra></extra>'))
+        hover_sample = grid.sample_for(chosen, 'category_name_1')
+        if not hover_sample.empty:
+            # Sampel berlapis per kategori: titik kecil dengan SKU saat hover
+            fig10.add_traces(px.scatter(hover_sample, x='product_original_price', y='discount_amount',
+                                        color='category_name_1', hover_name='sku', opacity=0.6).data)
+            fig10.update_traces(marker=dict(size=4), selector=dict(type='scatter'))
+        fig10.update_layout(title='Kepadatan Harga Asli Produk vs. Jumlah Diskon',
+                            xaxis_title='Harga Asli Produk (Rp)', yaxis_title='Jumlah Diskon (Rp)',
+                            xaxis_range=[0, grid.x_edges[-1]], yaxis_range=[0, grid.y_edges[-1]],
+                            legend=dict(orientation='h', y=-0.2))
+    plotly_chart(fig10)
+    with st.expander("📝 Penjelasan Grafik: Harga vs. Diskon"):
+        st.markdown("""
+        Grafik *scatter* ini memvisualisasikan hubungan antara harga asli produk dan jumlah diskon yang diberikan.
+        **Insight:** Perhatikan apakah ada tren, misalnya, produk yang lebih mahal cenderung mendapatkan diskon lebih besar.
+        Titik-titik yang berkelompok mungkin menunjukkan strategi diskon yang konsisten untuk kategori atau segmen harga tertentu.
+        Warna sel menunjukkan banyaknya item (skala log); titik kecil adalah sampel per kategori,
+        dan Anda bisa melihat detail SKU saat mengarahkan kursor (hover) pada titik tersebut.
+        """)
 
-        # Pertanyaan 3: Kategori Produk Terlaris (berdasarkan penjualan bersih) - dalam bentuk grafik
-        if not df_filtered.empty and 'category_name_1' in df_filtered.columns:
-            st.markdown(f"**3. Kategori produk apa yang memiliki penjualan bersih tertinggi saat ini?**")
-            top_category_sales_df = df_filtered.groupby('category_name_1')['net_item_sales'].sum().nlargest(3).reset_index()
-            top_category_sales_df.columns = ['Kategori Produk', 'Total Penjualan Bersih (Rp)']
-            fig_top_cat_faq = px.bar(top_category_sales_df, x='Total Penjualan Bersih (Rp)', y='Kategori Produk', orientation='h',
-                                     title='Top 3 Kategori Terlaris',
-                                     color_discrete_sequence=px.colors.sequential.YlOrBr,
-                                     height=250) # Ukuran lebih kecil untuk FAQ
-            fig_top_cat_faq.update_layout(yaxis={'categoryorder':'total ascending'}, margin=dict(l=0, r=0, t=30, b=0)) # Margin agar rapi
-            st.plotly_chart(fig_top_cat_faq, use_container_width=True, config={'displayModeBar': False}) # Tanpa mode bar
-            st.info(f"👉 Kategori Terlaris: **{top_category_sales_df.iloc[0]['Kategori Produk']}** (Rp {top_category_sales_df.iloc[0]['Total Penjualan Bersih (Rp)']:.0f})")
-            st.caption("Fokus pada kategori ini untuk potensi pertumbuhan lebih lanjut.")
-            st.markdown("---")
-        else:
-            st.warning("Tidak dapat menentukan kategori terlaris karena data kategori tidak tersedia atau kosong.")
-
-        # Pertanyaan 4: Metode Pembayaran Paling Populer - dalam bentuk grafik
-        if not df_filtered.empty and 'payment_method' in df_filtered.columns:
-            st.markdown(f"**4. Metode pembayaran apa yang paling sering digunakan oleh pelanggan?**")
-            payment_counts_faq = df_filtered['payment_method'].value_counts().nlargest(3).reset_index()
-            payment_counts_faq.columns = ['Metode Pembayaran', 'Jumlah Item Pesanan']
-            fig_payment_faq = px.pie(payment_counts_faq, values='Jumlah Item Pesanan', names='Metode Pembayaran',
-                                     title='Top 3 Metode Pembayaran', hole=0.4,
-                                     color_discrete_sequence=px.colors.sequential.GnBu,
-                                     height=250) # Ukuran lebih kecil untuk FAQ
-            fig_payment_faq.update_layout(margin=dict(l=0, r=0, t=30, b=0)) # Margin agar rapi
-            st.plotly_chart(fig_payment_faq, use_container_width=True, config={'displayModeBar': False}) # Tanpa mode bar
-            st.info(f"👉 Metode Pembayaran Paling Populer: **{payment_counts_faq.iloc[0]['Metode Pembayaran']}** ({payment_counts_faq.iloc[0]['Jumlah Item Pesanan']:,} item)")
-            st.caption("Pertimbangkan untuk mengoptimalkan alur untuk metode pembayaran ini.")
-            st.markdown("---")
-        else:
-            st.warning("Tidak dapat menentukan metode pembayaran paling populer karena data metode pembayaran tidak tersedia atau kosong.")
-
-        # Pertanyaan 5: Hari Penjualan Puncak - dalam bentuk grafik
-        if not df_filtered.empty and 'day_of_week' in df_filtered.columns:
-            st.markdown(f"**5. Hari apa dalam seminggu yang memiliki penjualan bersih tertinggi?**")
-            day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            sales_by_day_faq = df_filtered.groupby('day_of_week')['net_item_sales'].sum().reindex(day_order).fillna(0).reset_index()
-            sales_by_day_faq.columns = ['Hari', 'Total Penjualan Bersih (Rp)']
-            fig_day_faq = px.bar(sales_by_day_faq, x='Hari', y='Total Penjualan Bersih (Rp)',
-                                 title='Penjualan Bersih per Hari dalam Seminggu',
-                                 color_discrete_sequence=px.colors.sequential.Blues,
+def render_raw_data():
+    st.header("📄 Data Mentah")
+    st.markdown("Tinjau data penjualan gabungan yang sudah difilter, bisa mencari dan mengunduh data di sini.")
+
+    # Paginasi di server: hanya baris pada halaman aktif yang dibentuk & dikirim ke browser
+    total_rows = len(filtered_rows)
+    col_size, col_page = st.columns(2)
+    page_size = col_size.selectbox("Baris per halaman:", RAW_PAGE_SIZES, key="raw_page_size")
+    page_count = max(1, -(-total_rows // page_size))
+    if st.session_state.get("raw_page", 1) > page_count:
+        st.session_state["raw_page"] = 1 # Filter berubah dan halaman lama tidak ada lagi
+    page = col_page.number_input(f"Halaman (dari {page_count:,}):", min_value=1, max_value=page_count, step=1, key="raw_page")
+    offset = (page - 1) * page_size
+    st.dataframe(render_calendar_columns(filtered_rows.page(df_merged_raw, offset, page_size)))
+    st.caption(f"Menampilkan baris {offset + 1:,}–{min(offset + page_size, total_rows):,} dari {total_rows:,} item penjualan.")
+
+    # Tombol download: file dibuat saat tombol diklik, ditulis per blok ke file sementara
+    export_format = st.radio("Format unduhan:", list(EXPORT_FORMATS), horizontal=True, key="raw_export_format")
+    export_rows = filtered_rows
+    st.download_button(
+        label=f"Unduh Data Filtered sebagai {export_format}",
+        data=lambda: export_tempfile(df_merged_raw, export_rows, export_format, chunk_rows=EXPORT_CHUNK_ROWS),
+        file_name=f"filtered_ecommerce_data.{export_format}",
+        mime=EXPORT_FORMATS[export_format],
+        help="Unduh semua baris yang cocok dengan filter saat ini (bukan hanya halaman yang terlihat)."
+    )
+
+def render_faq(): # BAGIAN UNTUK WAWASAN CEPAT DAN FAQ
+    st.header("❓ Wawasan Cepat & FAQ")
+    st.markdown("""
+    Dapatkan jawaban instan untuk pertanyaan kunci mengenai performa e-commerce Anda
+    berdasarkan data yang **sedang difilter**!
+    """)
+
+    st.subheader("🚀 Insight Utama Anda Saat Ini:")
+
+    # Pertanyaan 1: Total Penjualan Bersih
+    st.markdown("**1. Berapa total penjualan bersih untuk data yang difilter saat ini?**")
+    st.info(f"👉 Total Penjualan Bersih: **Rp {total_penjualan_bersih:,.0f}**")
+    st.caption("Angka ini mencerminkan pendapatan setelah dikurangi diskon.")
+    st.markdown("---")
+
+    # Pertanyaan 2: Rata-rata Nilai Pesanan
+    st.markdown("**2. Berapa rata-rata nilai pesanan untuk data yang difilter saat ini?**")
+    st.info(f"👉 Rata-rata Nilai Pesanan: **Rp {rerata_nilai_pesanan:,.0f}**")
+    st.caption("Ini adalah rata-rata pendapatan dari setiap pesanan yang berhasil.")
+    st.markdown("---")
+
+    # Pertanyaan 3: Kategori Produk Terlaris (berdasarkan penjualan bersih) - dalam bentuk grafik
+    if not cube_filtered.empty:
+        st.markdown("**3. Kategori produk apa yang memiliki penjualan bersih tertinggi saat ini?**")
+        top_category_sales_df = metric('sales_by_category').nlargest(3).reset_index()
+        top_category_sales_df.columns = ['Kategori Produk', 'Total Penjualan Bersih (Rp)']
+        fig_top_cat_faq = px.bar(top_category_sales_df, x='Total Penjualan Bersih (Rp)', y='Kategori Produk', orientation='h',
+                                 title='Top 3 Kategori Terlaris',
+                                 color_discrete_sequence=px.colors.sequential.YlOrBr,
                                  height=250) # Ukuran lebih kecil untuk FAQ
-            fig_day_faq.update_layout(xaxis_tickangle=-45, margin=dict(l=0, r=0, t=30, b=0)) # Margin agar rapi
-            st.plotly_chart(fig_day_faq, use_container_width=True, config={'displayModeBar': False}) # Tanpa mode bar
-            peak_day_sales_faq = sales_by_day_faq.loc[sales_by_day_faq['Total Penjualan Bersih (Rp)'].idxmax()]
-            st.info(f"👉 Hari Penjualan Puncak: **{peak_day_sales_faq['Hari']}** (Rp {peak_day_sales_faq['Total Penjualan Bersih (Rp)']:.0f})")
-            st.caption("Informasi ini dapat membantu perencanaan promosi atau staf.")
-            st.markdown("---")
-        else:
-            st.warning("Tidak dapat menentukan hari penjualan puncak karena data hari dalam seminggu tidak tersedia atau kosong.")
-
-
+        fig_top_cat_faq.update_layout(yaxis={'categoryorder':'total ascending'}, margin=dict(l=0, r=0, t=30, b=0)) # Margin agar rapi
+        plotly_chart(fig_top_cat_faq, config={'displayModeBar': False}) # Tanpa mode bar
+        st.info(f"👉 Kategori Terlaris: **{top_category_sales_df.iloc[0]['Kategori Produk']}** (Rp {top_category_sales_df.iloc[0]['Total Penjualan Bersih (Rp)']:.0f})")
+        st.caption("Fokus pada kategori ini untuk potensi pertumbuhan lebih lanjut.")
+        st.markdown("---")
+    else:
+        st.warning("Tidak dapat menentukan kategori terlaris karena data kategori tidak tersedia atau kosong.")
+
+    # Pertanyaan 4: Metode Pembayaran Paling Populer - dalam bentuk grafik
+    if not cube_filtered.empty:
+        st.markdown("**4. Metode pembayaran apa yang paling sering digunakan oleh pelanggan?**")
+        payment_counts_faq = metric('items_by_payment').nlargest(3).reset_index()
+        payment_counts_faq.columns = ['Metode Pembayaran', 'Jumlah Item Pesanan']
+        fig_payment_faq = px.pie(payment_counts_faq, values='Jumlah Item Pesanan', names='Metode Pembayaran',
+                                 title='Top 3 Metode Pembayaran', hole=0.4,
+                                 color_discrete_sequence=px.colors.sequential.GnBu,
+                                 height=250) # Ukuran lebih kecil untuk FAQ
+        fig_payment_faq.update_layout(margin=dict(l=0, r=0, t=30, b=0)) # Margin agar rapi
+        plotly_chart(fig_payment_faq, config={'displayModeBar': False}) # Tanpa mode bar
+        st.info(f"👉 Metode Pembayaran Paling Populer: **{payment_counts_faq.iloc[0]['Metode Pembayaran']}** ({payment_counts_faq.iloc[0]['Jumlah Item Pesanan']:,} item)")
+        st.caption("Pertimbangkan untuk mengoptimalkan alur untuk metode pembayaran ini.")
+        st.markdown("---")
+    else:
+        st.warning("Tidak dapat menentukan metode pembayaran paling populer karena data metode pembayaran tidak tersedia atau kosong.")
+
+    # Pertanyaan 5: Hari Penjualan Puncak - dalam bentuk grafik
+    if not cube_filtered.empty:
+        st.markdown("**5. Hari apa dalam seminggu yang memiliki penjualan bersih tertinggi?**")
+        sales_by_day_faq = metric('sales_by_day_of_week').reindex(DAY_ORDER).fillna(0).reset_index()
+        sales_by_day_faq.columns = ['Hari', 'Total Penjualan Bersih (Rp)']
+        fig_day_faq = px.bar(sales_by_day_faq, x='Hari', y='Total Penjualan Bersih (Rp)',
+                             title='Penjualan Bersih per Hari dalam Seminggu',
+                             color_discrete_sequence=px.colors.sequential.Blues,
+                             height=250) # Ukuran lebih kecil untuk FAQ
+        fig_day_faq.update_layout(xaxis_tickangle=-45, margin=dict(l=0, r=0, t=30, b=0)) # Margin agar rapi
+        plotly_chart(fig_day_faq, config={'displayModeBar': False}) # Tanpa mode bar
+        peak_day_sales_faq = sales_by_day_faq.loc[sales_by_day_faq['Total Penjualan Bersih (Rp)'].idxmax()]
+        st.info(f"👉 Hari Penjualan Puncak: **{peak_day_sales_faq['Hari']}** (Rp {peak_day_sales_faq['Total Penjualan Bersih (Rp)']:.0f})")
+        st.caption("Informasi ini dapat membantu perencanaan promosi atau staf.")
+        st.markdown("---")
+    else:
+        st.warning("Tidak dapat menentukan hari penjualan puncak karena data hari dalam seminggu tidak tersedia atau kosong.")
+
+
+SECTIONS = {
+    "💡 Gambaran Umum Data": render_overview,
+    "🧑‍🤝‍🧑 Analisis Pelanggan": render_customers,
+    "📦 Analisis Pesanan": render_orders,
+    "🏷️ Analisis Produk": render_products,
+    "🔗 Hubungan Variabel": render_relationships,
+    "📄 Data Mentah": render_raw_data,
+    "❓ Wawasan Cepat & FAQ": render_faq,
+}
+
+def write_diagnostics_log(profile):
+    if DIAGNOSTICS_LOG is None:
+        return
+    try:
+        profile.write_log(DIAGNOSTICS_LOG)
+    except OSError:
+        pass  # Log hanya alat bantu; kegagalan menulis tidak boleh menghentikan dashboard
+
+
+# Fragment: mengganti bagian hanya menjalankan ulang fungsi ini, bukan seluruh skrip.
+# Pilihan bagian disimpan di session_state (key) sehingga tetap sama antar rerun.
+@st.fragment
+def render_selected_section():
+    section = st.radio("Pilih bagian analisis:", list(SECTIONS), horizontal=True, key="active_section",
+                       label_visibility="collapsed")
+    if instrumentation.active_run() is RUN_PROFILE:
+        # Dipanggil dari skrip utama: dicatat di profil rerun penuh
+        with instrumentation.stage(f"bagian:{section}", 'bagian'):
+            SECTIONS[section]()
+        return
+    # Rerun fragment tidak menjalankan skrip utama: profil sendiri, hanya ditulis ke log
+    with instrumentation.profiled_run() as fragment_profile:
+        with instrumentation.stage(f"bagian:{section}", 'bagian'):
+            SECTIONS[section]()
+    write_diagnostics_log(fragment_profile)
+
+
+# --- Struktur Dashboard per Bagian ---
+if has_data:
+    render_selected_section()
 
 else:
     st.info("⚠️ Silakan sesuaikan filter Anda di sidebar. Tidak ada data yang cocok untuk ditampilkan saat ini.")
 
+# Profil rerun penuh ditutup tepat setelah fragment terdaftar, sebelum perintah st.* lain yang
+# bisa terputus; rerun fragment berikutnya tidak pernah melihat profil ini sebagai aktif
+run_profile = instrumentation.finish_run()
+
+metrics_stats = metrics_store.stats()
+metrics_stats_slot.caption(f"Cache metrik: {metrics_stats['hits']:,} hit / {metrics_stats['misses']:,} miss "
+                           f"({metrics_stats['hit_rate']:.0%}), {metrics_stats['entries']} entri, "
+                           f"{metrics_stats['bytes'] / 1e6:,.1f} MB")
+
+# --- Diagnostik Kinerja Rerun Ini ---
+# Tabel per komponen (waktu total & sendiri, baris, selisih memori, cache) dan komponen paling lambat
+diagnostics = run_profile.summary()
+slowest = run_profile.slowest(diagnostics)
+with diagnostics_panel:
+    st.caption(f"Rerun {run_profile.run_id}: {run_profile.elapsed():.2f} dtk, {len(diagnostics)} komponen")
+    if slowest is not None:
+        st.warning(f"Paling lambat: **{slowest['komponen']}** ({slowest['jenis']}), "
+                   f"{slowest['detik_sendiri']:.2f} dtk waktu sendiri")
+    st.dataframe(diagnostics, hide_index=True,
+                 column_config={'detik': st.column_config.NumberColumn(format="%.3f"),
+                                'detik_sendiri': st.column_config.NumberColumn(format="%.3f"),
+                                'memori_mb': st.column_config.NumberColumn(format="%.1f")})
+write_diagnostics_log(run_profile)
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+# --- Mesin Filter Berindeks ---
+# df_merged disimpan terurut menurut created_at, sehingga filter tanggal cukup berupa
+# binary search (searchsorted) yang menghasilkan potongan baris [start, stop) tanpa salinan.
+# Filter kategori memakai kode integer per baris + tabel lookup boolean per pilihan,
+# bukan isin() pada kolom string. Hasilnya RowSelection: pilihan baris ringan yang
+# hanya membentuk kolom yang benar-benar diminta oleh agregasi di hilir.
+
+_NAT_LAST = np.iinfo('int64').max
+
+
+class RowSelection:
+    def __init__(self, start, stop, mask=None):
+        self.start = start
+        self.stop = stop
+        self.mask = mask  # None = semua baris di dalam potongan terpilih
+
+    def __len__(self):
+        if self.mask is None:
+            return self.stop - self.start
+        return int(np.count_nonzero(self.mask))
+
+    def column(self, df, name):
+        values = df[name].iloc[self.start:self.stop]
+        return values if self.mask is None else values[self.mask]
+
+    def frame(self, df, columns=None):
+        view = df.iloc[self.start:self.stop] if columns is None else df[columns].iloc[self.start:self.stop]
+        return view if self.mask is None else view[self.mask]
+
+    def head(self, df, n=5):
+        return self.page(df, 0, n)
+
+    def page(self, df, offset, n):
+        # Baris terpilih ke-offset .. offset+n (untuk tabel berhalaman): hanya n baris yang dibentuk
+        if self.mask is None:
+            return df.iloc[self.start + offset:min(self.stop, self.start + offset + n)]
+        positions = self.start + np.flatnonzero(self.mask)[offset:offset + n]
+        return df.iloc[positions]
+
+    def iter_frames(self, df, chunk_rows, columns=None):
+        # Baris terpilih per blok `chunk_rows` baris sumber; memori sebanding ukuran blok, bukan pilihan
+        for lower in range(self.start, self.stop, chunk_rows):
+            upper = min(self.stop, lower + chunk_rows)
+            chunk = df.iloc[lower:upper] if columns is None else df.iloc[lower:upper][columns]
+            if self.mask is not None:
+                chunk = chunk[self.mask[lower - self.start:upper - self.start]]
+            if len(chunk):
+                yield chunk
+
+
+class FilterIndex:
+    def __init__(self, created_ns, category_codes, categories):
+        self.created_ns = created_ns
+        self.category_codes = category_codes
+        self.categories = categories
+
+    @classmethod
+    def build(cls, df_merged):
+        created = df_merged['created_at']
+        created_ns = created.to_numpy().view('int64').copy()
+        created_ns[created.isna().to_numpy()] = _NAT_LAST
+        if len(created_ns) and np.any(np.diff(created_ns) < 0):
+            raise ValueError("df_merged harus terurut menurut created_at untuk FilterIndex")
+        codes, categories = pd.factorize(df_merged['category_name_1'])
+        return cls(created_ns, codes.astype(np.int16), pd.Index(categories))
+
+    def __len__(self):
+        return len(self.created_ns)
+
+    def date_bounds(self, start_date, end_date):
+        # order_date di antara start..end (inklusif) == created_at di [start, end + 1 hari)
+        lower = pd.Timestamp(start_date).value
+        upper = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).value
+        return (int(np.searchsorted(self.created_ns, lower, side='left')),
+                int(np.searchsorted(self.created_ns, upper, side='left')))
+
+    def select(self, start_date=None, end_date=None, categories=None):
+        if start_date is not None and end_date is not None:
+            start, stop = self.date_bounds(start_date, end_date)
+        else:
+            start, stop = 0, len(self)
+        if categories is None:
+            return RowSelection(start, stop)
+        wanted = self.categories.isin(categories)
+        if wanted.all():
+            return RowSelection(start, stop)
+        # Tabel lookup: satu boolean per kategori, diindeks oleh kode kategori setiap baris
+        return RowSelection(start, stop, wanted[self.category_codes[start:stop]])
@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import psutil
+except ImportError:  # Tanpa psutil instrumentasi tetap mencatat waktu & baris, tanpa selisih memori
+    psutil = None
+
+# --- Instrumentasi per Tahap (pipeline, cache, filter, metrik, grafik) ---
+# Setiap rerun dashboard membuka satu RunProfile untuk thread skripnya. Kode pipeline,
+# pemuat ber-cache, filter, metrik, dan grafik membungkus pekerjaannya dengan stage(...);
+# tanpa profil aktif (mis. benchmark, notebook, CLI) stage(...) tidak mencatat apa pun.
+# Per tahap dicatat: waktu dinding, baris yang diproses, selisih RSS proses, dan status
+# cache (hit/miss). Tahap boleh bersarang; waktu "sendiri" = waktu tahap dikurangi
+# anak-anaknya, dan tahap dengan waktu sendiri terbesar ditandai sebagai yang paling lambat.
+
+DEFAULT_LOG_MAX_BYTES = 16 * 1024 * 1024  # log diputar ke <path>.1 setelah ukuran ini
+
+_local = threading.local()
+_log_lock = threading.Lock()
+_PROCESS = psutil.Process() if psutil is not None else None
+
+
+def rss_mb():
+    # RSS proses saat ini dalam MB; None bila psutil tidak terpasang
+    if _PROCESS is None:
+        return None
+    return _PROCESS.memory_info().rss / 2 ** 20
+
+
+class RunProfile:
+    def __init__(self, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.records = []
+        self._open = []  # tumpukan tahap yang sedang berjalan (untuk induk & status cache)
+
+    @contextmanager
+    def stage(self, name, kind, rows=None, cached=False):
+        parent = self._open[-1] if self._open else None
+        record = {
+            'component': name,
+            'kind': kind,
+            'parent': parent['component'] if parent else None,
+            'rows': rows,
+            'cache': 'hit' if cached else None,  # fungsi ber-cache yang benar-benar jalan memanggil cache_miss()
+            'seconds': 0.0,
+            'child_seconds': 0.0,
+            'memory_delta_mb': None,
+        }
+        self.records.append(record)
+        self._open.append(record)
+        start_rss = rss_mb()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - started
+            if start_rss is not None:
+                record['memory_delta_mb'] = rss_mb() - start_rss
+            self._open.pop()
+            if parent is not None:
+                parent['child_seconds'] += record['seconds']
+
+    def cache_miss(self):
+        # Tahap ber-cache terdalam yang sedang terbuka ternyata dihitung ulang
+        for record in reversed(self._open):
+            if record['cache'] is not None:
+                record['cache'] = 'miss'
+                return
+
+    def elapsed(self):
+        return time.perf_counter() - self._started
+
+    def summary(self):
+        # Satu baris per komponen (tahap yang berulang, mis. per chunk, dijumlahkan), urut kemunculan
+        columns = ['komponen', 'jenis', 'induk', 'panggilan', 'detik', 'detik_sendiri', 'baris', 'memori_mb', 'cache']
+        if not self.records:
+            return pd.DataFrame(columns=columns)
+        frame = pd.DataFrame(self.records)
+        frame['self_seconds'] = frame['seconds'] - frame['child_seconds']
+        frame['miss'] = frame['cache'] == 'miss'
+        frame['has_cache'] = frame['cache'].notna()
+        grouped = frame.groupby(['component', 'kind', 'parent'], dropna=False, sort=False).agg(
+            panggilan=('seconds', 'size'),
+            detik=('seconds', 'sum'),
+            detik_sendiri=('self_seconds', 'sum'),
+            baris=('rows', lambda rows: rows.sum(min_count=1)),
+            memori_mb=('memory_delta_mb', lambda delta: delta.sum(min_count=1)),
+            miss=('miss', 'any'),
+            has_cache=('has_cache', 'any'),
+        ).reset_index()
+        grouped['cache'] = grouped['miss'].map({True: 'miss', False: 'hit'}).where(grouped['has_cache'])
+        grouped['baris'] = grouped['baris'].astype('Int64')
+        grouped = grouped.rename(columns={'component': 'komponen', 'kind': 'jenis', 'parent': 'induk'})
+        return grouped[columns]
+
+    def slowest(self, summary=None):
+        # Komponen dengan waktu sendiri terbesar pada rerun ini (None bila belum ada tahap)
+        summary = self.summary() if summary is None else summary
+        if summary.empty:
+            return None
+        return summary.loc[summary['detik_sendiri'].idxmax()]
+
+    def log_lines(self):
+        summary = self.summary()
+        base = {'run_id': self.run_id, 'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at))}
+        for row in summary.to_dict('records'):
+            yield {**base, 'type': 'stage', **{key: (None if pd.isna(value) else value) for key, value in row.items()}}
+        slowest = self.slowest(summary)
+        yield {**base, 'type': 'rerun', 'detik': self.elapsed(), 'tahap': int(summary['panggilan'].sum()),
+               'paling_lambat': None if slowest is None else slowest['komponen'],
+               'detik_paling_lambat': None if slowest is None else float(slowest['detik_sendiri'])}
+
+    def write_log(self, path, max_bytes=DEFAULT_LOG_MAX_BYTES):
+        # JSON lines, ditambahkan di akhir file; beberapa sesi menulis bergantian lewat kunci
+        lines = ''.join(json.dumps(line, default=_json_default, ensure_ascii=False) + '\n' for line in self.log_lines())
+        with _log_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            if os.path.exists(path) and os.path.getsize(path) > max_bytes:
+                os.replace(path, f"{path}.1")
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+
+def _json_default(value):
+    # Nilai numpy (int64/float64/bool_) dari ringkasan pandas
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+# --- Profil Aktif per Thread ---
+def start_run(run_id=None):
+    profile = RunProfile(run_id)
+    _local.profile = profile
+    return profile
+
+
+def finish_run():
+    profile = active_run()
+    _local.profile = None
+    return profile
+
+
+def active_run():
+    return getattr(_local, 'profile', None)
+
+
+@contextmanager
+def profiled_run(run_id=None):
+    # Untuk eksekusi yang bisa terputus di tengah jalan (st.stop, RerunException): profil
+    # thread ini selalu dibersihkan, sehingga rerun berikutnya tidak mencatat ke profil basi
+    profile = start_run(run_id)
+    try:
+        yield profile
+    finally:
+        if active_run() is profile:
+            finish_run()
+
+
+@contextmanager
+def stage(name, kind='pipeline', rows=None, cached=False):
+    # Catatan tahap (dict) boleh diisi pemanggil, mis. record['rows'] setelah hasilnya diketahui
+    profile = active_run()
+    if profile is None:
+        yield {}
+        return
+    with profile.stage(name, kind, rows=rows, cached=cached) as record:
+        yield record
+
+
+def cache_miss():
+    # Dipanggil di awal fungsi ber-cache (st.cache_data/st.cache_resource): badan fungsi hanya jalan saat miss
+    profile = active_run()
+    if profile is not None:
+        profile.cache_miss()
+
+
+def timed_iter(name, iterable, kind='pipeline'):
+    # Setiap next() (mis. parsing satu chunk CSV) dicatat sebagai satu pemanggilan tahap `name`
+    iterator = iter(iterable)
+    while True:
+        with stage(name, kind) as record:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            record['rows'] = len(item) if hasattr(item, '__len__') else None
+        yield item
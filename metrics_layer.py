@@ -0,0 +1,185 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import instrumentation
+from column_stats import profile_frame
+from customer_summary import day_code, rfm_scores, top_n
+from density_plot import DEFAULT_CLIP_QUANTILE, DensityGrid, axis_limits
+from olap_cube import LINE_COUNT, cube_totals, rollup
+
+# --- Lapisan Metrik Bernama (memoisasi per filter) ---
+# Setiap agregat dashboard punya nama tetap dan dihitung dari satu tempat. Hasilnya
+# disimpan dengan kunci (nama, versi dataset, rentang tanggal, kategori terpilih), sehingga
+# tab lain yang memakai agregat yang sama, pindah tab, atau widget yang tidak mengubah
+# filter cukup mengambil hasil yang sudah ada. Entri tertua dibuang (LRU) bila jumlah
+# entri atau total ukurannya melewati batas.
+#
+# Hasil di-cache dipakai bersama: pemanggil tidak boleh mengubahnya di tempat
+# (reset_index()/sort_values() menghasilkan salinan, jadi aman).
+#
+# Bila konteks membawa backend SQL (sql_backend.DuckDBBackend), metrik yang didukungnya
+# dihitung dengan kueri; sisanya tetap memakai fungsi pandas di METRICS.
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class FilterContext:
+    # Semua sumber data untuk satu keadaan filter; metrik mengambil apa yang dibutuhkan
+    def __init__(self, df, cube, rows, sketches, customers, start_date=None, end_date=None, categories=None,
+                 sql=None, stats=None):
+        self.df = df
+        self.cube = cube
+        self.rows = rows
+        self.sketches = sketches
+        self.customers = customers
+        self.sql = sql  # backend SQL opsional (sql_backend.DuckDBBackend); None = semua metrik via pandas
+        self.stats = stats  # statistik kolom (column_stats.ColumnStats); None = mode eksak dari baris item
+        self.start_date = start_date
+        self.end_date = end_date
+        self.categories = categories
+        self._store = None
+        self._key = None
+
+    def bind(self, store, key):
+        self._store = store
+        self._key = key
+
+    def metric(self, name, **params):
+        # Metrik turunan membaca metrik lain lewat cache yang sama (kunci filter yang sama)
+        return self._store.get(name, self._key, self, **params)
+
+    def distinct(self, column):
+        return self.sketches.count(column, self.start_date, self.end_date, self.categories)
+
+    def stat_cells(self):
+        return self.stats.select(self.start_date, self.end_date, self.categories)
+
+    def column_profile(self):
+        if self.stats is None:
+            return profile_frame(self.rows.frame(self.df))
+        return self.stats.profile(self.stat_cells())
+
+    def describe(self):
+        if self.stats is None:
+            return self.rows.frame(self.df).describe()
+        return self.stats.describe(self.stat_cells())
+
+    def axis_limits(self, x, y, clip_quantile=DEFAULT_CLIP_QUANTILE):
+        if self.stats is None:
+            return axis_limits(self.rows.frame(self.df, [x, y]), x, y, clip_quantile)
+        return self.stats.axis_limits(x, y, clip_quantile, self.stat_cells())
+
+    def customer_rfm(self, summary):
+        # Recency dihitung terhadap akhir rentang filter (atau pesanan terakhir bila tanpa filter tanggal)
+        as_of_day = day_code(self.end_date) if self.end_date is not None else summary['last_order'].max()
+        return rfm_scores(summary, as_of_day)
+
+    def top_by_rows(self, by, n=10, measure='net_item_sales'):
+        values = self.rows.frame(self.df, [by, measure])
+        return values.groupby(by, observed=True)[measure].sum().sort_values(ascending=False).head(n)
+
+
+METRICS = {
+    # Ringkasan KPI
+    'totals': lambda ctx: cube_totals(ctx.cube),
+    'unique_orders': lambda ctx: ctx.distinct('increment_id'),
+    'unique_customers': lambda ctx: ctx.distinct('Customer ID'),
+    'unique_skus': lambda ctx: ctx.distinct('sku'),
+    # Roll-up kubus
+    'items_by_status': lambda ctx: rollup(ctx.cube, 'status', LINE_COUNT),
+    'items_by_payment': lambda ctx: rollup(ctx.cube, 'payment_method', LINE_COUNT),
+    'items_by_category': lambda ctx: rollup(ctx.cube, 'category_name_1', LINE_COUNT),
+    'sales_by_category': lambda ctx: rollup(ctx.cube, 'category_name_1'),
+    'sales_by_month': lambda ctx: rollup(ctx.cube, 'order_month'),
+    'sales_by_date': lambda ctx: rollup(ctx.cube, 'order_date'),
+    'sales_by_day_of_week': lambda ctx: rollup(ctx.cube, 'day_of_week'),
+    'sales_by_hour': lambda ctx: rollup(ctx.cube, 'hour_of_day'),
+    # Ringkasan & peringkat dari baris item terpilih (tidak ada di kubus)
+    'column_profile': lambda ctx: ctx.column_profile(),
+    'describe': lambda ctx: ctx.describe(),
+    # Batas sumbu harga vs diskon (kuantil clip_quantile) dari sketsa, atau eksak dari baris item
+    'price_discount_limits': lambda ctx, clip_quantile=DEFAULT_CLIP_QUANTILE: ctx.axis_limits(
+        'product_original_price', 'discount_amount', clip_quantile),
+    # Ringkasan pelanggan dari tabel ember (hari x pelanggan x kategori)
+    'customer_summary': lambda ctx: ctx.customers.summarize(ctx.start_date, ctx.end_date, ctx.categories),
+    'top_skus': lambda ctx: ctx.top_by_rows('sku'),
+    # Turunan ringkasan pelanggan (membaca metrik 'customer_summary' lewat cache yang sama)
+    'top_customers': lambda ctx: top_n(ctx.metric('customer_summary')['net_sales'], 10),
+    'customers_by_first_year': lambda ctx: ctx.customers.customers_by_first_year(ctx.metric('customer_summary')),
+    'customer_rfm': lambda ctx: ctx.customer_rfm(ctx.metric('customer_summary')),
+    'customer_cohorts': lambda ctx: ctx.customers.cohorts(ctx.start_date, ctx.end_date, ctx.categories),
+    # Grid kepadatan harga vs diskon per kategori (parameter bins/sampel ikut menjadi kunci cache)
+    'price_discount_density': lambda ctx, **params: DensityGrid.build(
+        ctx.rows.frame(ctx.df, ['product_original_price', 'discount_amount', 'category_name_1', 'sku']),
+        'product_original_price', 'discount_amount', 'category_name_1', hover_columns=['sku'],
+        limits=ctx.metric('price_discount_limits', clip_quantile=params.get('clip_quantile', DEFAULT_CLIP_QUANTILE)),
+        **params),
+}
+
+
+def filter_key(dataset_version, start_date, end_date, categories):
+    # Urutan pilihan kategori tidak mengubah hasil, jadi kuncinya memakai himpunan terurut
+    return (dataset_version, start_date, end_date, tuple(sorted(categories)) if categories is not None else None)
+
+
+def _result_bytes(value):
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class MetricsStore:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # kunci -> (hasil, ukuran byte)
+        self._bytes = 0
+        self._lock = threading.Lock()  # dipakai bersama oleh semua sesi (st.cache_resource)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, name, key, context, **params):
+        cache_key = (name,) + key + tuple(sorted(params.items()))
+        with self._lock:
+            if cache_key in self._entries:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return self._entries[cache_key][0]
+            self.misses += 1
+        instrumentation.cache_miss()
+        context.bind(self, key)
+        if context.sql is not None and context.sql.supports(name) and not params:
+            value = context.sql.compute(name, context.start_date, context.end_date, context.categories)
+        else:
+            value = METRICS[name](context, **params)
+        size = _result_bytes(value)
+        with self._lock:
+            if cache_key not in self._entries:
+                self._entries[cache_key] = (value, size)
+                self._bytes += size
+                self._evict()
+        return value
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,72 @@
+import pandas as pd
+
+# --- Kubus OLAP Pra-Agregasi ---
+# Dihitung sekali saat data dimuat: jumlah ukuran penjualan & jumlah baris item per
+# (hari x jam x kategori x status x metode pembayaran). Filter tanggal/kategori dan
+# semua rincian waktu di dashboard cukup me-roll-up kubus kecil ini, bukan memindai
+# jutaan baris item.
+
+CUBE_DIMENSIONS = ['order_day', 'hour_of_day', 'category_name_1', 'status', 'payment_method']
+CUBE_MEASURES = ['net_item_sales', 'discount_amount', 'total_price_per_item']
+LINE_COUNT = 'line_count'
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def build_cube(df_merged):
+    keys = pd.DataFrame({
+        'order_day': df_merged['created_at'].dt.normalize(),
+        'hour_of_day': df_merged['hour_of_day'],
+        'category_name_1': df_merged['category_name_1'],
+        'status': df_merged['status'],
+        'payment_method': df_merged['payment_method'],
+    })
+    # dropna=False: baris dengan status/tanggal kosong tetap tercatat di kubus agar total tidak berubah
+    grouped = df_merged[CUBE_MEASURES].groupby([keys[d] for d in CUBE_DIMENSIONS], dropna=False, sort=True, observed=True)
+    cube = grouped.sum()
+    cube[LINE_COUNT] = grouped.size()
+    return cube.reset_index()
+
+
+def merge_cubes(cubes):
+    # Kubus per partisi digabung tanpa menyentuh baris item: ukuran dijumlahkan per sel
+    if len(cubes) == 1:
+        return cubes[0]
+    combined = pd.concat(cubes, ignore_index=True)
+    grouped = combined.groupby(CUBE_DIMENSIONS, dropna=False, sort=True, observed=True)
+    return grouped[CUBE_MEASURES + [LINE_COUNT]].sum().reset_index()
+
+
+def slice_cube(cube, start_date=None, end_date=None, categories=None):
+    mask = pd.Series(True, index=cube.index)
+    if start_date is not None and end_date is not None:
+        mask &= (cube['order_day'] >= pd.Timestamp(start_date)) & (cube['order_day'] <= pd.Timestamp(end_date))
+    if categories is not None:
+        mask &= cube['category_name_1'].isin(categories)
+    return cube[mask]
+
+
+def cube_totals(cube):
+    totals = {measure: cube[measure].sum() for measure in CUBE_MEASURES}
+    totals[LINE_COUNT] = int(cube[LINE_COUNT].sum())
+    return totals
+
+
+def _rollup_key(cube, by):
+    # Dimensi turunan dihitung dari kolom hari pada baris kubus (jauh lebih sedikit dari baris item)
+    if by == 'order_month':
+        return cube['order_day'].dt.to_period('M')
+    if by == 'order_date':
+        return cube['order_day'].dt.date
+    if by == 'day_of_week':
+        return cube['order_day'].dt.day_name()
+    if by == 'year':
+        return cube['order_day'].dt.year
+    return cube[by]
+
+
+def rollup(cube, by, measure='net_item_sales'):
+    # Setara df_filtered.groupby(by)[measure].sum(); measure=LINE_COUNT setara value_counts()
+    result = cube.groupby(_rollup_key(cube, by), observed=True)[measure].sum()
+    result.index.name = by
+    return result
@@ -0,0 +1,138 @@
+import plotly.express as px
+
+from olap_cube import DAY_ORDER
+
+# --- Baris KPI & Grafik Pesanan/Produk (tanpa Streamlit) ---
+# Dipakai bersama oleh dashboard (st.metric / st.plotly_chart) dan laporan batch
+# (batch_reports.py), sehingga angka & grafik di kedua tempat identik. Setiap fungsi
+# menerima `metric`: fungsi nama -> hasil metrik bernama (metrics_layer) untuk satu filter.
+
+KPI_ROW = [
+    # kunci, label (baris KPI dashboard), format nilai
+    ('total_penjualan_bersih', "💰 Total Penjualan Bersih", "Rp {:,.0f}"),
+    ('jumlah_pesanan_unik', "📦 Jumlah Pesanan Unik", "{:,}"),
+    ('jumlah_pelanggan_unik', "🧑‍🤝‍🧑 Jumlah Pelanggan Unik", "{:,}"),
+    ('rerata_nilai_pesanan', "🛒 Rerata Nilai Pesanan", "Rp {:,.0f}"),
+    ('total_diskon_diberikan', "📉 Total Diskon Diberikan", "Rp {:,.0f}"),
+]
+
+
+def kpi_values(metric):
+    totals = metric('totals')
+    jumlah_pesanan_unik = metric('unique_orders')
+    return {
+        'total_penjualan_bersih': totals['net_item_sales'],
+        'jumlah_pesanan_unik': jumlah_pesanan_unik,
+        'jumlah_pelanggan_unik': metric('unique_customers'),
+        # Rata-rata dari total per pesanan = total penjualan bersih / jumlah pesanan unik
+        'rerata_nilai_pesanan': totals['net_item_sales'] / jumlah_pesanan_unik if jumlah_pesanan_unik > 0 else 0,
+        'total_diskon_diberikan': totals['discount_amount'],
+    }
+
+
+def format_kpi(values):
+    # [(label, teks nilai)] sesuai urutan KPI_ROW
+    return [(label, value_format.format(values[key])) for key, label, value_format in KPI_ROW]
+
+
+# --- Grafik Analisis Pesanan ---
+def order_status_figure(metric):
+    status_counts = metric('items_by_status').sort_values(ascending=False).reset_index()
+    status_counts.columns = ['Status Pesanan', 'Jumlah Item Pesanan']
+    return px.pie(status_counts, values='Jumlah Item Pesanan', names='Status Pesanan',
+                  title='Distribusi Status Pesanan', hole=0.3,
+                  color_discrete_sequence=px.colors.sequential.Plasma)
+
+
+def payment_method_figure(metric):
+    payment_counts = metric('items_by_payment').sort_values(ascending=False).reset_index()
+    payment_counts.columns = ['Metode Pembayaran', 'Jumlah Item Pesanan']
+    return px.bar(payment_counts, x='Metode Pembayaran', y='Jumlah Item Pesanan',
+                  title='Distribusi Metode Pembayaran',
+                  color_discrete_sequence=px.colors.sequential.YlGnBu)
+
+
+def monthly_sales_figure(metric):
+    monthly_net_sales = metric('sales_by_month').reset_index()
+    # KOREKSI: Konversi kolom 'order_month' (Period) menjadi string agar dapat di-serialisasi JSON
+    monthly_net_sales['order_month'] = monthly_net_sales['order_month'].astype(str)
+    monthly_net_sales.columns = ['Bulan', 'Total Penjualan Bersih (Rp)']
+    fig = px.line(monthly_net_sales, x='Bulan', y='Total Penjualan Bersih (Rp)',
+                  title='Tren Penjualan Bersih Bulanan',
+                  markers=True, line_shape="spline",
+                  color_discrete_sequence=['teal'])
+    fig.update_xaxes(type='category') # Ensure months are treated as categories for ordering
+    return fig
+
+
+def daily_sales_figure(metric):
+    daily_net_sales = metric('sales_by_date').reset_index()
+    daily_net_sales.columns = ['Tanggal', 'Total Penjualan Bersih (Rp)']
+    return px.line(daily_net_sales, x='Tanggal', y='Total Penjualan Bersih (Rp)',
+                   title='Tren Penjualan Bersih Harian',
+                   line_shape="spline",
+                   color_discrete_sequence=['blue'])
+
+
+def day_of_week_sales_figure(metric):
+    sales_by_day = metric('sales_by_day_of_week').reindex(DAY_ORDER).reset_index()
+    sales_by_day.columns = ['Hari dalam Seminggu', 'Total Penjualan Bersih (Rp)']
+    return px.bar(sales_by_day, x='Hari dalam Seminggu', y='Total Penjualan Bersih (Rp)',
+                  title='Total Penjualan Bersih per Hari dalam Seminggu',
+                  color_discrete_sequence=px.colors.sequential.Plasma)
+
+
+def hourly_sales_figure(metric):
+    sales_by_hour = metric('sales_by_hour').reset_index()
+    sales_by_hour.columns = ['Jam dalam Sehari', 'Total Penjualan Bersih (Rp)']
+    return px.line(sales_by_hour, x='Jam dalam Sehari', y='Total Penjualan Bersih (Rp)',
+                   title='Total Penjualan Bersih per Jam dalam Sehari',
+                   markers=True, line_shape="spline",
+                   color_discrete_sequence=['purple'])
+
+
+# --- Grafik Analisis Produk ---
+def category_items_figure(metric):
+    top_cat_counts = metric('items_by_category').sort_values(ascending=False).head(10).reset_index()
+    top_cat_counts.columns = ['Kategori Produk', 'Jumlah Item Terjual']
+    fig = px.bar(top_cat_counts, x='Jumlah Item Terjual', y='Kategori Produk', orientation='h',
+                 title='Top 10 Kategori Produk (Jumlah Item Terjual)',
+                 color_discrete_sequence=px.colors.sequential.OrRd)
+    fig.update_layout(yaxis={'categoryorder':'total ascending'})
+    return fig
+
+
+def category_sales_figure(metric):
+    category_net_sales_df = metric('sales_by_category').sort_values(ascending=False).head(10).reset_index()
+    category_net_sales_df.columns = ['Kategori Produk', 'Total Penjualan Bersih (Rp)']
+    fig = px.bar(category_net_sales_df, x='Total Penjualan Bersih (Rp)', y='Kategori Produk', orientation='h',
+                 title='Top 10 Kategori Produk (Total Penjualan Bersih)',
+                 color_discrete_sequence=px.colors.sequential.YlGnBu)
+    fig.update_layout(yaxis={'categoryorder':'total ascending'})
+    return fig
+
+
+def top_sku_figure(metric):
+    top_sku_net_sales = metric('top_skus').reset_index()
+    top_sku_net_sales.columns = ['SKU Produk', 'Total Penjualan Bersih (Rp)']
+    fig = px.bar(top_sku_net_sales, x='Total Penjualan Bersih (Rp)', y='SKU Produk', orientation='h',
+                 title='Top 10 Produk Terlaris (Berdasarkan Total Penjualan Bersih)',
+                 color_discrete_sequence=px.colors.sequential.Viridis)
+    fig.update_layout(yaxis={'categoryorder':'total ascending'})
+    return fig
+
+
+# Grafik per bagian (nama file -> fungsi), urut seperti di dashboard
+ORDER_FIGURES = {
+    'status_pesanan': order_status_figure,
+    'metode_pembayaran': payment_method_figure,
+    'penjualan_bulanan': monthly_sales_figure,
+    'penjualan_harian': daily_sales_figure,
+    'penjualan_per_hari': day_of_week_sales_figure,
+    'penjualan_per_jam': hourly_sales_figure,
+}
+PRODUCT_FIGURES = {
+    'kategori_jumlah_item': category_items_figure,
+    'kategori_penjualan': category_sales_figure,
+    'top_sku': top_sku_figure,
+}
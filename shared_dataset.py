@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+
+import instrumentation
+from data_pipeline import dataset_version, load_processed_data, usable_cache_dir
+
+# --- Dataset Bersama (Arrow IPC, dipetakan ke memori) ---
+# Dataset hasil olahan (snapshot dasar + partisi, terurut) diterbitkan sekali per versi sebagai
+# file Arrow IPC tanpa kompresi yang tidak pernah diubah lagi. Setiap proses worker membukanya
+# dengan memory map: kolom numerik/kategori/tanggal menjadi view read-only langsung ke halaman
+# file, sehingga isi dataset berada satu kali di page cache OS dan dipakai bersama oleh semua
+# sesi & proses (bukan satu salinan pickle per sesi seperti st.cache_data).
+#
+# Versi baru ditulis ke file bernama versi tersebut lalu pointer CURRENT_NAME diganti secara
+# atomik (os.replace); pembaca lama tetap memegang file versinya sampai selesai.
+
+SHARED_DIR = "shared"
+SHARED_PREFIX = "dataset"
+CURRENT_NAME = "CURRENT.json"
+KEEP_VERSIONS = 2  # versi sebelumnya dipertahankan untuk proses yang belum pindah versi
+
+# Kolom teks dibaca sebagai string berbasis Arrow (tanpa menyalin ke objek Python per baris)
+_TYPES_MAPPER = {pa.string(): pd.StringDtype('pyarrow'), pa.large_string(): pd.StringDtype('pyarrow')}.get
+
+
+def _shared_name(version):
+    return f"{SHARED_PREFIX}-{hashlib.sha256(version.encode('utf-8')).hexdigest()[:16]}.arrow"
+
+
+def shared_path(cache_dir, version):
+    return os.path.join(cache_dir, SHARED_DIR, _shared_name(version))
+
+
+def current_dataset(cache_dir):
+    # Versi yang terakhir diterbitkan: {'version': ..., 'file': ...} atau None
+    try:
+        with open(os.path.join(cache_dir, SHARED_DIR, CURRENT_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_current(cache_dir, version, name):
+    path = os.path.join(cache_dir, SHARED_DIR, CURRENT_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'file': name}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _remove_stale_versions(cache_dir, keep_names):
+    shared_dir = os.path.join(cache_dir, SHARED_DIR)
+    files = [name for name in os.listdir(shared_dir) if name.startswith(SHARED_PREFIX) and name.endswith('.arrow')]
+    files.sort(key=lambda name: os.path.getmtime(os.path.join(shared_dir, name)), reverse=True)
+    for name in files[KEEP_VERSIONS:]:
+        if name in keep_names:
+            continue
+        try:
+            os.remove(os.path.join(shared_dir, name))
+        except OSError:
+            pass  # Masih dipetakan proses lain (Windows); dicoba lagi pada penerbitan berikutnya
+
+
+def publish_dataset(df, cache_dir, version):
+    # Tulis file versi ini (sekali saja), lalu alihkan CURRENT_NAME ke versi ini
+    name = _shared_name(version)
+    path = shared_path(cache_dir, version)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not os.path.exists(path):
+        with instrumentation.stage('terbitkan_arrow', rows=len(df)):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            tmp_path = f"{path}.{os.getpid()}.tmp"  # beberapa worker boleh menerbitkan bersamaan
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+    _write_current(cache_dir, version, name)
+    _remove_stale_versions(cache_dir, {name})
+    return path
+
+
+def open_dataset(path):
+    # split_blocks=True: setiap kolom tetap array sendiri (tanpa konsolidasi blok yang menyalin),
+    # sehingga kolom tanpa nilai kosong menjadi view read-only ke memory map
+    with instrumentation.stage('buka_arrow') as record:
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        record['rows'] = table.num_rows
+        return table.to_pandas(split_blocks=True, types_mapper=_TYPES_MAPPER)
+
+
+def load_shared_dataset(file_path, cache_dir, chunk_size=None, version=None, df_merged=None):
+    # Buka versi dataset yang diminta; bila belum diterbitkan, proses lalu terbitkan sekali.
+    # df_merged: dataset yang baru dibangun prepare_dataset(with_frame=True), dipakai langsung
+    # alih-alih membaca ulang snapshot dari disk
+    if usable_cache_dir(cache_dir) is None:
+        return df_merged if df_merged is not None else load_processed_data(file_path, chunk_size=chunk_size)
+    version = version or dataset_version(file_path, cache_dir)
+    path = shared_path(cache_dir, version)
+    for _ in range(2):  # file rusak diterbitkan ulang sekali saja
+        if not os.path.exists(path):
+            if df_merged is None:
+                df_merged = load_processed_data(file_path, cache_dir=cache_dir, chunk_size=chunk_size)
+            try:
+                path = publish_dataset(df_merged, cache_dir, version)
+            except OSError:
+                return df_merged  # Cache hanya optimasi; tanpa file bersama tetap kembalikan salinan biasa
+        try:
+            return open_dataset(path)
+        except (OSError, pa.ArrowInvalid):
+            # File bersama rusak -> hapus lalu terbitkan ulang dari snapshot
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Sudah dihapus proses lain, atau masih dipetakan (Windows)
+    # Masih gagal dibuka setelah diterbitkan ulang: pakai salinan di memori
+    if df_merged is None:
+        df_merged = load_processed_data(file_path, cache_dir=cache_dir, chunk_size=chunk_size)
+    return df_merged
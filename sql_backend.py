@@ -0,0 +1,193 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from compact_layout import DAY_NAMES
+
+try:
+    import duckdb
+except ImportError:  # Backend SQL bersifat opsional; backend pandas tetap berjalan tanpa duckdb
+    duckdb = None
+
+# --- Backend Kueri SQL (DuckDB) di Atas Snapshot Parquet ---
+# Alternatif untuk backend pandas: metrik bernama yang sama (lihat metrics_layer.METRICS)
+# dijawab dengan kueri DuckDB langsung pada file Parquet dataset (snapshot dasar + partisi).
+# Filter tanggal/kategori didorong ke klausa WHERE sehingga hanya kolom & row group yang
+# relevan yang dibaca, dan agregasi berjalan paralel di semua core. Metrik yang tidak
+# didukung di sini (profil kolom/describe, ringkasan pelanggan, grid kepadatan) tetap memakai pandas.
+#
+# Semantik mengikuti backend pandas: tanggal inklusif pada hari created_at, kunci kosong
+# (NULL) tidak ikut roll-up, dan hitungan unik tidak menghitung NULL seperti nunique().
+
+_ROLLUPS = {
+    # nama metrik -> (kolom kunci, ukuran; None = jumlah baris item)
+    'items_by_status': ('status', None),
+    'items_by_payment': ('payment_method', None),
+    'items_by_category': ('category_name_1', None),
+    'sales_by_category': ('category_name_1', 'net_item_sales'),
+    'sales_by_month': ('order_month', 'net_item_sales'),
+    'sales_by_date': ('order_date', 'net_item_sales'),
+    'sales_by_day_of_week': ('day_of_week', 'net_item_sales'),
+    'sales_by_hour': ('hour_of_day', 'net_item_sales'),
+}
+_DISTINCT = {
+    'unique_orders': 'increment_id',
+    'unique_customers': 'Customer ID',
+    'unique_skus': 'sku',
+}
+_TOP = {
+    # nama metrik -> (kolom kunci, nama Series hasil seperti backend pandas)
+    'top_customers': ('Customer ID', 'net_sales'),
+    'top_skus': ('sku', 'net_item_sales'),
+}
+SQL_METRICS = set(_ROLLUPS) | set(_DISTINCT) | set(_TOP) | {'totals'}
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def filter_clause(start_date=None, end_date=None, categories=None):
+    clauses, params = [], []
+    if start_date is not None and end_date is not None:
+        clauses.append('created_at >= ? AND created_at < ?')
+        params += [pd.Timestamp(start_date).to_pydatetime(),
+                   (pd.Timestamp(end_date) + pd.Timedelta(days=1)).to_pydatetime()]
+    if categories is not None:
+        if len(categories) == 0:
+            clauses.append('FALSE')
+        else:
+            clauses.append(f"category_name_1 IN ({', '.join('?' * len(categories))})")
+            params += list(categories)
+    return clauses, params
+
+
+def _decode_key(by, values):
+    # Kode kalender dikembalikan ke bentuk yang sama dengan roll-up kubus
+    if by == 'order_month':
+        return pd.PeriodIndex.from_ordinals(values.astype('int64'), freq='M')
+    if by == 'order_date':
+        return pd.Index(pd.to_datetime(values.astype('int64'), unit='D').date)
+    if by == 'day_of_week':
+        return pd.Index([DAY_NAMES[int(v)] for v in values])
+    return pd.Index(values)
+
+
+class DuckDBBackend:
+    def __init__(self, parquet_paths, threads=None):
+        if duckdb is None:
+            raise ImportError("Backend 'duckdb' membutuhkan paket duckdb (pip install duckdb).")
+        self.parquet_paths = list(parquet_paths)
+        self._connection = duckdb.connect(database=':memory:')
+        if threads:
+            self._connection.execute(f"SET threads = {int(threads)}")
+        # Definisi view tidak menerima parameter, jadi daftar file ditulis sebagai literal SQL
+        files = ', '.join("'" + path.replace("'", "''") + "'" for path in self.parquet_paths)
+        self._connection.execute(f"CREATE VIEW sales AS SELECT * FROM read_parquet([{files}], union_by_name = true)")
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def supports(self, name):
+        return name in SQL_METRICS
+
+    def query(self, sql, params=()):
+        # Satu cursor per kueri agar aman dipakai bersamaan oleh beberapa sesi
+        with self._lock:
+            cursor = self._connection.cursor()
+        try:
+            return cursor.execute(sql, list(params)).df()
+        finally:
+            cursor.close()
+
+    def _select(self, select, start_date, end_date, categories, extra=(), tail=''):
+        clauses, params = filter_clause(start_date, end_date, categories)
+        clauses += list(extra)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        return self.query(f"SELECT {select} FROM sales{where} {tail}", params)
+
+    def date_bounds(self):
+        bounds = self.query("SELECT min(created_at) AS first, max(created_at) AS last FROM sales").iloc[0]
+        return bounds['first'].date(), bounds['last'].date()
+
+    def categories(self, start_date=None, end_date=None):
+        # Pilihan kategori di sidebar: kategori yang muncul dalam rentang tanggal
+        result = self._select("DISTINCT category_name_1 AS category", start_date, end_date, None,
+                              extra=["category_name_1 IS NOT NULL"], tail='ORDER BY 1')
+        return result['category'].tolist()
+
+    def compute(self, name, start_date=None, end_date=None, categories=None):
+        if name == 'totals':
+            row = self._select(
+                "fsum(net_item_sales) AS net_item_sales, fsum(discount_amount) AS discount_amount, "
+                "fsum(total_price_per_item) AS total_price_per_item, count(*) AS line_count",
+                start_date, end_date, categories).iloc[0]
+            # fsum atas nol baris = NULL; backend pandas memberi 0
+            totals = {k: float(v) if pd.notna(v) else 0.0 for k, v in row.items() if k != 'line_count'}
+            totals['line_count'] = int(row['line_count'])
+            return totals
+        if name in _DISTINCT:
+            column = _quote(_DISTINCT[name])
+            return int(self._select(f"count(DISTINCT {column}) AS n", start_date, end_date, categories).iloc[0, 0])
+        if name in _ROLLUPS:
+            by, measure = _ROLLUPS[name]
+            value = f"fsum({_quote(measure)})" if measure else "count(*)"
+            result = self._select(f"{_quote(by)} AS key, {value} AS value", start_date, end_date, categories,
+                                  extra=[f"{_quote(by)} IS NOT NULL"], tail='GROUP BY 1')
+            series = pd.Series(result['value'].to_numpy(), index=_decode_key(by, result['key'].to_numpy()),
+                               name=measure or 'line_count')
+            series.index.name = by
+            return series.sort_index()
+        if name in _TOP:
+            by, label = _TOP[name]
+            result = self._select(f"{_quote(by)} AS key, fsum(net_item_sales) AS value", start_date, end_date,
+                                  categories, extra=[f"{_quote(by)} IS NOT NULL"],
+                                  tail='GROUP BY 1 ORDER BY 2 DESC LIMIT 10')
+            series = pd.Series(result['value'].to_numpy(), index=pd.Index(result['key'].to_numpy(), name=by), name=label)
+            return series
+        raise KeyError(name)
+
+
+# --- Pemeriksaan Paritas pandas vs SQL ---
+def filter_presets(min_date, max_date, categories):
+    # Preset filter relatif terhadap rentang data: (nama, tanggal awal, tanggal akhir, kategori)
+    categories = sorted(categories)
+    first_month_end = min(pd.Timestamp(min_date) + pd.Timedelta(days=30), pd.Timestamp(max_date)).date()
+    return [
+        ('semua data', None, None, None),
+        ('30 hari pertama', min_date, first_month_end, None),
+        ('hari terakhir', max_date, max_date, None),
+        ('3 kategori pertama', None, None, categories[:3]),
+        ('30 hari pertama, 1 kategori', min_date, first_month_end, categories[:1]),
+        ('tanpa kategori', None, None, []),
+    ]
+
+
+def _same(left, right):
+    if isinstance(left, dict):
+        return left.keys() == right.keys() and all(_same(left[k], right[k]) for k in left)
+    if isinstance(left, pd.Series):
+        if len(left) != len(right):
+            return False
+        if len(left) and np.unique(np.round(left.to_numpy(dtype='float64'), 6)).size == len(left):
+            # Tanpa nilai kembar urutan harus sama persis; dengan nilai kembar cukup himpunannya
+            if left.index.tolist() != right.index.tolist():
+                return False
+        elif set(left.index.tolist()) != set(right.index.tolist()):
+            return False
+        return np.allclose(left.to_numpy(dtype='float64'), right.to_numpy(dtype='float64'), rtol=1e-9, atol=1e-6)
+    return np.isclose(float(left), float(right), rtol=1e-9, atol=1e-6)
+
+
+def parity_check(backend, pandas_metric, presets):
+    # pandas_metric(nama, awal, akhir, kategori) -> hasil backend pandas untuk preset tersebut
+    rows = []
+    for preset, start_date, end_date, categories in presets:
+        for name in sorted(SQL_METRICS):
+            expected = pandas_metric(name, start_date, end_date, categories)
+            actual = backend.compute(name, start_date, end_date, categories)
+            rows.append({'preset': preset, 'metrik': name, 'sama': bool(_same(expected, actual))})
+    return pd.DataFrame(rows)
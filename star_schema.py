@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+from timestamp_stage import calendar_fields
+
+# --- Skema Bintang: Tabel Fakta Item + Dimensi Pesanan/Pelanggan/Produk ---
+# Pengganti rantai pd.merge (outer + inner + inner). Setiap kunci gabungan
+# dikodekan menjadi integer padat, pasangan baris dicari secara vektor, lalu to_frame()
+# membentuk *semua* kolom df_merged sekaligus dengan `take` dari tabel dimensinya. Kolom
+# kalender dihitung per baris pesanan (bukan per baris item) sebelum di-take.
+#
+# Tidak ada pembentukan kolom secara malas (per kolom saat grafik memintanya): seluruh hilir
+# (snapshot Parquet, kubus, indeks filter, file Arrow bersama) membaca df_merged lengkap, dan
+# sisi dashboard sudah hanya menghitung agregat yang diminta lewat kubus & indeks filter.
+
+ORDER_COLUMNS = ['increment_id', 'created_at', 'status', 'payment_method', 'grand_total', 'Customer ID']
+CUSTOMER_COLUMNS = ['sales_commission_code', 'Customer Since']
+SALE_COLUMNS = ['item_id', 'qty_ordered', 'price_per_unit_sold', 'discount_amount']
+PRODUCT_COLUMNS = ['sku', 'category_name_1', 'product_original_price']
+MEASURE_COLUMNS = ['total_price_per_item', 'net_item_sales']
+CALENDAR_COLUMNS = ['order_date', 'order_month', 'customer_since_year', 'day_of_week', 'hour_of_day']
+
+# Kode kalender: order_date = hari sejak 1970-01-01, order_month = bulan sejak 1970-01
+# (sama dengan ordinal pd.Period 'M'), day_of_week = 0 (Senin) .. 6 (Minggu)
+CALENDAR_DTYPES = {
+    'order_date': 'int32',
+    'order_month': 'int32',
+    'customer_since_year': 'int16',
+    'day_of_week': 'int8',
+    'hour_of_day': 'int8',
+}
+# customer_since_year memakai tahun created_at agar selalu ada tahunnya
+CALENDAR_FIELDS = {
+    'order_date': 'days',
+    'order_month': 'months',
+    'customer_since_year': 'year',
+    'day_of_week': 'dayofweek',
+    'hour_of_day': 'hour',
+}
+
+# Urutan kolom sama persis dengan hasil rantai merge sebelumnya
+MERGED_COLUMNS = ORDER_COLUMNS + CUSTOMER_COLUMNS + SALE_COLUMNS + PRODUCT_COLUMNS + MEASURE_COLUMNS + CALENDAR_COLUMNS
+
+
+def encode_keys(*key_series, sort=False):
+    # Kode integer padat bersama untuk beberapa kolom kunci; NaN ikut diberi kode (seperti pd.merge).
+    # sort=True hanya bila urutan kode harus mengikuti urutan nilai (seperti outer merge).
+    values = pd.concat([pd.Series(s.to_numpy()) for s in key_series], ignore_index=True)
+    codes, uniques = pd.factorize(values, sort=sort, use_na_sentinel=False)
+    bounds = np.cumsum([0] + [len(s) for s in key_series])
+    return [codes[start:end] for start, end in zip(bounds[:-1], bounds[1:])], len(uniques)
+
+
+def match_codes(left_codes, right_codes, n_codes, how='inner'):
+    # Join berbasis kode: untuk setiap baris kiri (urutan dipertahankan) semua baris
+    # kanan dengan kode sama, dalam urutan aslinya. Tanpa tabel hash.
+    # how='left': baris kiri tanpa pasangan tetap muncul sekali dengan indeks kanan -1.
+    right_order = np.argsort(right_codes, kind='stable')
+    counts = np.bincount(right_codes, minlength=n_codes)
+    starts = np.cumsum(counts) - counts
+    matches = counts[left_codes]
+    per_left = np.maximum(matches, 1) if how == 'left' else matches
+    left_idx = np.repeat(np.arange(len(left_codes)), per_left)
+    offsets = np.arange(len(left_idx)) - np.repeat(np.cumsum(per_left) - per_left, per_left)
+    right_pos = np.repeat(starts[left_codes], per_left) + offsets
+    unmatched = np.repeat(matches == 0, per_left)
+    right_idx = right_order[np.where(unmatched, 0, right_pos)] if len(right_order) else np.zeros(len(left_idx), dtype=np.intp)
+    right_idx[unmatched] = -1
+    return left_idx, right_idx
+
+
+def compact_dimension(table, idx):
+    # Buang baris dimensi yang tidak dirujuk fakta mana pun, lalu petakan ulang indeksnya
+    valid = idx >= 0
+    referenced = np.bincount(idx[valid], minlength=len(table)) > 0
+    remap = np.cumsum(referenced) - 1
+    new_idx = np.where(valid, remap[np.where(valid, idx, 0)], -1)
+    return table.take(np.flatnonzero(referenced)).reset_index(drop=True), new_idx
+
+
+def _take(series, positions, allow_fill=False):
+    # Kolom numpy (termasuk object & datetime64) diambil langsung dengan ndarray.take
+    values = series.array if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) else series.to_numpy()
+    return pd.Series(pd.api.extensions.take(values, positions, allow_fill=allow_fill), name=series.name)
+
+
+class StarSchema:
+    def __init__(self, orders, customers, sales, products, order_idx, customer_idx, sale_idx, product_idx):
+        # Dimensi dan fakta disimpan apa adanya; *_idx menunjuk baris dimensi untuk tiap baris
+        # df_merged. Hanya bentuk antara: to_frame() membentuk semua kolom dalam satu lintasan
+        self.orders = orders
+        self.customers = customers
+        self.sales = sales
+        self.products = products
+        self.order_idx = order_idx
+        self.customer_idx = customer_idx
+        self.sale_idx = sale_idx
+        self.product_idx = product_idx
+
+    @classmethod
+    def from_tables(cls, tables):
+        orders = tables['orders'].reset_index(drop=True)
+        customers = tables['customers'].reset_index(drop=True)
+        sales = tables['sales'].reset_index(drop=True).rename(columns={'price': 'price_per_unit_sold'})
+        products = tables['products'].reset_index(drop=True).rename(columns={'price': 'product_original_price'})
+
+        (order_cust, cust_codes), n_cust = encode_keys(orders['Customer ID'], customers['Customer ID'], sort=True)
+        (order_inc, sale_inc), n_inc = encode_keys(orders['increment_id'], sales['increment_id'])
+        (sale_item, product_item), n_item = encode_keys(sales['item_id'], products['item_id'])
+
+        # 1) Pesanan x pelanggan (setara outer merge): diurutkan menurut Customer ID.
+        #    Pesanan tanpa pelanggan tetap ada (customer_idx = -1); pelanggan tanpa pesanan
+        #    tidak pernah lolos inner join berikutnya sehingga pasangannya dilewati sama sekali.
+        # Hasilnya hanya indeks baris per dimensi; kolom dibentuk seluruhnya di to_frame()
+        sorted_orders = np.argsort(order_cust, kind='stable')
+        left_pos, pair_customer = match_codes(order_cust[sorted_orders], cust_codes, n_cust, how='left')
+        pair_order = sorted_orders[left_pos]
+
+        # 2) x baris penjualan (fakta) lewat kode increment_id
+        pair_pos, sale_idx = match_codes(order_inc[pair_order], sale_inc, n_inc)
+        # 3) x produk lewat kode item_id
+        row_pos, product_idx = match_codes(sale_item[sale_idx], product_item, n_item)
+
+        orders, order_idx = compact_dimension(orders, pair_order[pair_pos][row_pos])
+        customers, customer_idx = compact_dimension(customers, pair_customer[pair_pos][row_pos])
+        sales, sale_idx = compact_dimension(sales, sale_idx[row_pos])
+        products, product_idx = compact_dimension(products, product_idx)
+        return cls(orders, customers, sales, products, order_idx, customer_idx, sale_idx, product_idx)
+
+    def __len__(self):
+        return len(self.sale_idx)
+
+    def sort_by_created_at(self):
+        # Urutkan baris menurut created_at (NaT di akhir) cukup dengan mempermutasi indeks,
+        # sebelum kolom dibentuk, sehingga tidak ada kolom yang disalin dua kali
+        created_ns = self.orders['created_at'].to_numpy().view('int64').copy()
+        created_ns[self.orders['created_at'].isna().to_numpy()] = np.iinfo('int64').max
+        order = np.argsort(created_ns[self.order_idx], kind='stable')
+        self.order_idx = self.order_idx[order]
+        self.customer_idx = self.customer_idx[order]
+        self.sale_idx = self.sale_idx[order]
+        self.product_idx = self.product_idx[order]
+        return self
+
+    def _order_calendar(self):
+        # Kode integer (hari/bulan sejak 1970, 0=Senin) per baris dimensi pesanan, dari satu
+        # lintasan aritmetika epoch (timestamp_stage.calendar_fields); teks dibentuk saat tampil
+        fields, missing = calendar_fields(self.orders['created_at'])
+        calendar = {}
+        for name in CALENDAR_COLUMNS:
+            codes = fields[CALENDAR_FIELDS[name]]
+            dtype = CALENDAR_DTYPES[name]
+            # Dtype integer nullable hanya bila ada created_at yang kosong (NaT)
+            calendar[name] = codes.astype(dtype.capitalize()).mask(missing) if missing.any() else codes.astype(dtype)
+        return calendar
+
+    def to_frame(self):
+        sales = self.sales
+        total = sales['qty_ordered'] * sales['price_per_unit_sold']
+        sources = {name: (self.orders[name], self.order_idx) for name in ORDER_COLUMNS}
+        sources.update({name: (self.customers[name], self.customer_idx) for name in CUSTOMER_COLUMNS})
+        sources.update({name: (sales[name], self.sale_idx) for name in SALE_COLUMNS})
+        sources.update({name: (self.products[name], self.product_idx) for name in PRODUCT_COLUMNS})
+        sources['total_price_per_item'] = (total, self.sale_idx)
+        sources['net_item_sales'] = (total - sales['discount_amount'], self.sale_idx)
+        sources.update({name: (codes, self.order_idx) for name, codes in self._order_calendar().items()})
+        # Pesanan tanpa pelanggan (outer join) memberi kolom pelanggan kosong
+        missing_customer = bool((self.customer_idx < 0).any())
+        columns = {}
+        for name in MERGED_COLUMNS:
+            values, positions = sources[name]
+            columns[name] = _take(values, positions, allow_fill=name in CUSTOMER_COLUMNS and missing_customer).rename(name)
+        return pd.DataFrame(columns)
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# Modul dashboard berada di akar repo (tanpa paket)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import generate_export  # noqa: E402
+
+# CSV sintetis kecil dengan skema & distribusi ekspor asli (generator yang sama dengan benchmark.py)
+SYNTHETIC_ROWS = 20_000
+
+
+@pytest.fixture(scope='session')
+def synthetic_csv(tmp_path_factory):
+    return generate_export(str(tmp_path_factory.mktemp('data') / 'synthetic.csv'), SYNTHETIC_ROWS)
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from compact_layout import verify_kpi_totals
+from data_pipeline import DEFAULT_CHUNK_SIZE, RAW_COLUMNS, build_merged
+from timestamp_stage import parse_timestamps
+
+
+def test_mixed_timestamps_fallback_keeps_positions():
+    # String yang gagal format tetap diparsing per elemen & ditulis ke posisi yang benar
+    values = pd.Series(['7/1/2016', '2016-07-05 10:00', '7/2/2016', 'July 9 2016', None, 'garbage'])
+    expected = pd.Series([pd.Timestamp('2016-07-01'), pd.Timestamp('2016-07-05 10:00'), pd.Timestamp('2016-07-02'),
+                          pd.Timestamp('2016-07-09'), pd.NaT, pd.NaT], dtype='datetime64[ns]')
+    stats = {}
+    parsed = parse_timestamps(values, '%m/%d/%Y', stats)
+    pd.testing.assert_series_equal(parsed, expected)
+    assert stats['fallback'] == 3
+    assert stats['gagal'] == 1
+
+
+def test_chunked_ingest_matches_single_read(synthetic_csv):
+    # build_merged() memanggil verify_kpi_totals setelah pemadatan; kedua jalur baca harus identik
+    single = build_merged(synthetic_csv)
+    chunked = build_merged(synthetic_csv, chunk_size=DEFAULT_CHUNK_SIZE // 50)
+    pd.testing.assert_frame_equal(single, chunked)
+
+
+def test_verify_kpi_totals_detects_changed_totals(synthetic_csv):
+    compact = build_merged(synthetic_csv)
+    changed = compact.copy()
+    changed['net_item_sales'] = changed['net_item_sales'].astype('float64') + 0.01
+    with pytest.raises(ValueError, match='net_item_sales'):
+        verify_kpi_totals(compact, changed)
+
+
+@pytest.mark.parametrize('chunk_size', [None, 100])
+def test_malformed_numeric_cells_are_coerced(synthetic_csv, tmp_path, chunk_size):
+    # Sel bukan angka (mis. '#VALUE!' dari Excel) tidak menggagalkan muatan: harga -> 0, Customer ID -> -1
+    raw = pd.read_csv(synthetic_csv, usecols=RAW_COLUMNS, dtype=str, nrows=2000).dropna(subset=['item_id'])
+    raw = raw.drop_duplicates('increment_id', keep=False)  # pesanan satu item: setiap sel rusak di pesanan sendiri
+    raw.iloc[0, raw.columns.get_loc('price')] = '#VALUE!'
+    raw.iloc[1, raw.columns.get_loc('Customer ID')] = '#VALUE!'
+    raw.iloc[2, raw.columns.get_loc('grand_total')] = '#VALUE!'
+    path = tmp_path / 'malformed.csv'
+    raw.to_csv(path, index=False)
+
+    merged = build_merged(str(path), chunk_size=chunk_size)
+    item = merged[merged['item_id'] == int(float(raw['item_id'].iloc[0]))]
+    assert len(item) == 1
+    assert item['price_per_unit_sold'].iloc[0] == 0
+    assert item['product_original_price'].iloc[0] == 0
+    order = merged[merged['increment_id'] == raw['increment_id'].iloc[1]]
+    assert len(order) and (order['Customer ID'] == -1).all()
+    order = merged[merged['increment_id'] == raw['increment_id'].iloc[2]]
+    assert len(order) and (order['grand_total'] == 0).all()
@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip('duckdb')
+
+from benchmark import StageTimer, build_structures, run_pipeline  # noqa: E402
+from metrics_layer import FilterContext, MetricsStore, filter_key  # noqa: E402
+from olap_cube import slice_cube  # noqa: E402
+from sql_backend import DuckDBBackend, filter_presets, parity_check  # noqa: E402
+
+
+def test_duckdb_matches_pandas_metrics(synthetic_csv, tmp_path):
+    # Pemeriksaan paritas yang sama dengan tombol di dashboard, untuk setiap preset filter
+    timer = StageTimer()
+    df, snapshot_path = run_pipeline(synthetic_csv, str(tmp_path), timer)
+    structures = build_structures(df, timer)
+
+    def pandas_metric(name, start, end, categories):
+        context = FilterContext(df, slice_cube(structures['cube'], start, end, categories),
+                                structures['index'].select(start, end, categories), structures['sketches'],
+                                structures['customers'], start, end, categories, stats=structures['stats'])
+        return MetricsStore().get(name, filter_key('parity', start, end, categories), context)
+
+    valid = df['created_at'].dropna()
+    categories = sorted(structures['index'].categories.dropna().tolist())
+    presets = filter_presets(valid.min().date(), valid.max().date(), categories)
+    parity_df = parity_check(DuckDBBackend([snapshot_path]), pandas_metric, presets)
+    assert len(parity_df)
+    assert parity_df['sama'].all(), parity_df.loc[~parity_df['sama'], ['preset', 'metrik']].to_dict('records')
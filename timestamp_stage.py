@@ -0,0 +1,74 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# --- Tahap Timestamp: Parsing Teks Tanggal & Kolom Kalender ---
+# Ekspor mentah mengulang string tanggal yang sama ribuan kali ('7/1/2016', '2016-7'),
+# jadi setiap string *unik* cukup diparsing sekali lalu hasilnya disebar kembali lewat
+# kode integer. Parsing memakai format tetap; inferensi format (jalur lambat) hanya
+# dipakai untuk string unik yang gagal. Semua kolom kalender dihitung bersamaan dari
+# aritmetika int64 (nanodetik sejak epoch), tanpa aksesor .dt terpisah per kolom.
+
+_NAT = np.iinfo('int64').min
+_NS_PER_HOUR = 3_600 * 10**9
+_NS_PER_DAY = 24 * _NS_PER_HOUR
+
+# Penghitung per kolom yang dikumpulkan selama parsing (dijumlahkan antar chunk)
+TIMESTAMP_STATS = ['baris', 'string_unik', 'fallback', 'gagal']
+
+
+def parse_timestamps(values, date_format, stats=None):
+    codes, uniques = pd.factorize(values.to_numpy())
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format=date_format, errors='coerce')
+    failed = parsed.isna().to_numpy()
+    if failed.any():
+        with warnings.catch_warnings():
+            # Inferensi per elemen (dateutil) memang disengaja di sini; peringatannya tidak perlu
+            warnings.simplefilter('ignore', UserWarning)
+            # format='mixed': setiap string diinferensi sendiri (tanpa itu pandas menebak satu
+            # format dari elemen pertama). Ditulis per posisi, bukan per label indeks.
+            fallback = pd.to_datetime(uniques[failed], format='mixed', errors='coerce')
+            parsed[failed] = fallback.to_numpy(dtype='datetime64[ns]')
+    # Kode -1 (nilai kosong) jatuh ke elemen terakhir = NaT
+    parsed_ns = np.append(parsed.to_numpy(dtype='datetime64[ns]').view('int64'), _NAT)
+    result_ns = parsed_ns[codes]
+    if stats is not None:
+        present = codes >= 0
+        counts = {
+            'baris': len(codes),
+            'string_unik': len(uniques),
+            'fallback': int(np.count_nonzero(failed[codes[present]])),
+            'gagal': int(np.count_nonzero(result_ns[present] == _NAT)),
+        }
+        for key, count in counts.items():
+            stats[key] = stats.get(key, 0) + count
+    return pd.Series(result_ns.view('datetime64[ns]'), index=values.index, name=values.name)
+
+
+def calendar_fields(timestamps):
+    # Satu lintasan vektor: hari & bulan sejak 1970, tahun, hari dalam minggu (0=Senin), jam.
+    # Tahun/bulan memakai algoritme civil-from-days (kalender Gregorian proleptik).
+    ns = timestamps.to_numpy(dtype='datetime64[ns]').view('int64')
+    missing = ns == _NAT
+    ns = np.where(missing, 0, ns)
+    days = ns // _NS_PER_DAY
+    hour = (ns - days * _NS_PER_DAY) // _NS_PER_HOUR
+
+    z = days + 719_468
+    era = z // 146_097
+    doe = z - era * 146_097
+    yoe = (doe - doe // 1_460 + doe // 36_524 - doe // 146_096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    month = np.where(mp < 10, mp + 3, mp - 9)
+    year = yoe + era * 400 + (month <= 2)
+
+    fields = pd.DataFrame({
+        'days': days,
+        'months': (year - 1970) * 12 + month - 1,
+        'year': year,
+        'dayofweek': (days + 3) % 7,  # 1970-01-01 adalah hari Kamis
+        'hour': hour,
+    }, index=timestamps.index)
+    return fields, missing